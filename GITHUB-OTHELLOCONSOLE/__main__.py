@@ -1,18 +1,328 @@
 """
 Module principal du package othello. C'est ce module que nous allons exécuter pour démarrer votre jeu.
+
+Sans argument, on démarre une partie en console. Les sous-commandes donnent accès aux outils sans console:
+
+    python __main__.py simuler --parties 1000 --processus 4
+    python __main__.py simuler --parties 100 --mesures mesures.json --pstats mesures.prof
+    python __main__.py bibliotheque --sortie ouvertures.bin --demi-coups 6
+    python __main__.py --bibliotheque ouvertures.bin simuler --noir AlphaBeta
+    python __main__.py finale othello/partie_de_base.txt
+    python __main__.py perft --profondeur 6
+    python __main__.py perft --tailles 6 8 10 16 32
+    python __main__.py --taille 10
+    python __main__.py positions --base positions/ --archives parties.bin
+    python __main__.py simuler --parties 5000 --archive parties.bin
+    python __main__.py entrainer parties.bin --sortie poids.bin
+    python __main__.py simuler --noir AlphaBeta --blanc AlphaBeta --poids poids.bin
+    python __main__.py serveur --port 8765
+    python __main__.py charge --port 8765 --clients 50 --adversaire AlphaBeta
+    python __main__.py analyser sauvegardes/ parties.bin --sortie analyses.jsonl --processus 4
+    python __main__.py tournoi Ordinateur AlphaBeta:2 AlphaBeta:3 --processus 4 --sprt 0 50
+    python __main__.py parallele --profondeur 7 --processus 1 2 4 8
+    python __main__.py banc --sortie resultats.json --seuil 1.5
 """
+import argparse
+import sys
 
 from othello.partie import Partie
 
+
+def creer_analyseur():
+    """
+    Construit l'analyseur des arguments de la ligne de commande.
+
+    Returns:
+        Un argparse.ArgumentParser.
+    """
+    analyseur = argparse.ArgumentParser(description="Othello en console.")
+    analyseur.add_argument("--bibliotheque", "--book", default=None,
+                           help="Fichier de la bibliothèque d'ouvertures des joueurs ordinateur.")
+    analyseur.add_argument("--taille", "--size", type=int, default=8,
+                           help="Nombre de lignes (et de colonnes) de la planche de la partie en console.")
+    sous_commandes = analyseur.add_subparsers(dest="commande")
+
+    simuler = sous_commandes.add_parser("simuler", aliases=["simulate"],
+                                        help="Joue des parties ordinateur contre ordinateur sans console.")
+    simuler.add_argument("--parties", "--games", type=int, default=100, help="Nombre de parties à jouer.")
+    simuler.add_argument("--processus", "--workers", type=int, default=1, help="Nombre de processus.")
+    simuler.add_argument("--graine", "--seed", type=int, default=0, help="Graine des générateurs aléatoires.")
+    simuler.add_argument("--noir", default="Ordinateur", choices=["Ordinateur", "AlphaBeta"],
+                         help="Type du joueur noir.")
+    simuler.add_argument("--blanc", default="Ordinateur", choices=["Ordinateur", "AlphaBeta"],
+                         help="Type du joueur blanc.")
+    simuler.add_argument("--profondeur", type=int, default=2, help="Profondeur de recherche des joueurs AlphaBeta.")
+    simuler.add_argument("--planche", default="bitboard", choices=["dictionnaire", "bitboard"],
+                         help="Représentation de la planche.")
+    simuler.add_argument("--rapport", type=int, default=100,
+                         help="Nombre de parties entre deux affichages des statistiques.")
+    simuler.add_argument("--archive", default=None, help="Fichier où enregistrer les parties (format binaire).")
+    simuler.add_argument("--mesures", default=None,
+                         help="Fichier JSON où écrire les mesures de l'instrumentation de toutes les parties.")
+    simuler.add_argument("--mesures-parties", default=None,
+                         help="Fichier JSON où écrire les mesures de chaque partie, une partie par ligne.")
+    simuler.add_argument("--pstats", default=None,
+                         help="Fichier où écrire les mesures de toutes les parties au format de cProfile.")
+    simuler.add_argument("--poids", "--weights", default=None,
+                         help="Fichier des poids de l'évaluation par motifs des joueurs AlphaBeta.")
+
+    bibliotheque = sous_commandes.add_parser("bibliotheque", aliases=["book"],
+                                             help="Construit une bibliothèque d'ouvertures par recherche alpha-bêta.")
+    bibliotheque.add_argument("--sortie", "--output", default="ouvertures.bin", help="Fichier à écrire.")
+    bibliotheque.add_argument("--demi-coups", "--plies", type=int, default=6,
+                              help="Nombre de demi-coups couverts depuis la position initiale.")
+    bibliotheque.add_argument("--profondeur", type=int, default=6, help="Profondeur de recherche de chaque position.")
+
+    finale = sous_commandes.add_parser("finale", aliases=["endgame"],
+                                       help="Résout exactement la fin d'une partie sauvegardée.")
+    finale.add_argument("fichier", help="Fichier de la partie sauvegardée (voir Partie.sauvegarder).")
+
+    perft = sous_commandes.add_parser("perft", help="Vérifie et mesure la génération de coups de chaque planche.")
+    perft.add_argument("--profondeur", "--depth", type=int, default=6, help="Profondeur, en demi-coups.")
+    perft.add_argument("--planches", nargs="+", default=None, choices=["dictionnaire", "bitboard", "numpy"],
+                       help="Représentations à mesurer (toutes par défaut).")
+    perft.add_argument("--fichier", default=None,
+                       help="Partie sauvegardée à utiliser plutôt que la position initiale.")
+    perft.add_argument("--taille", "--size", type=int, default=8, help="Taille de la planche de la position initiale.")
+    perft.add_argument("--tailles", "--sizes", nargs="+", type=int, default=None,
+                       help="Mesure plutôt le coût d'un coup sur chacune de ces tailles de planche.")
+    perft.add_argument("--parties", "--games", type=int, default=20,
+                       help="Nombre de parties au hasard jouées sur chaque taille (avec --tailles).")
+
+    positions = sous_commandes.add_parser("positions",
+                                          help="Ajoute des parties à une base de positions et affiche les plus "
+                                               "fréquentes.")
+    positions.add_argument("--base", default="positions", help="Répertoire de la base de positions.")
+    positions.add_argument("--archives", nargs="*", default=[], help="Fichiers de parties enregistrées à ajouter.")
+    positions.add_argument("--textes", nargs="*", default=[], help="Parties sauvegardées au format texte à ajouter.")
+    positions.add_argument("--limite", type=int, default=1000000,
+                           help="Nombre maximal de positions gardées en mémoire avant d'écrire une série.")
+    positions.add_argument("--plus-frequentes", type=int, default=10, help="Nombre de positions à afficher.")
+
+    entrainer = sous_commandes.add_parser("entrainer", aliases=["train"],
+                                          help="Apprend les poids de l'évaluation par motifs à partir de parties "
+                                               "enregistrées (NumPy).")
+    entrainer.add_argument("archives", nargs="+", help="Fichiers de parties enregistrées (voir simuler --archive).")
+    entrainer.add_argument("--sortie", "--output", default="poids.bin", help="Fichier des poids à écrire.")
+    entrainer.add_argument("--regularisation", type=float, default=1.0, help="Poids de la régularisation ridge.")
+    entrainer.add_argument("--iterations", type=int, default=200, help="Nombre maximal d'itérations.")
+    entrainer.add_argument("--validation", type=float, default=0.1,
+                           help="Fraction des positions gardées pour la validation.")
+
+    serveur = sous_commandes.add_parser("serveur", aliases=["server"],
+                                        help="Héberge des parties jouées par des clients (une ligne JSON par requête).")
+    serveur.add_argument("--hote", "--host", default="127.0.0.1", help="Adresse TCP d'écoute.")
+    serveur.add_argument("--port", type=int, default=8765, help="Port TCP d'écoute.")
+    serveur.add_argument("--socket", default=None, help="Chemin d'un socket Unix, utilisé plutôt que TCP.")
+    serveur.add_argument("--fils", "--threads", type=int, default=4,
+                         help="Nombre de fils d'exécution qui cherchent les coups ordinateur.")
+    serveur.add_argument("--rapport", type=float, default=10,
+                         help="Nombre de secondes entre deux affichages des statistiques.")
+
+    charge = sous_commandes.add_parser("charge", aliases=["load"],
+                                       help="Test de charge: de nombreux clients jouent en même temps contre un "
+                                            "serveur.")
+    charge.add_argument("--hote", "--host", default="127.0.0.1", help="Adresse TCP du serveur.")
+    charge.add_argument("--port", type=int, default=8765, help="Port TCP du serveur.")
+    charge.add_argument("--socket", default=None, help="Chemin d'un socket Unix, utilisé plutôt que TCP.")
+    charge.add_argument("--clients", type=int, default=10, help="Nombre de clients simultanés.")
+    charge.add_argument("--parties", "--games", type=int, default=5, help="Nombre de parties par client.")
+    charge.add_argument("--adversaire", default="Ordinateur", choices=["Ordinateur", "AlphaBeta", "MCTS"],
+                        help="Type du joueur ordinateur contre lequel jouent les clients.")
+    charge.add_argument("--profondeur", type=int, default=2, help="Profondeur de recherche d'un adversaire AlphaBeta.")
+    charge.add_argument("--graine", "--seed", type=int, default=0, help="Graine des coups au hasard des clients.")
+
+    analyser = sous_commandes.add_parser("analyser", aliases=["analyze"],
+                                         help="Évalue chaque position de parties sauvegardées ou enregistrées et "
+                                              "écrit une ligne JSON par partie.")
+    analyser.add_argument("chemins", nargs="+",
+                          help="Parties sauvegardées (voir Partie.sauvegarder), fichiers de parties enregistrées ou "
+                               "répertoires qui en contiennent.")
+    analyser.add_argument("--sortie", "--output", default="analyses.jsonl",
+                          help="Fichier de sortie; une analyse interrompue y reprend là où elle s'était arrêtée.")
+    analyser.add_argument("--processus", "--workers", type=int, default=1, help="Nombre de processus.")
+    analyser.add_argument("--profondeur", "--depth", type=int, default=6, help="Profondeur de recherche.")
+    analyser.add_argument("--vides-resolution", type=int, default=None,
+                          help="Nombre de cases vides à partir duquel une position est résolue exactement "
+                               "(SEUIL_FINALE par défaut).")
+    analyser.add_argument("--poids", default=None,
+                          help="Fichier des poids de l'évaluation par motifs (voir entrainer).")
+
+    tournoi = sous_commandes.add_parser("tournoi", aliases=["tournament"],
+                                        help="Tournoi toutes rondes entre joueurs ordinateur, avec Elo et SPRT.")
+    tournoi.add_argument("joueurs", nargs="+",
+                         help="Descriptions des joueurs: Ordinateur, AlphaBeta:profondeur[:poids], MCTS:playouts.")
+    tournoi.add_argument("--ouvertures", "--openings", type=int, default=20,
+                         help="Nombre d'ouvertures équilibrées jouées à tour de rôle.")
+    tournoi.add_argument("--paires", "--pairs", type=int, default=100,
+                         help="Nombre maximal de paires de parties (couleurs inversées) par match.")
+    tournoi.add_argument("--sprt", nargs=2, type=float, default=None, metavar=("ELO0", "ELO1"),
+                         help="Arrête chaque match dès que le SPRT entre ces deux différences Elo est décidé.")
+    tournoi.add_argument("--alpha", type=float, default=0.05, help="Risque de première espèce du SPRT.")
+    tournoi.add_argument("--beta", type=float, default=0.05, help="Risque de seconde espèce du SPRT.")
+    tournoi.add_argument("--processus", "--workers", type=int, default=1, help="Nombre de processus.")
+    tournoi.add_argument("--graine", "--seed", type=int, default=0, help="Graine des ouvertures et des parties.")
+
+    parallele = sous_commandes.add_parser("parallele", aliases=["smp"],
+                                          help="Mesure l'accélération de la recherche alpha-bêta parallèle.")
+    parallele.add_argument("--profondeur", "--depth", type=int, default=6, help="Profondeur à atteindre.")
+    parallele.add_argument("--processus", "--workers", nargs="+", type=int, default=[1, 2, 4],
+                           help="Nombres de processus à comparer, le premier servant de référence.")
+    parallele.add_argument("--positions", type=int, default=8, help="Nombre de positions de milieu de partie.")
+    parallele.add_argument("--memoire", type=int, default=16,
+                           help="Taille de la table de transposition partagée, en mégaoctets.")
+    parallele.add_argument("--graine", "--seed", type=int, default=0, help="Graine du tirage des positions.")
+
+    banc = sous_commandes.add_parser("banc", aliases=["bench"],
+                                     help="Mesure les méthodes chaudes et les compare à une référence.")
+    banc.add_argument("--sortie", "--output", default=None, help="Fichier JSON où écrire les résultats.")
+    banc.add_argument("--reference", "--baseline", default=None,
+                      help="Fichier JSON de référence (celui du package par défaut).")
+    banc.add_argument("--seuil", "--threshold", type=float, default=None,
+                      help="Ralentissement relatif à partir duquel une mesure est une régression (SEUIL par défaut).")
+    banc.add_argument("--enregistrer-reference", action="store_true",
+                      help="Remplace la référence par ces résultats plutôt que de les y comparer.")
+    banc.add_argument("--parties", "--games", type=int, default=20,
+                      help="Nombre de parties au hasard par répétition.")
+    banc.add_argument("--repetitions", type=int, default=5, help="Nombre de répétitions de chaque mesure.")
+
+    return analyseur
+
+
 if __name__ == '__main__':
-    # Création d'une instance de Partie.
-    partie = Partie()
+    arguments = creer_analyseur().parse_args()
+
+    if arguments.commande in ["simuler", "simulate"]:
+        from othello.simulation import simuler
+        from othello.instrumentation import Instrumentation
+
+        instrumentation = None
+        if arguments.mesures is not None or arguments.pstats is not None:
+            instrumentation = Instrumentation()
+        simuler(arguments.parties, arguments.processus, arguments.graine, arguments.noir, arguments.blanc,
+                arguments.profondeur, arguments.planche, arguments.rapport, bibliotheque=arguments.bibliotheque,
+                archive=arguments.archive, instrumentation=instrumentation, mesures_parties=arguments.mesures_parties,
+                poids=arguments.poids)
+        if instrumentation is not None:
+            print(instrumentation)
+            if arguments.mesures is not None:
+                instrumentation.ecrire_json(arguments.mesures)
+            if arguments.pstats is not None:
+                instrumentation.ecrire_pstats(arguments.pstats)
+
+    elif arguments.commande in ["bibliotheque", "book"]:
+        from othello.bibliotheque import ConstructeurBibliotheque
+
+        constructeur = ConstructeurBibliotheque()
+        constructeur.ajouter_recherches(arguments.demi_coups, arguments.profondeur, afficher=print)
+        print("{} entrées écrites dans {}".format(constructeur.ecrire(arguments.sortie), arguments.sortie))
+
+    elif arguments.commande in ["finale", "endgame"]:
+        from othello.finale import resoudre_planche
+
+        partie = Partie(arguments.fichier, verbeux=False)
+        print(partie.planche)
+        score, coup, noeuds = resoudre_planche(partie.planche, partie.couleur_joueur_courant)
+        print("{} joue {}: score final {:+d} ({} noeuds)".format(partie.couleur_joueur_courant, coup, score, noeuds))
+
+    elif arguments.commande == "perft":
+        from othello.perft import comparer, comparer_tailles
+
+        if arguments.tailles is not None:
+            comparer_tailles(arguments.tailles, arguments.planches, arguments.parties)
+        elif not comparer(arguments.profondeur, arguments.planches, arguments.fichier, taille=arguments.taille):
+            sys.exit(1)
+
+    elif arguments.commande == "positions":
+        from othello.base_positions import BasePositions, position_de_cle
+        from othello.enregistrement import chaine_de_bitboards
+
+        base = BasePositions(arguments.base, arguments.limite)
+        for nom_fichier in arguments.archives:
+            print("{}: {} parties ajoutées".format(nom_fichier, base.ajouter_archive(nom_fichier)))
+        for nom_fichier in arguments.textes:
+            base.ajouter_fichier_texte(nom_fichier)
+        print("{} positions distinctes".format(base.compacter()))
+        for cle, (nombre, victoires, nulles, defaites) in base.plus_frequentes(arguments.plus_frequentes):
+            joueur, adversaire = position_de_cle(cle)
+            print("{} occurrences, {} victoires, {} nulles, {} défaites pour le joueur au trait (noir ici):".format(
+                nombre, victoires, nulles, defaites))
+            print(chaine_de_bitboards(joueur, adversaire).replace("\n", " "))
+        base.fermer()
+
+    elif arguments.commande in ["entrainer", "train"]:
+        from othello.entrainement import entrainer
+
+        evaluation, _ = entrainer(arguments.archives, arguments.regularisation, arguments.iterations,
+                                  arguments.validation)
+        evaluation.ecrire(arguments.sortie)
+        print("Poids écrits dans {}".format(arguments.sortie))
+
+    elif arguments.commande in ["serveur", "server"]:
+        import asyncio
+        from othello.serveur import servir
+
+        try:
+            asyncio.run(servir(arguments.hote, arguments.port, arguments.socket, arguments.fils, arguments.rapport))
+        except KeyboardInterrupt:
+            pass
+
+    elif arguments.commande in ["charge", "load"]:
+        import asyncio
+        import json
+        from othello.serveur import tester_charge
+
+        print(json.dumps(asyncio.run(tester_charge(arguments.hote, arguments.port, arguments.socket, arguments.clients,
+                                                   arguments.parties, arguments.adversaire, arguments.profondeur,
+                                                   arguments.graine)), indent=2))
+
+    elif arguments.commande in ["analyser", "analyze"]:
+        from othello.analyse import analyser_parties
+        from othello.finale import SEUIL_FINALE
+
+        analyser_parties(arguments.chemins, arguments.sortie, arguments.processus, arguments.profondeur,
+                         SEUIL_FINALE if arguments.vides_resolution is None else arguments.vides_resolution,
+                         arguments.poids)
+
+    elif arguments.commande in ["tournoi", "tournament"]:
+        from othello.tournoi import tournoi
+
+        sprt = None
+        if arguments.sprt is not None:
+            sprt = (arguments.sprt[0], arguments.sprt[1], arguments.alpha, arguments.beta)
+        tournoi(arguments.joueurs, arguments.ouvertures, arguments.paires, sprt, arguments.processus, arguments.graine)
+
+    elif arguments.commande in ["parallele", "smp"]:
+        from othello.recherche_parallele import mesurer_acceleration
+
+        mesurer_acceleration(arguments.profondeur, arguments.processus, arguments.positions, arguments.memoire,
+                             arguments.graine)
+
+    elif arguments.commande in ["banc", "bench"]:
+        from othello.banc_essai import executer, REFERENCE, SEUIL
+
+        seuil = SEUIL if arguments.seuil is None else arguments.seuil
+        if executer(arguments.sortie, arguments.reference or REFERENCE, seuil, arguments.enregistrer_reference,
+                    arguments.parties, arguments.repetitions):
+            sys.exit(1)
+
+    else:
+        # Création d'une instance de Partie.
+        if arguments.bibliotheque is not None:
+            from othello.bibliotheque import ouvrir_bibliotheque
+
+            partie = Partie(bibliotheque=ouvrir_bibliotheque(arguments.bibliotheque), taille=arguments.taille)
+        else:
+            partie = Partie(taille=arguments.taille)
+
+        # # Si on veut charger une partie à partir d'une partie sauvegardée.
+        # partie = Partie("othello/partie_de_base.txt")
 
-    # # Si on veut charger une partie à partir d'une partie sauvegardée.
-    # partie = Partie("othello/partie_de_base.txt")
+        # # Si on veut utiliser la planche à bitboards plutôt que la planche à dictionnaire.
+        # partie = Partie(type_planche="bitboard")
 
-    # # Si on veut sauvegarder une partie.
-    # partie.sauvegarder("ma_partie.txt")
+        # # Si on veut sauvegarder une partie.
+        # partie.sauvegarder("ma_partie.txt")
 
-    # Démarrage de cette partie.
-    partie.jouer()
\ No newline at end of file
+        # Démarrage de cette partie.
+        partie.jouer()
@@ -0,0 +1,386 @@
+"""
+Analyse par lots de parties sauvegardées: chaque position de chaque partie reçoit une évaluation et un meilleur coup,
+et chaque partie son résultat résolu exactement (celui de la première position assez proche de la fin pour être
+résolue par le solveur de fin de partie).
+
+Les parties sont lues au fur et à mesure:
+- un fichier au format de Partie.sauvegarder est une partie d'une seule position, celle qui a été sauvegardée;
+- un fichier de parties enregistrées (voir le module enregistrement) contient des parties complètes, dont toutes les
+  positions sont analysées.
+
+Les positions sont identifiées par leur clé canonique (voir base_positions.cle_position): une position commune à
+plusieurs parties, à une symétrie près, n'est analysée qu'une fois. Les positions à analyser sont réparties sur un
+groupe de processus; chacun reconstruit la position sur une Planche et la cherche.
+
+Le résultat de chaque partie est écrit dès qu'il est complet, sur une ligne JSON du fichier de sortie. Relancée avec le
+même fichier de sortie, l'analyse reprend là où elle s'était arrêtée: les parties déjà écrites sont sautées et leurs
+positions alimentent le cache.
+"""
+import collections
+import json
+import multiprocessing
+import os
+import time
+
+from othello.base_positions import cle_position, positions_de_partie
+from othello.enregistrement import SIGNATURE, DIFFERENCE_INCONNUE, lire_parties
+from othello.evaluation import charger_evaluation
+from othello.finale import SolveurFinale, SEUIL_FINALE
+from othello.planche import Planche
+from othello.planche_bitboard import PlancheBitboard, masque_coups_possibles, masque_retournements
+from othello.recherche import RechercheAlphaBeta, SCORE_FIN, autre_couleur
+from othello.symetries import forme_canonique, appliquer_indice, inverser_indice
+from othello.transposition import TableTransposition
+
+# Nombre maximal de positions en cours d'analyse par processus: au-delà, on attend des résultats avant de lire la suite.
+POSITIONS_PAR_PROCESSUS = 16
+
+# Réglages de l'analyse dans chaque processus (voir initialiser_processus).
+_reglages = {}
+
+
+def lire_sauvegarde(nom_fichier):
+    """
+    Lit la position d'un fichier au format de Partie.sauvegarder, placée comme Partie.charger sur une planche à la
+    position initiale.
+
+    Args:
+        nom_fichier: Le nom du fichier.
+
+    Returns:
+        Un tuple (bitboard des noirs, bitboard des blancs, couleur qui doit jouer), ou None si le fichier n'est pas
+        une partie sauvegardée 8x8.
+    """
+    with open(nom_fichier, "r") as fichier:
+        lignes = fichier.read().splitlines()
+    if len(lignes) < 5 or lignes[0] not in ["noir", "blanc"]:
+        return None
+
+    planche = PlancheBitboard()
+    for ligne in lignes[5:]:
+        if ligne.startswith("taille,"):
+            if int(ligne.split(",")[1]) != 8:
+                return None
+        elif ligne:
+            planche.charger_dune_chaine(ligne)
+    return planche.noir, planche.blanc, lignes[0]
+
+
+def lire_parties_fichier(nom_fichier):
+    """
+    Énumère les parties d'un fichier, partie sauvegardée ou fichier de parties enregistrées.
+
+    Args:
+        nom_fichier: Le nom du fichier.
+
+    Returns:
+        Un générateur de tuples (numéro de la partie dans le fichier, positions, différence de pièces enregistrée ou
+        None). Les positions sont des tuples (joueur, adversaire, couleur qui doit jouer). Rien n'est produit pour un
+        fichier qui n'est pas une partie.
+    """
+    with open(nom_fichier, "rb") as fichier:
+        debut = fichier.read(len(SIGNATURE))
+
+    if debut == SIGNATURE:
+        for numero, enregistrement in enumerate(lire_parties(nom_fichier)):
+            couleur = "noir" if enregistrement.depart is None else enregistrement.depart[2]
+            positions = []
+            for joueur, adversaire, _ in positions_de_partie(enregistrement):
+                positions.append((joueur, adversaire, couleur))
+                couleur = autre_couleur(couleur)
+            difference = None if enregistrement.difference == DIFFERENCE_INCONNUE else enregistrement.difference
+            yield numero, positions, difference
+        return
+
+    try:
+        sauvegarde = lire_sauvegarde(nom_fichier)
+    except (UnicodeDecodeError, ValueError, IndexError, AssertionError):
+        sauvegarde = None
+    if sauvegarde is not None:
+        noir, blanc, couleur = sauvegarde
+        joueur, adversaire = (noir, blanc) if couleur == "noir" else (blanc, noir)
+        yield 0, [(joueur, adversaire, couleur)], None
+
+
+def parcourir_fichiers(chemins, exclus=()):
+    """
+    Énumère les fichiers des chemins passés, en parcourant les répertoires (et leurs sous-répertoires) dans l'ordre
+    alphabétique.
+
+    Args:
+        chemins: Des fichiers ou des répertoires.
+        exclus: Les chemins à sauter (le fichier de sortie, par exemple).
+
+    Returns:
+        Un générateur de noms de fichiers.
+    """
+    exclus = {os.path.abspath(chemin) for chemin in exclus}
+    for chemin in chemins:
+        if os.path.isdir(chemin):
+            for racine, repertoires, fichiers in os.walk(chemin):
+                repertoires.sort()
+                for nom in sorted(fichiers):
+                    nom_fichier = os.path.join(racine, nom)
+                    if os.path.abspath(nom_fichier) not in exclus:
+                        yield nom_fichier
+        elif os.path.abspath(chemin) not in exclus:
+            yield chemin
+
+
+def planche_de_bitboards(joueur, adversaire):
+    """
+    Reconstruit une position sur une Planche, le joueur qui doit jouer ayant les pièces noires.
+
+    Args:
+        joueur: Le bitboard du joueur qui doit jouer.
+        adversaire: Le bitboard de l'adversaire.
+
+    Returns:
+        La Planche.
+    """
+    planche = Planche()
+    planche.charger_bitboards(joueur, adversaire)
+    return planche
+
+
+def initialiser_processus(profondeur, vides_resolution, nom_poids, taille_table_mo):
+    """
+    Initialise un processus de l'analyse: ses réglages, sa table de transposition et son évaluation.
+
+    Args:
+        profondeur: La profondeur de recherche des positions.
+        vides_resolution: Le nombre de cases vides à partir duquel une position est résolue exactement.
+        nom_poids: Le fichier des poids de l'évaluation par motifs, ou None pour l'évaluation positionnelle.
+        taille_table_mo: La taille de la table de transposition, en mégaoctets.
+    """
+    _reglages["profondeur"] = profondeur
+    _reglages["vides_resolution"] = vides_resolution
+    _reglages["evaluation"] = charger_evaluation(nom_poids) if nom_poids is not None else None
+    _reglages["table"] = TableTransposition(taille_table_mo)
+
+
+def analyser_position(joueur, adversaire):
+    """
+    Analyse une position avec les réglages du processus (voir initialiser_processus). Elle est résolue exactement
+    s'il lui reste assez peu de cases vides, cherchée sur une Planche autrement. Un coup forcé ou un tour passé est
+    joué et la position qui suit est analysée à sa place.
+
+    La table de transposition est vidée avant chaque recherche, pour que le résultat ne dépende pas des positions
+    analysées avant par le même processus.
+
+    Args:
+        joueur: Le bitboard du joueur qui doit jouer.
+        adversaire: Le bitboard de l'adversaire.
+
+    Returns:
+        Un tuple (score, indice du meilleur coup ou None, profondeur, exact) du point de vue du joueur. Un score exact
+        est la différence de pièces finale en jouant parfaitement; les autres sont ceux de l'évaluation de la
+        recherche.
+    """
+    vides = 64 - (joueur | adversaire).bit_count()
+    if vides <= _reglages["vides_resolution"]:
+        score, indice = SolveurFinale().resoudre(joueur, adversaire)
+        return score, indice, vides, True
+
+    coups = masque_coups_possibles(joueur, adversaire)
+    if not coups:
+        if not masque_coups_possibles(adversaire, joueur):
+            return joueur.bit_count() - adversaire.bit_count(), None, 0, True
+        score, _, profondeur, exact = analyser_position(adversaire, joueur)
+        return -score, None, profondeur, exact
+
+    if coups & (coups - 1) == 0:
+        indice = coups.bit_length() - 1
+        retournees = masque_retournements(indice, joueur, adversaire)
+        score, _, profondeur, exact = analyser_position(adversaire & ~retournees, joueur | retournees | coups)
+        return -score, indice, profondeur, exact
+
+    table = _reglages["table"]
+    table.vider()
+    recherche = RechercheAlphaBeta(_reglages["profondeur"], table=table, evaluation=_reglages["evaluation"])
+    ligne, colonne = recherche.chercher(planche_de_bitboards(joueur, adversaire), "noir")
+    score = recherche.meilleur_score
+    if abs(score) >= SCORE_FIN:
+        return score // SCORE_FIN, ligne * 8 + colonne, recherche.profondeur_atteinte, True
+    return score, ligne * 8 + colonne, recherche.profondeur_atteinte, False
+
+
+def analyser_cle(cle):
+    """
+    Analyse la forme canonique d'une position. Cette fonction est exécutée par les processus de l'analyse.
+
+    Args:
+        cle: La clé de la position (voir base_positions.cle_position).
+
+    Returns:
+        Un couple (clé, résultat de analyser_position).
+    """
+    return cle, analyser_position(cle >> 64, cle & ((1 << 64) - 1))
+
+
+def reprendre(nom_sortie, cache):
+    """
+    Relit le fichier de sortie d'une analyse interrompue. Une dernière ligne incomplète (écriture interrompue) est
+    retirée du fichier.
+
+    Args:
+        nom_sortie: Le nom du fichier de sortie.
+        cache: Le dictionnaire clé -> résultat de analyser_position à remplir avec les positions déjà analysées.
+
+    Returns:
+        L'ensemble des couples (fichier, numéro de partie) déjà analysés.
+    """
+    faites = set()
+    if not os.path.exists(nom_sortie):
+        return faites
+
+    with open(nom_sortie, "rb+") as fichier:
+        fin_valide = 0
+        for ligne in fichier:
+            if not ligne.endswith(b"\n"):
+                break
+            try:
+                partie = json.loads(ligne)
+            except ValueError:
+                break
+            fin_valide += len(ligne)
+            faites.add((partie["fichier"], partie["partie"]))
+            for position in partie["positions"]:
+                indice = None
+                if position["coup"] is not None:
+                    indice = appliquer_indice(position["coup"][0] * 8 + position["coup"][1], position["symetrie"])
+                cache[int(position["cle"], 16)] = (position["score"], indice, position["profondeur"],
+                                                   position["exact"])
+        fichier.truncate(fin_valide)
+    return faites
+
+
+def annoter_partie(nom_fichier, numero, positions, difference, cache):
+    """
+    Construit la ligne de sortie d'une partie dont toutes les positions sont dans le cache.
+
+    Args:
+        nom_fichier: Le fichier de la partie.
+        numero: Le numéro de la partie dans le fichier.
+        positions: Les positions de la partie, des tuples (joueur, adversaire, couleur, clé, symétrie).
+        difference: La différence de pièces enregistrée (noir - blanc), ou None.
+        cache: Le dictionnaire clé -> résultat de analyser_position.
+
+    Returns:
+        Un dictionnaire, sérialisable en JSON. Le score de chaque position est du point de vue de la couleur qui doit
+        jouer; le résultat de la partie (noir - blanc) est celui de sa première position résolue exactement, ou None.
+    """
+    annotations = []
+    resultat = None
+    for demi_coup, (_, _, couleur, cle, symetrie) in enumerate(positions):
+        score, indice, profondeur, exact = cache[cle]
+        coup = None
+        if indice is not None:
+            coup = list(divmod(inverser_indice(indice, symetrie), 8))
+        annotations.append({"demi_coup": demi_coup, "couleur": couleur, "cle": "{:032x}".format(cle),
+                            "symetrie": symetrie, "score": score, "exact": exact, "profondeur": profondeur,
+                            "coup": coup})
+        if exact and resultat is None:
+            resultat = score if couleur == "noir" else -score
+    return {"fichier": nom_fichier, "partie": numero, "positions": annotations, "resultat": resultat,
+            "difference_enregistree": difference}
+
+
+def analyser_parties(chemins, nom_sortie, nb_processus=1, profondeur=6, vides_resolution=SEUIL_FINALE,
+                     nom_poids=None, taille_table_mo=4, afficher=print):
+    """
+    Analyse les parties de fichiers ou de répertoires et écrit une ligne JSON par partie dans le fichier de sortie
+    (voir annoter_partie), dans l'ordre de lecture des parties. Les parties déjà présentes dans le fichier de sortie
+    sont sautées.
+
+    Les fichiers sont lus au fur et à mesure: au plus POSITIONS_PAR_PROCESSUS positions par processus sont en cours
+    d'analyse à la fois, et une partie est écrite dès que toutes ses positions sont analysées.
+
+    Args:
+        chemins: Des fichiers ou des répertoires de parties (voir lire_parties_fichier).
+        nom_sortie: Le fichier de sortie, complété s'il existe déjà.
+        nb_processus: Le nombre de processus (1 pour tout analyser dans le processus courant).
+        profondeur: La profondeur de recherche des positions.
+        vides_resolution: Le nombre de cases vides à partir duquel une position est résolue exactement.
+        nom_poids: Le fichier des poids de l'évaluation par motifs, ou None pour l'évaluation positionnelle.
+        taille_table_mo: La taille de la table de transposition de chaque processus, en mégaoctets.
+        afficher: La fonction utilisée pour afficher la progression (None pour ne rien afficher).
+
+    Returns:
+        Un dictionnaire de statistiques: parties écrites et sautées, positions lues et analysées, durée.
+    """
+    debut = time.perf_counter()
+    cache = {}
+    faites = reprendre(nom_sortie, cache)
+    statistiques = {"parties": 0, "parties_sautees": 0, "positions": 0, "positions_analysees": 0,
+                    "positions_reprises": len(cache), "duree": 0.0}
+
+    reglages = (profondeur, vides_resolution, nom_poids, taille_table_mo)
+    pool = None
+    if nb_processus > 1:
+        pool = multiprocessing.Pool(nb_processus, initializer=initialiser_processus, initargs=reglages)
+    else:
+        initialiser_processus(*reglages)
+
+    # Parties en attente d'écriture, dans l'ordre de lecture, et positions en cours d'analyse dans l'ordre d'envoi
+    attente = collections.deque()
+    en_cours = collections.OrderedDict()
+
+    def recevoir(bloquer):
+        # On attend au besoin la plus ancienne position envoyée, puis on prend celles qui sont déjà prêtes
+        while en_cours:
+            cle, resultat = next(iter(en_cours.items()))
+            if not bloquer and not resultat.ready():
+                return
+            cache[cle] = resultat.get()[1]
+            del en_cours[cle]
+            statistiques["positions_analysees"] += 1
+            bloquer = False
+
+    def ecrire(sortie):
+        while attente and all(position[3] in cache for position in attente[0][2]):
+            sortie.write(json.dumps(annoter_partie(*attente.popleft(), cache)) + "\n")
+            sortie.flush()
+            statistiques["parties"] += 1
+            if afficher is not None and statistiques["parties"] % 100 == 0:
+                afficher("{parties} parties, {positions_analysees} positions analysées".format(**statistiques))
+
+    try:
+        with open(nom_sortie, "a") as sortie:
+            for nom_fichier in parcourir_fichiers(chemins, exclus=[nom_sortie]):
+                for numero, positions, difference in lire_parties_fichier(nom_fichier):
+                    if (nom_fichier, numero) in faites:
+                        statistiques["parties_sautees"] += 1
+                        continue
+
+                    positions_cles = []
+                    for joueur, adversaire, couleur in positions:
+                        symetrie = forme_canonique(joueur, adversaire)[2]
+                        cle = cle_position(joueur, adversaire)
+                        positions_cles.append((joueur, adversaire, couleur, cle, symetrie))
+                        if cle in cache or cle in en_cours:
+                            continue
+                        if pool is None:
+                            cache[cle] = analyser_cle(cle)[1]
+                            statistiques["positions_analysees"] += 1
+                        else:
+                            en_cours[cle] = pool.apply_async(analyser_cle, (cle,))
+                    statistiques["positions"] += len(positions)
+                    attente.append((nom_fichier, numero, positions_cles, difference))
+
+                    recevoir(bloquer=len(en_cours) >= POSITIONS_PAR_PROCESSUS * nb_processus)
+                    ecrire(sortie)
+
+            while en_cours:
+                recevoir(bloquer=True)
+            ecrire(sortie)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    statistiques["duree"] = time.perf_counter() - debut
+    if afficher is not None:
+        afficher("{parties} parties écrites ({parties_sautees} déjà analysées), {positions} positions dont "
+                 "{positions_analysees} analysées en {duree:.1f} s".format(**statistiques))
+    return statistiques
@@ -0,0 +1,351 @@
+"""
+Banc d'essai des méthodes chaudes de la planche et de la partie, avec comparaison à une référence enregistrée.
+
+Chaque mesure chronomètre une opération sur les positions fixes des parties fournies avec le package (les fichiers
+partie_*.txt), avec chaque représentation de la planche: pièces mangées par chaque coup possible, liste des coups
+possibles, coup joué puis annulé, conversion en chaîne et rechargement, chargement et sauvegarde d'une partie, et
+enfin des parties complètes au hasard sans console.
+
+Une mesure est répétée plusieurs fois et on garde la durée la plus courte par opération, la moins perturbée par le
+reste du système. Les résultats s'écrivent en JSON et se comparent à une référence du même format (voir comparer): une
+mesure plus lente que la référence au-delà du seuil est une régression. Les durées brutes se comparent mieux qu'en les
+divisant par celle d'un étalon (une charge de calcul fixe), qui ne suit pas les variations de vitesse d'une machine
+virtuelle partagée et ajoute son propre bruit.
+"""
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+
+from othello.partie import Partie, TYPES_PLANCHE
+from othello.joueur import JoueurOrdinateur
+
+# Positions mesurées: les parties sauvegardées fournies avec le package.
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+FICHIERS_POSITIONS = ("partie_de_base.txt", "partie_un_tour_a_passer.txt", "partie_deux_tours_a_passer.txt")
+
+# Référence enregistrée avec le package (voir executer). Les durées dépendent de la machine: on enregistre une nouvelle
+# référence avant de comparer sur une autre machine.
+REFERENCE = os.path.join(DOSSIER, "reference_banc_essai.json")
+
+# Version du format des fichiers de résultats.
+VERSION = 2
+
+# Nombre de répétitions de chaque mesure et durée minimale d'une répétition, en secondes.
+REPETITIONS = 5
+DUREE_MIN = 0.2
+
+# Ralentissement relatif à partir duquel une mesure est une régression (1.0 pour 100 %). D'une exécution à l'autre,
+# une même mesure varie jusqu'à x1.75 sur une machine virtuelle partagée: le seuil doit rester au-dessus.
+SEUIL = 1.0
+
+
+def chronometrer(fonction, nb_operations, repetitions=REPETITIONS, duree_min=DUREE_MIN):
+    """
+    Chronomètre une fonction qui effectue nb_operations opérations. Elle est appelée assez de fois de suite pour
+    qu'une répétition dure au moins duree_min, puis la répétition est refaite. Comme timeit, on désactive le
+    ramasse-miettes pendant les mesures, pour que ses passages ne tombent pas au hasard dans l'une ou l'autre.
+
+    Args:
+        fonction: La fonction à chronométrer, sans argument.
+        nb_operations: Le nombre d'opérations effectuées par un appel.
+        repetitions: Le nombre de répétitions.
+        duree_min: La durée minimale d'une répétition, en secondes.
+
+    Returns:
+        Un dictionnaire contenant la durée la plus courte ("microsecondes") et la durée médiane ("mediane") d'une
+        opération, en microsecondes, et le nombre d'opérations d'une répétition.
+    """
+    gc.collect()
+    ramasse_miettes = gc.isenabled()
+    gc.disable()
+    try:
+        appels = 1
+        while True:
+            debut = time.perf_counter()
+            for _ in range(appels):
+                fonction()
+            duree = time.perf_counter() - debut
+            if duree >= duree_min:
+                break
+            appels *= 2
+
+        durees = [duree]
+        for _ in range(repetitions - 1):
+            debut = time.perf_counter()
+            for _ in range(appels):
+                fonction()
+            durees.append(time.perf_counter() - debut)
+    finally:
+        if ramasse_miettes:
+            gc.enable()
+
+    operations = appels * nb_operations
+    return {
+        "microsecondes": min(durees) / operations * 1e6,
+        "mediane": statistics.median(durees) / operations * 1e6,
+        "operations": operations,
+    }
+
+
+def charger_positions(type_planche):
+    """
+    Charge les positions mesurées.
+
+    Args:
+        type_planche: "dictionnaire" ou "bitboard" (voir TYPES_PLANCHE).
+
+    Returns:
+        La liste des couples (planche, couleur qui doit jouer).
+    """
+    positions = []
+    for nom_fichier in FICHIERS_POSITIONS:
+        partie = Partie(os.path.join(DOSSIER, nom_fichier), type_planche=type_planche, verbeux=False)
+        positions.append((partie.planche, partie.couleur_joueur_courant))
+    return positions
+
+
+def mesures_planche(type_planche, repetitions=REPETITIONS):
+    """
+    Mesure les méthodes de la planche sur les positions fixes.
+
+    Args:
+        type_planche: "dictionnaire" ou "bitboard".
+        repetitions: Le nombre de répétitions de chaque mesure.
+
+    Returns:
+        Un dictionnaire nom de la mesure -> résultat de chronometrer.
+    """
+    positions = charger_positions(type_planche)
+    coups = [(planche, couleur, coup) for planche, couleur in positions
+             for coup in planche.lister_coups_possibles_de_couleur(couleur)]
+    chaines = [(planche, planche.convertir_en_chaine().splitlines()) for planche, _ in positions]
+
+    def obtenir_positions_mangees():
+        for planche, couleur, coup in coups:
+            planche.obtenir_positions_mangees(coup, couleur)
+
+    def lister_coups_possibles():
+        for planche, _ in positions:
+            planche.lister_coups_possibles_de_couleur("noir")
+            planche.lister_coups_possibles_de_couleur("blanc")
+
+    def jouer_coup():
+        for planche, couleur, coup in coups:
+            planche.jouer_coup(coup, couleur)
+            planche.annuler_coup()
+
+    def convertir_en_chaine():
+        for planche, _ in positions:
+            planche.convertir_en_chaine()
+
+    def charger_dune_chaine():
+        # Recharger les pièces déjà présentes laisse la planche inchangée
+        for planche, lignes in chaines:
+            for ligne in lignes:
+                planche.charger_dune_chaine(ligne)
+
+    return {
+        "obtenir_positions_mangees": chronometrer(obtenir_positions_mangees, len(coups), repetitions),
+        "lister_coups_possibles_de_couleur": chronometrer(lister_coups_possibles, 2 * len(positions), repetitions),
+        "jouer_coup": chronometrer(jouer_coup, len(coups), repetitions),
+        "convertir_en_chaine": chronometrer(convertir_en_chaine, len(positions), repetitions),
+        "charger_dune_chaine": chronometrer(charger_dune_chaine, sum(len(lignes) for _, lignes in chaines),
+                                            repetitions),
+    }
+
+
+def mesures_partie(type_planche, repetitions=REPETITIONS):
+    """
+    Mesure le chargement et la sauvegarde d'une partie, dans un répertoire temporaire.
+
+    Args:
+        type_planche: "dictionnaire" ou "bitboard".
+        repetitions: Le nombre de répétitions de chaque mesure.
+
+    Returns:
+        Un dictionnaire nom de la mesure -> résultat de chronometrer.
+    """
+    noms_fichiers = [os.path.join(DOSSIER, nom_fichier) for nom_fichier in FICHIERS_POSITIONS]
+    parties = [Partie(nom_fichier, type_planche=type_planche, verbeux=False) for nom_fichier in noms_fichiers]
+
+    with tempfile.TemporaryDirectory() as dossier:
+        sauvegarde = os.path.join(dossier, "partie.txt")
+
+        def charger():
+            for partie, nom_fichier in zip(parties, noms_fichiers):
+                partie.charger(nom_fichier)
+
+        def sauvegarder():
+            for partie in parties:
+                partie.sauvegarder(sauvegarde)
+
+        return {
+            "partie.charger": chronometrer(charger, len(parties), repetitions),
+            "partie.sauvegarder": chronometrer(sauvegarder, len(parties), repetitions),
+        }
+
+
+def mesure_parties_aleatoires(type_planche, parties=20, repetitions=REPETITIONS):
+    """
+    Mesure des parties complètes entre deux JoueurOrdinateur, sans console. Les coups ne dépendent que du numéro de la
+    partie: chaque répétition joue exactement les mêmes parties.
+
+    Args:
+        type_planche: "dictionnaire" ou "bitboard".
+        parties: Le nombre de parties d'une répétition.
+        repetitions: Le nombre de répétitions.
+
+    Returns:
+        Le résultat de chronometrer, par partie.
+    """
+    def jouer():
+        for numero in range(parties):
+            generateur = random.Random(numero)
+            partie = Partie(type_planche=type_planche, joueur_noir=JoueurOrdinateur("noir", generateur),
+                            joueur_blanc=JoueurOrdinateur("blanc", generateur), verbeux=False)
+            partie.jouer()
+
+    return chronometrer(jouer, parties, repetitions)
+
+
+def mesurer(types_planche=None, parties=20, repetitions=REPETITIONS, afficher=print):
+    """
+    Effectue toutes les mesures du banc d'essai.
+
+    Args:
+        types_planche: Les représentations de la planche à mesurer (None pour toutes, voir TYPES_PLANCHE).
+        parties: Le nombre de parties au hasard par répétition.
+        repetitions: Le nombre de répétitions de chaque mesure.
+        afficher: La fonction utilisée pour afficher la progression (None pour ne rien afficher).
+
+    Returns:
+        Les résultats, au format écrit par ecrire_resultats: un dictionnaire contenant la version du format, la
+        version de Python, la machine et les mesures ("type_planche.nom" -> résultat de chronometrer).
+    """
+    if types_planche is None:
+        types_planche = list(TYPES_PLANCHE)
+    mesures = {}
+    for type_planche in types_planche:
+        resultats = mesures_planche(type_planche, repetitions)
+        resultats.update(mesures_partie(type_planche, repetitions))
+        resultats["partie_aleatoire"] = mesure_parties_aleatoires(type_planche, parties, repetitions)
+        for nom, resultat in resultats.items():
+            mesures[type_planche + "." + nom] = resultat
+            if afficher is not None:
+                afficher("{:<48} {:>12.2f} µs".format(type_planche + "." + nom, resultat["microsecondes"]))
+    return {
+        "version": VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "mesures": mesures,
+    }
+
+
+def ecrire_resultats(resultats, nom_fichier):
+    """
+    Écrit des résultats (voir mesurer) dans un fichier JSON.
+
+    Args:
+        resultats: Les résultats.
+        nom_fichier: Le nom du fichier.
+    """
+    with open(nom_fichier, "w") as fichier:
+        json.dump(resultats, fichier, indent=2, sort_keys=True)
+        fichier.write("\n")
+
+
+def lire_resultats(nom_fichier):
+    """
+    Lit des résultats écrits par ecrire_resultats.
+
+    Args:
+        nom_fichier: Le nom du fichier.
+
+    Returns:
+        Les résultats.
+    """
+    with open(nom_fichier) as fichier:
+        resultats = json.load(fichier)
+    assert resultats.get("version") == VERSION, "lire_resultats: version du format inconnue."
+    return resultats
+
+
+def comparer(resultats, reference, seuil=SEUIL, afficher=print):
+    """
+    Compare des résultats à une référence: chaque mesure est une régression si sa durée la plus courte (voir
+    chronometrer) dépasse celle de la référence de plus du seuil, une amélioration si elle est plus rapide dans le même rapport.
+
+    Args:
+        resultats: Les résultats (voir mesurer).
+        reference: Les résultats de référence.
+        seuil: Le ralentissement relatif toléré.
+        afficher: La fonction utilisée pour afficher la comparaison (None pour ne rien afficher).
+
+    Returns:
+        La liste des noms des mesures en régression.
+    """
+    regressions = []
+    for nom, resultat in sorted(resultats["mesures"].items()):
+        ancien = reference["mesures"].get(nom)
+        if ancien is None:
+            etat = "nouvelle"
+            rapport = None
+        else:
+            rapport = resultat["microsecondes"] / ancien["microsecondes"]
+            if rapport > 1.0 + seuil:
+                etat = "RÉGRESSION"
+                regressions.append(nom)
+            elif rapport < 1.0 / (1.0 + seuil):
+                etat = "amélioration"
+            else:
+                etat = ""
+        if afficher is not None:
+            afficher("{:<48} {:>12.2f} µs {:>12} {:>8} {}".format(
+                nom, resultat["microsecondes"],
+                "" if ancien is None else "{:.2f} µs".format(ancien["microsecondes"]),
+                "" if rapport is None else "x{:.2f}".format(rapport), etat))
+    return regressions
+
+
+def executer(nom_sortie=None, nom_reference=REFERENCE, seuil=SEUIL, enregistrer_reference=False, parties=20,
+             repetitions=REPETITIONS, afficher=print):
+    """
+    Effectue le banc d'essai, écrit ses résultats et les compare à la référence.
+
+    Args:
+        nom_sortie: Le fichier JSON où écrire les résultats (None pour ne pas les écrire).
+        nom_reference: Le fichier de la référence.
+        seuil: Le ralentissement relatif toléré.
+        enregistrer_reference: True pour remplacer la référence par ces résultats plutôt que de les y comparer.
+        parties: Le nombre de parties au hasard par répétition.
+        repetitions: Le nombre de répétitions de chaque mesure.
+        afficher: La fonction utilisée pour afficher les résultats (None pour ne rien afficher).
+
+    Returns:
+        La liste des noms des mesures en régression (vide si la référence vient d'être enregistrée ou n'existe pas).
+    """
+    resultats = mesurer(parties=parties, repetitions=repetitions, afficher=None)
+    if nom_sortie is not None:
+        ecrire_resultats(resultats, nom_sortie)
+    if enregistrer_reference or not os.path.exists(nom_reference):
+        # Sans référence, toutes les mesures sont affichées comme nouvelles
+        comparer(resultats, {"mesures": {}}, seuil, afficher)
+        if enregistrer_reference:
+            ecrire_resultats(resultats, nom_reference)
+        if afficher is not None:
+            afficher("Référence écrite dans {}".format(nom_reference) if enregistrer_reference
+                     else "Aucune référence dans {}".format(nom_reference))
+        return []
+
+    regressions = comparer(resultats, lire_resultats(nom_reference), seuil, afficher)
+    if afficher is not None:
+        if regressions:
+            afficher("{} régression(s) au-delà de {:.0%}".format(len(regressions), seuil))
+        else:
+            afficher("Aucune régression au-delà de {:.0%}".format(seuil))
+    return regressions
@@ -0,0 +1,362 @@
+"""
+Base de positions: combien de fois chaque position apparaît dans des archives de parties, et avec quels résultats.
+
+Chaque position est ramenée à sa forme canonique parmi ses 8 symétries (voir symetries.forme_canonique), du point de
+vue du joueur qui doit jouer, puis compactée en une clé de 128 bits: joueur << 64 | adversaire. Les positions
+équivalentes par symétrie partagent donc la même clé.
+
+Les compteurs sont d'abord accumulés dans un dictionnaire en mémoire. Lorsqu'il atteint sa taille limite, il est
+écrit sur disque sous forme de série triée par clé, puis vidé: la mémoire utilisée reste bornée quelle que soit la
+quantité de parties ajoutées. Les recherches se font par dichotomie dans chaque série (projetée par mmap), et
+compacter() fusionne les séries en une seule en les lisant en flux.
+"""
+import heapq
+import mmap
+import os
+import struct
+
+from othello.enregistrement import CODE_PASSE, DIFFERENCE_INCONNUE, lire_parties, importer_texte
+from othello.planche_bitboard import masque_retournements
+from othello.symetries import forme_canonique
+
+SIGNATURE = b"OTHP\x01"
+
+# Entrée d'une série: clé (deux mots de 64 bits gros-boutistes, pour que l'ordre des octets soit celui des clés),
+# nombre d'occurrences, victoires, nulles et défaites du joueur qui doit jouer.
+ENTREE = struct.Struct(">QQIIII")
+TAILLE_CLE = 16
+
+# Position initiale, du point de vue des noirs qui jouent en premier.
+POSITION_INITIALE = ((1 << (3 * 8 + 4)) | (1 << (4 * 8 + 3)), (1 << (3 * 8 + 3)) | (1 << (4 * 8 + 4)))
+
+MASQUE_64 = (1 << 64) - 1
+
+
+def cle_position(joueur, adversaire):
+    """
+    Calcule la clé canonique de 128 bits d'une position.
+
+    Args:
+        joueur: Le bitboard du joueur qui doit jouer.
+        adversaire: Le bitboard de l'adversaire.
+
+    Returns:
+        La clé, un entier.
+    """
+    joueur, adversaire, _ = forme_canonique(joueur, adversaire)
+    return (joueur << 64) | adversaire
+
+
+def position_de_cle(cle):
+    """
+    Inverse de cle_position(), à symétrie près.
+
+    Returns:
+        Un couple (joueur, adversaire) de la forme canonique.
+    """
+    return cle >> 64, cle & MASQUE_64
+
+
+def positions_de_partie(enregistrement):
+    """
+    Énumère les positions d'une partie enregistrée, avant chacun de ses coups et à la fin.
+
+    Args:
+        enregistrement: L'EnregistrementPartie.
+
+    Returns:
+        Un générateur de tuples (joueur, adversaire, résultat), où résultat vaut 1, 0 ou -1 selon que le joueur qui
+        doit jouer a gagné, fait nulle ou perdu la partie, ou None si le résultat est inconnu.
+    """
+    if enregistrement.depart is None:
+        joueur, adversaire = POSITION_INITIALE
+        signe = 1
+    else:
+        noir, blanc, couleur, _ = enregistrement.depart
+        joueur, adversaire, signe = (noir, blanc, 1) if couleur == "noir" else (blanc, noir, -1)
+
+    difference = enregistrement.difference
+    resultat = None
+    if difference != DIFFERENCE_INCONNUE:
+        resultat = (difference > 0) - (difference < 0)
+
+    for code in enregistrement.coups:
+        yield joueur, adversaire, resultat if resultat is None else resultat * signe
+        if code != CODE_PASSE:
+            retournees = masque_retournements(code, joueur, adversaire)
+            joueur, adversaire = joueur | retournees | (1 << code), adversaire & ~retournees
+        joueur, adversaire = adversaire, joueur
+        signe = -signe
+    yield joueur, adversaire, resultat if resultat is None else resultat * signe
+
+
+class Serie:
+    """
+    Une série triée de clés et de compteurs, lue par mmap.
+    """
+
+    def __init__(self, nom_fichier):
+        """
+        Ouvre la série.
+
+        Args:
+            nom_fichier: Le nom du fichier de la série.
+        """
+        self.nom_fichier = nom_fichier
+        with open(nom_fichier, "rb") as fichier:
+            self.memoire = mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.memoire[:len(SIGNATURE)] != SIGNATURE:
+            self.memoire.close()
+            raise ValueError("{}: ce n'est pas une série de positions.".format(nom_fichier))
+        self.nb_entrees = (len(self.memoire) - len(SIGNATURE)) // ENTREE.size
+
+    def __len__(self):
+        return self.nb_entrees
+
+    def chercher(self, cle):
+        """
+        Cherche une clé par dichotomie.
+
+        Args:
+            cle: La clé de 128 bits.
+
+        Returns:
+            Les compteurs [nombre, victoires, nulles, défaites] de la clé, ou None si elle n'est pas dans la série.
+        """
+        octets = cle.to_bytes(TAILLE_CLE, "big")
+        bas, haut = 0, self.nb_entrees
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            debut = len(SIGNATURE) + milieu * ENTREE.size
+            octets_milieu = self.memoire[debut:debut + TAILLE_CLE]
+            if octets_milieu == octets:
+                return list(ENTREE.unpack_from(self.memoire, debut)[2:])
+            if octets_milieu < octets:
+                bas = milieu + 1
+            else:
+                haut = milieu
+        return None
+
+    def __iter__(self):
+        """
+        Parcourt la série dans l'ordre des clés.
+
+        Returns:
+            Un générateur de couples (clé, compteurs).
+        """
+        for debut in range(len(SIGNATURE), len(SIGNATURE) + self.nb_entrees * ENTREE.size, ENTREE.size):
+            haut, bas, *compteurs = ENTREE.unpack_from(self.memoire, debut)
+            yield (haut << 64) | bas, compteurs
+
+    def fermer(self):
+        """
+        Ferme la projection du fichier.
+        """
+        self.memoire.close()
+
+
+def ecrire_serie(nom_fichier, entrees):
+    """
+    Écrit une série à partir d'entrées déjà triées par clé, lues en flux.
+
+    Args:
+        nom_fichier: Le nom du fichier.
+        entrees: Un itérable de couples (clé, compteurs), triés par clé.
+
+    Returns:
+        Le nombre d'entrées écrites.
+    """
+    nombre = 0
+    with open(nom_fichier, "wb", buffering=1 << 20) as fichier:
+        fichier.write(SIGNATURE)
+        for cle, compteurs in entrees:
+            compteurs = (min(compteur, 0xFFFFFFFF) for compteur in compteurs)
+            fichier.write(ENTREE.pack(cle >> 64, cle & MASQUE_64, *compteurs))
+            nombre += 1
+    return nombre
+
+
+def fusionner(sources):
+    """
+    Fusionne des flux de couples (clé, compteurs) triés par clé, en additionnant les compteurs d'une même clé.
+
+    Args:
+        sources: Les itérables à fusionner, chacun trié par clé.
+
+    Returns:
+        Un générateur de couples (clé, compteurs), trié par clé et sans doublons.
+    """
+    cle_courante = None
+    total = None
+    for cle, compteurs in heapq.merge(*sources, key=lambda entree: entree[0]):
+        if cle != cle_courante:
+            if cle_courante is not None:
+                yield cle_courante, total
+            cle_courante = cle
+            total = list(compteurs)
+        else:
+            total = [a + b for a, b in zip(total, compteurs)]
+    if cle_courante is not None:
+        yield cle_courante, total
+
+
+class BasePositions:
+    """
+    Index des positions d'un ensemble de parties, conservé dans un répertoire de séries triées.
+    """
+
+    def __init__(self, repertoire, limite_entrees=1000000):
+        """
+        Ouvre (ou crée) une base.
+
+        Args:
+            repertoire: Le répertoire des séries de la base.
+            limite_entrees: Le nombre maximal de positions gardées en mémoire avant d'écrire une série. Chaque
+                position en mémoire occupe environ 200 octets.
+        """
+        self.repertoire = repertoire
+        self.limite_entrees = limite_entrees
+        os.makedirs(repertoire, exist_ok=True)
+
+        # Clé -> [nombre, victoires, nulles, défaites], en attente d'être écrits dans une série
+        self.tampon = {}
+        self.series = [Serie(os.path.join(repertoire, nom)) for nom in sorted(os.listdir(repertoire))
+                       if nom.startswith("serie_") and nom.endswith(".bin")]
+        self.prochain_numero = 1 + max((int(serie.nom_fichier[-10:-4]) for serie in self.series), default=0)
+
+    def ajouter_position(self, joueur, adversaire, resultat=None):
+        """
+        Ajoute une occurrence d'une position.
+
+        Args:
+            joueur: Le bitboard du joueur qui doit jouer.
+            adversaire: Le bitboard de l'adversaire.
+            resultat: 1, 0 ou -1 selon que le joueur qui doit jouer a gagné, fait nulle ou perdu, ou None si le
+                résultat de la partie est inconnu.
+        """
+        cle = cle_position(joueur, adversaire)
+        compteurs = self.tampon.get(cle)
+        if compteurs is None:
+            compteurs = self.tampon[cle] = [0, 0, 0, 0]
+        compteurs[0] += 1
+        if resultat is not None:
+            compteurs[2 - resultat] += 1
+        if len(self.tampon) >= self.limite_entrees:
+            self.vider_tampon()
+
+    def ajouter_partie(self, enregistrement):
+        """
+        Ajoute toutes les positions d'une partie enregistrée (voir positions_de_partie).
+
+        Args:
+            enregistrement: L'EnregistrementPartie.
+        """
+        for joueur, adversaire, resultat in positions_de_partie(enregistrement):
+            self.ajouter_position(joueur, adversaire, resultat)
+
+    def ajouter_archive(self, nom_fichier):
+        """
+        Ajoute toutes les parties d'un fichier de parties enregistrées, lu en flux (voir enregistrement.lire_parties).
+
+        Args:
+            nom_fichier: Le nom du fichier.
+
+        Returns:
+            Le nombre de parties ajoutées.
+        """
+        nombre = 0
+        for enregistrement in lire_parties(nom_fichier):
+            self.ajouter_partie(enregistrement)
+            nombre += 1
+        return nombre
+
+    def ajouter_fichier_texte(self, nom_fichier):
+        """
+        Ajoute la position d'une partie sauvegardée au format texte, chargée par Partie.charger.
+
+        Args:
+            nom_fichier: Le nom du fichier texte.
+        """
+        self.ajouter_partie(importer_texte(nom_fichier))
+
+    def vider_tampon(self):
+        """
+        Écrit les positions en mémoire dans une nouvelle série triée, puis vide le tampon.
+        """
+        if not self.tampon:
+            return
+        nom_fichier = os.path.join(self.repertoire, "serie_{:06d}.bin".format(self.prochain_numero))
+        self.prochain_numero += 1
+        ecrire_serie(nom_fichier, sorted(self.tampon.items()))
+        self.tampon.clear()
+        self.series.append(Serie(nom_fichier))
+
+    def chercher(self, joueur, adversaire):
+        """
+        Cherche une position (ou l'une de ses symétriques).
+
+        Args:
+            joueur: Le bitboard du joueur qui doit jouer.
+            adversaire: Le bitboard de l'adversaire.
+
+        Returns:
+            Un dictionnaire contenant le nombre d'occurrences et les nombres de victoires, nulles et défaites du
+            joueur qui doit jouer (tous à 0 si la position n'a jamais été vue).
+        """
+        cle = cle_position(joueur, adversaire)
+        total = list(self.tampon.get(cle, [0, 0, 0, 0]))
+        for serie in self.series:
+            compteurs = serie.chercher(cle)
+            if compteurs is not None:
+                total = [a + b for a, b in zip(total, compteurs)]
+        return dict(zip(("nombre", "victoires", "nulles", "defaites"), total))
+
+    def __iter__(self):
+        """
+        Parcourt toutes les positions de la base dans l'ordre des clés, sans les charger en mémoire.
+
+        Returns:
+            Un générateur de couples (clé, compteurs [nombre, victoires, nulles, défaites]).
+        """
+        return fusionner(self.series + [sorted(self.tampon.items())])
+
+    def plus_frequentes(self, nombre=10):
+        """
+        Retourne les positions les plus fréquentes.
+
+        Args:
+            nombre: Le nombre de positions à retourner.
+
+        Returns:
+            La liste des couples (clé, compteurs), de la plus fréquente à la moins fréquente.
+        """
+        return heapq.nlargest(nombre, self, key=lambda entree: entree[1][0])
+
+    def compacter(self):
+        """
+        Fusionne toutes les séries (et le tampon) en une seule, lue et écrite en flux.
+
+        Returns:
+            Le nombre de positions distinctes de la base.
+        """
+        self.vider_tampon()
+        if len(self.series) <= 1:
+            return sum(len(serie) for serie in self.series)
+
+        nom_fichier = os.path.join(self.repertoire, "serie_{:06d}.bin".format(self.prochain_numero))
+        self.prochain_numero += 1
+        nombre = ecrire_serie(nom_fichier, fusionner(self.series))
+        for serie in self.series:
+            serie.fermer()
+            os.remove(serie.nom_fichier)
+        self.series = [Serie(nom_fichier)]
+        return nombre
+
+    def fermer(self):
+        """
+        Écrit les positions en mémoire et ferme les séries.
+        """
+        self.vider_tampon()
+        for serie in self.series:
+            serie.fermer()
+        self.series = []
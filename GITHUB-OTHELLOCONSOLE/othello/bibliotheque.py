@@ -0,0 +1,245 @@
+"""
+Bibliothèque d'ouvertures: un fichier binaire trié de positions et de coups, lu par mmap.
+
+Le fichier commence par un en-tête (signature, version, nombre d'entrées), suivi d'entrées de taille fixe triées par
+position. Une entrée contient la position sous sa forme canonique (voir symetries.forme_canonique), du point de vue du
+joueur qui doit jouer, un coup dans le repère de cette forme canonique, son score et le nombre de parties ou de
+recherches qui l'ont produit. Une seule entrée couvre ainsi les 8 positions équivalentes par symétrie.
+
+Le fichier n'est jamais lu en entier: les recherches se font par dichotomie directement dans la projection mmap, que
+le système partage entre tous les processus qui ouvrent le même fichier.
+"""
+import mmap
+import struct
+
+from othello.planche_bitboard import PlancheBitboard, masque_coups_possibles, masque_retournements, indices_du_masque
+from othello.recherche import RechercheAlphaBeta
+from othello.symetries import appliquer_indice, inverser_indice, forme_canonique, symetries_canoniques
+
+SIGNATURE = b"OTHB"
+VERSION = 1
+
+# En-tête: signature, version, nombre d'entrées.
+ENTETE = struct.Struct(">4sHI")
+
+# Entrée: joueur, adversaire (gros-boutiste, pour que l'ordre des octets soit celui des positions), coup, score et
+# nombre d'occurrences.
+ENTREE = struct.Struct(">QQBhH")
+TAILLE_CLE = 16
+
+# Position initiale, du point de vue des noirs qui jouent en premier.
+POSITION_INITIALE = ((1 << (3 * 8 + 4)) | (1 << (4 * 8 + 3)), (1 << (3 * 8 + 3)) | (1 << (4 * 8 + 4)))
+
+# Bibliothèques déjà ouvertes dans ce processus, par nom de fichier (voir ouvrir_bibliotheque).
+_bibliotheques_ouvertes = {}
+
+
+class BibliothequeOuvertures:
+    """
+    Lecture d'une bibliothèque d'ouvertures par mmap.
+    """
+
+    def __init__(self, nom_fichier):
+        """
+        Ouvre et projette le fichier en mémoire. Seul l'en-tête est lu.
+
+        Args:
+            nom_fichier: Le nom du fichier de la bibliothèque.
+        """
+        self.nom_fichier = nom_fichier
+        with open(nom_fichier, "rb") as fichier:
+            self.memoire = mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+
+        signature, version, self.nb_entrees = ENTETE.unpack_from(self.memoire, 0)
+        if signature != SIGNATURE or version != VERSION:
+            self.memoire.close()
+            raise ValueError("{}: ce n'est pas une bibliothèque d'ouvertures (version {}).".format(nom_fichier, VERSION))
+        if len(self.memoire) != ENTETE.size + self.nb_entrees * ENTREE.size:
+            self.memoire.close()
+            raise ValueError("{}: fichier tronqué.".format(nom_fichier))
+
+    def __len__(self):
+        return self.nb_entrees
+
+    def cle(self, numero):
+        """
+        Retourne les octets de la position de l'entrée numéro "numero", qui se comparent comme les positions.
+        """
+        debut = ENTETE.size + numero * ENTREE.size
+        return self.memoire[debut:debut + TAILLE_CLE]
+
+    def chercher(self, joueur, adversaire):
+        """
+        Cherche les coups de la bibliothèque pour une position.
+
+        Args:
+            joueur: Le bitboard du joueur qui doit jouer.
+            adversaire: Le bitboard de l'adversaire.
+
+        Returns:
+            La liste des coups connus, des tuples (indice de la case dans le repère de la position passée, score,
+            nombre d'occurrences). La liste est vide si la position n'est pas dans la bibliothèque.
+        """
+        joueur_canonique, adversaire_canonique, symetrie = forme_canonique(joueur, adversaire)
+        cle = struct.pack(">QQ", joueur_canonique, adversaire_canonique)
+
+        # Dichotomie: première entrée dont la clé n'est pas plus petite
+        bas, haut = 0, self.nb_entrees
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            if self.cle(milieu) < cle:
+                bas = milieu + 1
+            else:
+                haut = milieu
+
+        coups = []
+        while bas < self.nb_entrees and self.cle(bas) == cle:
+            _, _, coup, score, nombre = ENTREE.unpack_from(self.memoire, ENTETE.size + bas * ENTREE.size)
+            coups.append((inverser_indice(coup, symetrie), score, nombre))
+            bas += 1
+        return coups
+
+    def choisir_coup(self, joueur, adversaire):
+        """
+        Choisit le coup de la bibliothèque pour une position: celui qui a le meilleur score, puis le plus joué.
+
+        Args:
+            joueur: Le bitboard du joueur qui doit jouer.
+            adversaire: Le bitboard de l'adversaire.
+
+        Returns:
+            L'indice de la case du coup, ou None si la position n'est pas dans la bibliothèque.
+        """
+        coups = self.chercher(joueur, adversaire)
+        if not coups:
+            return None
+        return max(coups, key=lambda coup: (coup[1], coup[2]))[0]
+
+    def fermer(self):
+        """
+        Ferme la projection du fichier.
+        """
+        self.memoire.close()
+
+
+def ouvrir_bibliotheque(nom_fichier):
+    """
+    Ouvre une bibliothèque une seule fois par processus: les appels suivants avec le même fichier retournent le même
+    objet.
+
+    Args:
+        nom_fichier: Le nom du fichier de la bibliothèque.
+
+    Returns:
+        La BibliothequeOuvertures.
+    """
+    if nom_fichier not in _bibliotheques_ouvertes:
+        _bibliotheques_ouvertes[nom_fichier] = BibliothequeOuvertures(nom_fichier)
+    return _bibliotheques_ouvertes[nom_fichier]
+
+
+class ConstructeurBibliotheque:
+    """
+    Accumule des coups joués ou trouvés par recherche, puis écrit le fichier trié de la bibliothèque.
+    """
+
+    def __init__(self):
+        """
+        Initialise un constructeur vide.
+        """
+        # (joueur, adversaire, coup) canoniques -> [somme des scores, nombre d'occurrences]
+        self.coups = {}
+
+    def ajouter(self, joueur, adversaire, indice, score):
+        """
+        Ajoute une occurrence d'un coup. Les scores d'un même coup sont moyennés.
+
+        Args:
+            joueur: Le bitboard du joueur qui joue le coup.
+            adversaire: Le bitboard de l'adversaire.
+            indice: L'indice de la case jouée.
+            score: Le score du coup, du point de vue du joueur qui le joue.
+        """
+        joueur_canonique, adversaire_canonique, symetries = symetries_canoniques(joueur, adversaire)
+        # Si la position est elle-même symétrique, des coups différents sont équivalents: on garde le plus petit
+        coup = min(appliquer_indice(indice, symetrie) for symetrie in symetries)
+        entree = self.coups.setdefault((joueur_canonique, adversaire_canonique, coup), [0, 0])
+        entree[0] += score
+        entree[1] += 1
+
+    def ajouter_partie(self, indices, difference_noir, nb_demi_coups=20):
+        """
+        Ajoute les premiers coups d'une partie jouée depuis la position initiale. Chaque coup reçoit comme score la
+        différence de pièces finale, du point de vue du joueur qui l'a joué.
+
+        Args:
+            indices: Les indices des cases jouées, dans l'ordre; None pour un tour passé.
+            difference_noir: Le nombre de pièces noires moins le nombre de pièces blanches à la fin de la partie.
+            nb_demi_coups: Le nombre de demi-coups gardés au début de la partie.
+        """
+        joueur, adversaire = POSITION_INITIALE
+        difference = difference_noir
+        for indice in indices[:nb_demi_coups]:
+            if indice is not None:
+                self.ajouter(joueur, adversaire, indice, difference)
+                retournees = masque_retournements(indice, joueur, adversaire)
+                joueur, adversaire = joueur | retournees | (1 << indice), adversaire & ~retournees
+            joueur, adversaire = adversaire, joueur
+            difference = -difference
+
+    def ajouter_recherches(self, nb_demi_coups=4, profondeur=4, afficher=None):
+        """
+        Énumère toutes les positions (à symétrie près) des nb_demi_coups premiers demi-coups de la partie et ajoute le
+        meilleur coup trouvé par une recherche alpha-bêta pour chacune. Les positions où un seul coup est possible
+        sont ignorées: il n'y a rien à chercher.
+
+        Args:
+            nb_demi_coups: La profondeur de la bibliothèque, en demi-coups depuis la position initiale.
+            profondeur: La profondeur de la recherche faite pour chaque position.
+            afficher: Fonction appelée avec un message de progression à chaque niveau (None pour ne rien afficher).
+        """
+        recherche = RechercheAlphaBeta(profondeur)
+        planche = PlancheBitboard()
+        niveau = {forme_canonique(*POSITION_INITIALE)[:2]}
+
+        for demi_coup in range(nb_demi_coups):
+            suivant = set()
+            for joueur, adversaire in sorted(niveau):
+                coups = masque_coups_possibles(joueur, adversaire)
+                if not coups:
+                    if masque_coups_possibles(adversaire, joueur):
+                        suivant.add(forme_canonique(adversaire, joueur)[:2])
+                    continue
+
+                if coups & (coups - 1):
+                    # La recherche se fait comme si le joueur avait les noirs
+                    planche.charger_bitboards(joueur, adversaire)
+                    ligne, colonne = recherche.chercher(planche, "noir")
+                    self.ajouter(joueur, adversaire, ligne * 8 + colonne, recherche.statistiques()["score"])
+
+                for indice in indices_du_masque(coups):
+                    retournees = masque_retournements(indice, joueur, adversaire)
+                    suivant.add(forme_canonique(adversaire & ~retournees, joueur | retournees | (1 << indice))[:2])
+
+            if afficher is not None:
+                afficher("Demi-coup {}: {} positions, {} coups dans la bibliothèque".format(
+                    demi_coup + 1, len(niveau), len(self.coups)))
+            niveau = suivant
+
+    def ecrire(self, nom_fichier):
+        """
+        Écrit la bibliothèque, triée par position, dans un fichier.
+
+        Args:
+            nom_fichier: Le nom du fichier à écrire.
+
+        Returns:
+            Le nombre d'entrées écrites.
+        """
+        entrees = sorted(self.coups.items())
+        with open(nom_fichier, "wb") as fichier:
+            fichier.write(ENTETE.pack(SIGNATURE, VERSION, len(entrees)))
+            for (joueur, adversaire, coup), (somme, nombre) in entrees:
+                score = max(-32768, min(32767, round(somme / nombre)))
+                fichier.write(ENTREE.pack(joueur, adversaire, coup, score, min(nombre, 65535)))
+        return len(entrees)
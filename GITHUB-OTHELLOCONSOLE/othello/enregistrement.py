@@ -0,0 +1,252 @@
+"""
+Format binaire compact pour enregistrer des parties, lu et écrit en flux par des générateurs.
+
+Un fichier commence par une signature, suivie des parties les unes après les autres. Chaque partie a un en-tête de
+4 octets (nombre de coups, drapeaux, différence de pièces finale), éventuellement suivi de la position de départ
+(deux bitboards de 8 octets, si la partie ne commence pas à la position initiale), puis d'un octet par coup: l'indice
+de la case (ligne * 8 + colonne), ou CODE_PASSE pour un tour passé. Une partie de 60 coups occupe ainsi 64 octets.
+
+Le lecteur ne garde en mémoire que la partie en cours: il peut parcourir des archives de millions de parties.
+"""
+import struct
+
+from othello.partie import Partie
+from othello.planche_bitboard import PlancheBitboard
+from othello.joueur import JoueurOrdinateur
+
+SIGNATURE = b"OTHR\x01"
+
+# Octet d'un tour passé.
+CODE_PASSE = 64
+
+# En-tête d'une partie: nombre de coups, drapeaux et différence de pièces finale (noir moins blanc).
+ENTETE_PARTIE = struct.Struct(">HBb")
+POSITION = struct.Struct(">QQ")
+
+# Drapeaux de l'en-tête.
+DEPART_PERSONNALISE = 1
+BLANC_COMMENCE = 2
+TOUR_PRECEDENT_PASSE = 4
+
+# Différence finale d'une partie qui n'est pas terminée.
+DIFFERENCE_INCONNUE = -128
+
+# Taille du tampon des fichiers lus et écrits.
+TAILLE_TAMPON = 1 << 20
+
+
+class EnregistrementPartie:
+    """
+    Une partie enregistrée: la position de départ, les coups joués et le résultat.
+    """
+    __slots__ = ("coups", "depart", "difference")
+
+    def __init__(self, coups, depart=None, difference=DIFFERENCE_INCONNUE):
+        """
+        Crée un enregistrement.
+
+        Args:
+            coups: Les coups, sous forme de bytes: un octet par coup (indice de case ou CODE_PASSE).
+            depart: None pour la position initiale, sinon un tuple (bitboard noir, bitboard blanc, couleur qui
+                doit jouer, tour précédent passé).
+            difference: Le nombre de pièces noires moins le nombre de pièces blanches à la fin de la partie, ou
+                DIFFERENCE_INCONNUE.
+        """
+        self.coups = bytes(coups)
+        self.depart = depart
+        self.difference = difference
+
+    def __len__(self):
+        return len(self.coups)
+
+    def __eq__(self, autre):
+        return (isinstance(autre, EnregistrementPartie) and self.coups == autre.coups and self.depart == autre.depart
+                and self.difference == autre.difference)
+
+    def positions(self):
+        """
+        Retourne les coups sous forme de positions, comme dans Partie.coups_joues.
+
+        Returns:
+            La liste des coups, des couples (ligne, colonne), ou None pour un tour passé.
+        """
+        return [None if code == CODE_PASSE else divmod(code, 8) for code in self.coups]
+
+    def creer_partie(self, nb_coups=None, type_planche="bitboard", joueur_noir=None, joueur_blanc=None):
+        """
+        Reconstruit la partie après ses nb_coups premiers coups.
+
+        Args:
+            nb_coups: Le nombre de coups à rejouer (None pour tous).
+            type_planche: La représentation de la planche (voir Partie).
+            joueur_noir: Le joueur noir (None pour un JoueurOrdinateur).
+            joueur_blanc: Le joueur blanc (None pour un JoueurOrdinateur).
+
+        Returns:
+            La Partie, prête à être continuée par jouer().
+        """
+        partie = Partie(type_planche=type_planche,
+                        joueur_noir=joueur_noir if joueur_noir is not None else JoueurOrdinateur("noir"),
+                        joueur_blanc=joueur_blanc if joueur_blanc is not None else JoueurOrdinateur("blanc"),
+                        verbeux=False)
+        if self.depart is not None:
+            noir, blanc, couleur, passe = self.depart
+            chaine = chaine_de_bitboards(noir, blanc)
+            # Comme Partie.charger: les pièces sont placées sur une nouvelle planche
+            for ligne in chaine.splitlines():
+                partie.planche.charger_dune_chaine(ligne)
+            partie.position_depart = (chaine, couleur, passe)
+            partie.tour_precedent_passe = passe
+            if couleur != partie.couleur_joueur_courant:
+                partie.changerTour()
+
+        partie.rejouer(self.positions()[:nb_coups])
+        return partie
+
+    def creer_planche(self, nb_coups=None, type_planche="bitboard"):
+        """
+        Reconstruit la planche après les nb_coups premiers coups de la partie.
+
+        Returns:
+            Un couple (planche, couleur qui doit jouer).
+        """
+        partie = self.creer_partie(nb_coups, type_planche)
+        return partie.planche, partie.couleur_joueur_courant
+
+
+def chaine_de_bitboards(noir, blanc):
+    """
+    Convertit une position en chaîne au format de Planche.convertir_en_chaine.
+
+    Args:
+        noir: Le bitboard des pièces noires.
+        blanc: Le bitboard des pièces blanches.
+
+    Returns:
+        La chaîne de caractères.
+    """
+    planche = PlancheBitboard()
+    planche.vider()
+    planche.noir, planche.blanc = noir, blanc
+    return planche.convertir_en_chaine()
+
+
+def enregistrer_partie(partie):
+    """
+    Crée l'enregistrement d'une partie, à partir de son historique (voir Partie.coups_joues).
+
+    Args:
+        partie: La partie, terminée ou non.
+
+    Returns:
+        L'EnregistrementPartie.
+    """
+    assert partie.planche.nb_cases == 8, "enregistrer_partie: seules les parties 8x8 peuvent être enregistrées."
+    coups = bytes(CODE_PASSE if coup is None else coup[0] * 8 + coup[1] for coup in partie.coups_joues())
+
+    depart = None
+    if partie.position_depart is not None:
+        chaine, couleur, passe = partie.position_depart
+        planche = PlancheBitboard()
+        planche.vider()
+        for ligne in chaine.splitlines():
+            planche.charger_dune_chaine(ligne)
+        depart = (planche.noir, planche.blanc, couleur, passe)
+
+    difference = DIFFERENCE_INCONNUE
+    if partie.deux_tours_passes or partie.planche.nb_vides == 0:
+        difference = partie.planche.nb_noir - partie.planche.nb_blanc
+    return EnregistrementPartie(coups, depart, difference)
+
+
+def ecrire_parties(nom_fichier, enregistrements, ajouter=False):
+    """
+    Écrit des parties dans un fichier, au fur et à mesure qu'elles sont produites: enregistrements peut être un
+    générateur, qui n'est jamais converti en liste.
+
+    Args:
+        nom_fichier: Le nom du fichier.
+        enregistrements: Un itérable d'EnregistrementPartie.
+        ajouter: True pour ajouter les parties à la fin d'un fichier existant.
+
+    Returns:
+        Le nombre de parties écrites.
+    """
+    nombre = 0
+    with open(nom_fichier, "ab" if ajouter else "wb", buffering=TAILLE_TAMPON) as fichier:
+        if fichier.tell() == 0:
+            fichier.write(SIGNATURE)
+        for enregistrement in enregistrements:
+            drapeaux = 0
+            if enregistrement.depart is not None:
+                noir, blanc, couleur, passe = enregistrement.depart
+                drapeaux |= DEPART_PERSONNALISE
+                if couleur == "blanc":
+                    drapeaux |= BLANC_COMMENCE
+                if passe:
+                    drapeaux |= TOUR_PRECEDENT_PASSE
+            fichier.write(ENTETE_PARTIE.pack(len(enregistrement.coups), drapeaux, enregistrement.difference))
+            if enregistrement.depart is not None:
+                fichier.write(POSITION.pack(noir, blanc))
+            fichier.write(enregistrement.coups)
+            nombre += 1
+    return nombre
+
+
+def lire_parties(nom_fichier):
+    """
+    Parcourt les parties d'un fichier sans le charger en entier.
+
+    Args:
+        nom_fichier: Le nom du fichier.
+
+    Returns:
+        Un générateur d'EnregistrementPartie.
+    """
+    with open(nom_fichier, "rb", buffering=TAILLE_TAMPON) as fichier:
+        if fichier.read(len(SIGNATURE)) != SIGNATURE:
+            raise ValueError("{}: ce n'est pas un fichier de parties.".format(nom_fichier))
+        while True:
+            entete = fichier.read(ENTETE_PARTIE.size)
+            if not entete:
+                return
+            if len(entete) < ENTETE_PARTIE.size:
+                raise ValueError("{}: fichier tronqué.".format(nom_fichier))
+            nb_coups, drapeaux, difference = ENTETE_PARTIE.unpack(entete)
+
+            depart = None
+            if drapeaux & DEPART_PERSONNALISE:
+                noir, blanc = POSITION.unpack(fichier.read(POSITION.size))
+                depart = (noir, blanc, "blanc" if drapeaux & BLANC_COMMENCE else "noir",
+                          bool(drapeaux & TOUR_PRECEDENT_PASSE))
+
+            coups = fichier.read(nb_coups)
+            if len(coups) < nb_coups:
+                raise ValueError("{}: fichier tronqué.".format(nom_fichier))
+            yield EnregistrementPartie(coups, depart, difference)
+
+
+def importer_texte(nom_fichier):
+    """
+    Importe une partie sauvegardée au format texte (voir Partie.sauvegarder). Le format texte ne garde que la
+    position: l'enregistrement commence à cette position et n'a aucun coup.
+
+    Args:
+        nom_fichier: Le nom du fichier texte.
+
+    Returns:
+        L'EnregistrementPartie.
+    """
+    return enregistrer_partie(Partie(nom_fichier, type_planche="bitboard", verbeux=False))
+
+
+def exporter_texte(enregistrement, nom_fichier, nb_coups=None):
+    """
+    Exporte la position d'une partie enregistrée au format texte (voir Partie.sauvegarder).
+
+    Args:
+        enregistrement: L'EnregistrementPartie.
+        nom_fichier: Le nom du fichier texte.
+        nb_coups: Le nombre de coups joués avant d'exporter la position (None pour tous).
+    """
+    enregistrement.creer_partie(nb_coups).sauvegarder(nom_fichier)
@@ -0,0 +1,191 @@
+"""
+Apprentissage des poids de l'évaluation par motifs (voir le module evaluation) à partir de parties enregistrées.
+
+Chaque position d'une partie terminée est un exemple: ses caractéristiques (la configuration de chaque instance des
+motifs, la mobilité et la parité, dans sa phase) doivent prédire la différence de pièces finale du point de vue du
+joueur qui doit jouer. Les poids sont la solution des moindres carrés régularisés (ridge), trouvée par gradient
+conjugué sur les équations normales (CGLS): la matrice des caractéristiques, très creuse, n'est jamais construite.
+
+NumPy n'est nécessaire que pour ce module.
+"""
+import time
+
+import numpy as np
+
+from othello.base_positions import positions_de_partie
+from othello.enregistrement import lire_parties, DIFFERENCE_INCONNUE
+from othello.evaluation import (EvaluationMotifs, INSTANCES, MOTIFS, NB_PHASES, PHASES, TERMES, ECHELLE,
+                                taille_phase)
+from othello.lot_numpy import coups_possibles_lot, compter_lot
+
+
+def charger_exemples(noms_fichiers):
+    """
+    Lit les positions des parties terminées de fichiers de parties enregistrées (voir le module enregistrement).
+
+    Args:
+        noms_fichiers: Les noms des fichiers.
+
+    Returns:
+        Un tuple de trois tableaux: bitboards des joueurs qui doivent jouer, bitboards de leurs adversaires
+        (numpy.uint64) et différences de pièces finales du point de vue des joueurs (numpy.float64).
+    """
+    joueurs = []
+    adversaires = []
+    cibles = []
+    for nom_fichier in noms_fichiers:
+        for enregistrement in lire_parties(nom_fichier):
+            if enregistrement.difference == DIFFERENCE_INCONNUE:
+                continue
+            ecart = abs(enregistrement.difference)
+            for joueur, adversaire, resultat in positions_de_partie(enregistrement):
+                joueurs.append(joueur)
+                adversaires.append(adversaire)
+                cibles.append(resultat * ecart)
+    return (np.array(joueurs, dtype=np.uint64), np.array(adversaires, dtype=np.uint64),
+            np.array(cibles, dtype=np.float64))
+
+
+def caracteristiques(joueurs, adversaires):
+    """
+    Calcule les caractéristiques des positions: pour chacune, les colonnes des poids qu'elle utilise et leurs
+    valeurs, dans la numérotation de EvaluationMotifs (les poids des phases les uns après les autres).
+
+    Args:
+        joueurs: Le tableau des bitboards des joueurs qui doivent jouer.
+        adversaires: Le tableau des bitboards des adversaires.
+
+    Returns:
+        Un couple de tableaux (colonnes, valeurs) de taille (nombre de positions, nombre de caractéristiques).
+    """
+    nb_pieces = compter_lot(joueurs | adversaires)
+    decalages = np.array(PHASES, dtype=np.int64)[nb_pieces] * taille_phase()
+
+    mobilite = (compter_lot(coups_possibles_lot(joueurs, adversaires))
+                - compter_lot(coups_possibles_lot(adversaires, joueurs))).astype(np.float64)
+    parite = (nb_pieces & 1).astype(np.float64)
+    colonnes = [decalages, decalages + 1, decalages + 2]
+    valeurs = [np.ones(len(joueurs)), mobilite, parite]
+
+    # Début de la table de chaque motif dans les poids d'une phase
+    debuts = []
+    position = len(TERMES)
+    for _, cases in MOTIFS:
+        debuts.append(position)
+        position += 3 ** len(cases)
+
+    un = np.uint64(1)
+    for numero, cases in INSTANCES:
+        indices = np.zeros(len(joueurs), dtype=np.int64)
+        puissance = 1
+        for case in cases:
+            decalage = np.uint64(case)
+            chiffres = ((joueurs >> decalage) & un) + 2 * ((adversaires >> decalage) & un)
+            indices += chiffres.astype(np.int64) * puissance
+            puissance *= 3
+        colonnes.append(decalages + debuts[numero] + indices)
+        valeurs.append(np.ones(len(joueurs)))
+    return np.stack(colonnes, axis=1), np.stack(valeurs, axis=1)
+
+
+def moindres_carres(colonnes, valeurs, cibles, nb_poids, regularisation=1.0, iterations=200, tolerance=1e-6,
+                    afficher=None):
+    """
+    Résout min |A w - cibles|^2 + regularisation * |w|^2 par gradient conjugué (CGLS), où la ligne i de A vaut
+    valeurs[i] aux colonnes colonnes[i] et 0 ailleurs.
+
+    Args:
+        colonnes: Les colonnes de chaque ligne (voir caracteristiques).
+        valeurs: Les valeurs de chaque ligne.
+        cibles: Les cibles.
+        nb_poids: Le nombre de colonnes de A.
+        regularisation: Le poids de la régularisation, qui garde nuls les poids des configurations jamais vues.
+        iterations: Le nombre maximal d'itérations.
+        tolerance: On s'arrête lorsque la norme du gradient a diminué de ce facteur.
+        afficher: La fonction utilisée pour afficher la progression (None pour ne rien afficher).
+
+    Returns:
+        Le tableau des poids.
+    """
+    colonnes_aplaties = colonnes.ravel()
+
+    def produit(poids):
+        return (poids[colonnes] * valeurs).sum(axis=1)
+
+    def produit_transpose(residus):
+        return np.bincount(colonnes_aplaties, weights=(valeurs * residus[:, None]).ravel(), minlength=nb_poids)
+
+    poids = np.zeros(nb_poids)
+    residus = cibles.astype(np.float64)
+    gradient = produit_transpose(residus)
+    direction = gradient.copy()
+    gamma = gradient @ gradient
+    gamma_depart = gamma
+    for iteration in range(iterations):
+        if gamma <= tolerance * tolerance * gamma_depart:
+            break
+        q = produit(direction)
+        alpha = gamma / (q @ q + regularisation * (direction @ direction))
+        poids += alpha * direction
+        residus -= alpha * q
+        gradient = produit_transpose(residus) - regularisation * poids
+        gamma_suivant = gradient @ gradient
+        direction = gradient + (gamma_suivant / gamma) * direction
+        gamma = gamma_suivant
+        if afficher is not None and (iteration + 1) % 25 == 0:
+            afficher("itération {}: erreur quadratique moyenne {:.3f}".format(
+                iteration + 1, np.sqrt(np.mean(residus ** 2))))
+    return poids
+
+
+def entrainer(noms_fichiers, regularisation=1.0, iterations=200, validation=0.1, graine=0, afficher=print):
+    """
+    Apprend les poids de l'évaluation par motifs à partir de parties enregistrées.
+
+    Args:
+        noms_fichiers: Les fichiers de parties enregistrées.
+        regularisation: Le poids de la régularisation (voir moindres_carres).
+        iterations: Le nombre maximal d'itérations du gradient conjugué.
+        validation: La fraction des positions gardées de côté pour mesurer l'erreur sur des positions inconnues.
+        graine: La graine du tirage des positions de validation.
+        afficher: La fonction utilisée pour afficher la progression (None pour ne rien afficher).
+
+    Returns:
+        Un couple (EvaluationMotifs, statistiques): les statistiques contiennent le nombre de positions
+        d'entraînement et de validation, les erreurs quadratiques moyennes (en pièces) sur chacune et la durée.
+    """
+    debut = time.perf_counter()
+    joueurs, adversaires, cibles = charger_exemples(noms_fichiers)
+    if len(cibles) == 0:
+        raise ValueError("Aucune partie terminée dans les fichiers.")
+    colonnes, valeurs = caracteristiques(joueurs, adversaires)
+    nb_poids = NB_PHASES * taille_phase()
+
+    generateur = np.random.default_rng(graine)
+    est_validation = generateur.random(len(cibles)) < validation
+    entrainement = ~est_validation
+    if afficher is not None:
+        afficher("{} positions d'entraînement, {} de validation, {} poids".format(
+            int(entrainement.sum()), int(est_validation.sum()), nb_poids))
+
+    poids = moindres_carres(colonnes[entrainement], valeurs[entrainement], cibles[entrainement], nb_poids,
+                            regularisation, iterations, afficher=afficher)
+    poids_entiers = np.clip(np.rint(poids * ECHELLE), -32768, 32767).astype(np.int16)
+
+    def erreur(masque):
+        if not masque.any():
+            return 0.0
+        predictions = (poids_entiers[colonnes[masque]] * valeurs[masque]).sum(axis=1) / ECHELLE
+        return float(np.sqrt(np.mean((predictions - cibles[masque]) ** 2)))
+
+    statistiques = {
+        "positions": int(entrainement.sum()),
+        "positions_validation": int(est_validation.sum()),
+        "erreur": erreur(entrainement),
+        "erreur_validation": erreur(est_validation),
+        "duree": time.perf_counter() - debut,
+    }
+    if afficher is not None:
+        afficher("erreur quadratique moyenne: {erreur:.3f} pièces (validation {erreur_validation:.3f}) en "
+                 "{duree:.1f} s".format(**statistiques))
+    return EvaluationMotifs(poids_entiers.tolist()), statistiques
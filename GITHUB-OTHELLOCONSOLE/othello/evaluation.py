@@ -0,0 +1,362 @@
+"""
+Évaluation par motifs: la valeur d'une position est la somme des poids de la configuration de quelques groupes de
+cases (bords, coins, diagonales), lus dans des tables, plus des termes de mobilité et de parité.
+
+Chaque motif est un tuple de cases. Sa configuration est un indice en base 3: le chiffre de la j-ième case (0 vide, 1
+joueur, 2 adversaire) est multiplié par 3 ** j. Un motif est appliqué à la planche sous plusieurs orientations (voir
+le module symetries), qui partagent la même table de poids. Les poids dépendent aussi de la phase de la partie (le
+nombre de pièces sur la planche).
+
+Les indices des motifs d'une planche peuvent être tenus à jour à chaque coup (voir IndicesMotifs): ils sont alors
+calculés avec les codes de couleur de la planche (1 noir, 2 blanc), et les tables du joueur blanc sont celles du
+joueur noir dont les chiffres 1 et 2 sont échangés.
+
+Les poids sont appris par le module entrainement et gardés dans un fichier binaire compact (voir
+EvaluationMotifs.ecrire).
+"""
+import array
+import struct
+import sys
+
+from othello.piece import NOIR, BLANC
+from othello.planche_bitboard import PlancheBitboard, masque_coups_possibles
+from othello.symetries import SYMETRIES, appliquer_indice
+
+SIGNATURE = b"OTHE\x01"
+
+# Les motifs, chacun dans une seule orientation.
+MOTIFS = (
+    ("bord", (0, 1, 2, 3, 4, 5, 6, 7)),
+    ("ligne_2", (8, 9, 10, 11, 12, 13, 14, 15)),
+    ("coin", (0, 1, 2, 8, 9, 10, 16, 17, 18)),
+    ("diagonale", (0, 9, 18, 27, 36, 45, 54, 63)),
+)
+
+# Nombre de phases de la partie, selon le nombre de pièces sur la planche.
+NB_PHASES = 4
+
+# Les poids sont gardés en entiers: un poids de ECHELLE vaut une pièce.
+ECHELLE = 64
+
+# Les scores retournés par l'évaluation valent UNITES_PAR_PIECE par pièce.
+UNITES_PAR_PIECE = 8
+
+# Valeur absolue maximale d'un score de l'évaluation, pour rester sous les scores de fin de partie de la recherche.
+SCORE_MAXIMAL = 999
+
+# Les termes qui précèdent les tables dans les poids de chaque phase: constante, mobilité (différence du nombre de
+# coups possibles), parité (1 si le nombre de cases vides est impair).
+TERMES = ("constante", "mobilite", "parite")
+
+
+def orienter_motifs(motifs):
+    """
+    Applique chaque motif à la planche sous toutes ses orientations distinctes.
+
+    Args:
+        motifs: Les motifs, des couples (nom, cases).
+
+    Returns:
+        La liste des instances: des couples (numéro du motif, cases de l'instance).
+    """
+    instances = []
+    for numero, (_, cases) in enumerate(motifs):
+        vues = set()
+        for symetrie in SYMETRIES:
+            cases_instance = tuple(appliquer_indice(case, symetrie) for case in cases)
+            if frozenset(cases_instance) not in vues:
+                vues.add(frozenset(cases_instance))
+                instances.append((numero, cases_instance))
+    return instances
+
+
+INSTANCES = orienter_motifs(MOTIFS)
+
+# Pour chaque case, les couples (numéro d'instance, puissance de 3 de la case dans l'instance).
+CASES_INSTANCES = [[] for _ in range(64)]
+for _instance, (_, _cases) in enumerate(INSTANCES):
+    for _position, _case in enumerate(_cases):
+        CASES_INSTANCES[_case].append((_instance, 3 ** _position))
+CASES_INSTANCES = tuple(tuple(liste) for liste in CASES_INSTANCES)
+
+# Phase de la partie selon le nombre de pièces (de 0 à 64).
+PHASES = tuple(min(NB_PHASES - 1, max(0, nb_pieces - 4) * NB_PHASES // 61) for nb_pieces in range(65))
+
+
+def taille_phase(motifs=MOTIFS):
+    """
+    Retourne le nombre de poids d'une phase: les termes, puis la table de chaque motif.
+    """
+    return len(TERMES) + sum(3 ** len(cases) for _, cases in motifs)
+
+
+def indices_de_bitboards(joueur, adversaire):
+    """
+    Calcule les indices de toutes les instances des motifs pour une position.
+
+    Args:
+        joueur: Le bitboard des pièces qui comptent comme chiffre 1.
+        adversaire: Le bitboard des pièces qui comptent comme chiffre 2.
+
+    Returns:
+        La liste des indices, dans l'ordre de INSTANCES.
+    """
+    indices = []
+    for _, cases in INSTANCES:
+        indice = 0
+        puissance = 1
+        for case in cases:
+            indice += (((joueur >> case) & 1) + 2 * ((adversaire >> case) & 1)) * puissance
+            puissance *= 3
+        indices.append(indice)
+    return indices
+
+
+def bitboards_de_planche(planche):
+    """
+    Retourne les bitboards (noir, blanc) d'une planche, quelle que soit sa représentation.
+    """
+    if isinstance(planche, PlancheBitboard):
+        return planche.noir, planche.blanc
+    noir = blanc = 0
+    for indice, code in enumerate(planche.cases):
+        if code == NOIR:
+            noir |= 1 << indice
+        elif code == BLANC:
+            blanc |= 1 << indice
+    return noir, blanc
+
+
+def table_inversion(nb_cases):
+    """
+    Construit la table qui échange les chiffres 1 et 2 des indices d'un motif de nb_cases cases.
+
+    Returns:
+        La liste: indice -> indice inversé.
+    """
+    inversion = [0]
+    puissance = 1
+    for _ in range(nb_cases):
+        inversion = [indice + chiffre * puissance for chiffre in (0, 2, 1) for indice in inversion]
+        puissance *= 3
+    return inversion
+
+
+class IndicesMotifs:
+    """
+    Les indices des instances des motifs d'une planche, tenus à jour par les coups joués et annulés sur la planche
+    (voir Planche.faire_coup et PlancheBitboard.faire_coup). Les chiffres sont les codes de couleur: 1 noir, 2 blanc.
+    """
+    __slots__ = ("indices",)
+
+    def __init__(self, noir, blanc):
+        """
+        Calcule les indices d'une position.
+
+        Args:
+            noir: Le bitboard des pièces noires.
+            blanc: Le bitboard des pièces blanches.
+        """
+        self.indices = indices_de_bitboards(noir, blanc)
+
+    @classmethod
+    def attacher(cls, planche):
+        """
+        Calcule les indices de la position d'une planche et les attache à la planche, qui les tiendra à jour. La
+        planche ne doit plus être modifiée autrement que par faire_coup et annuler_coup.
+
+        Args:
+            planche: La planche (Planche ou PlancheBitboard).
+
+        Returns:
+            Les IndicesMotifs.
+        """
+        motifs = cls(*bitboards_de_planche(planche))
+        planche.motifs = motifs
+        return motifs
+
+    def faire_coup(self, indice, code, retournees):
+        """
+        Met à jour les indices après un coup.
+
+        Args:
+            indice: L'indice de la case jouée.
+            code: Le code de couleur du coup (NOIR ou BLANC).
+            retournees: Les indices des cases retournées.
+        """
+        indices = self.indices
+        for instance, puissance in CASES_INSTANCES[indice]:
+            indices[instance] += code * puissance
+        # Une pièce retournée passe du code adverse (3 - code) au code du coup
+        difference = 2 * code - 3
+        for case in retournees:
+            for instance, puissance in CASES_INSTANCES[case]:
+                indices[instance] += difference * puissance
+
+    def annuler_coup(self, indice, code, retournees):
+        """
+        Inverse de faire_coup().
+        """
+        indices = self.indices
+        for instance, puissance in CASES_INSTANCES[indice]:
+            indices[instance] -= code * puissance
+        difference = 2 * code - 3
+        for case in retournees:
+            for instance, puissance in CASES_INSTANCES[case]:
+                indices[instance] -= difference * puissance
+
+
+class EvaluationMotifs:
+    """
+    Évaluation par motifs (voir le début du module), avec les poids d'un fichier ou d'un entraînement.
+    """
+
+    def __init__(self, poids):
+        """
+        Prépare les tables de l'évaluation.
+
+        Args:
+            poids: La séquence des poids entiers (en ECHELLE par pièce) de chaque phase, les unes après les autres:
+                les TERMES, puis la table de chaque motif de MOTIFS.
+        """
+        taille = taille_phase()
+        if len(poids) != NB_PHASES * taille:
+            raise ValueError("EvaluationMotifs: {} poids au lieu de {}.".format(len(poids), NB_PHASES * taille))
+        self.poids = poids
+
+        inversions = {}
+        self.phases = []
+        for phase in range(NB_PHASES):
+            debut = phase * taille
+            constante, mobilite, parite = poids[debut:debut + len(TERMES)]
+            position = debut + len(TERMES)
+            tables_noir = []
+            tables_blanc = []
+            for _, cases in MOTIFS:
+                fin = position + 3 ** len(cases)
+                table = list(poids[position:fin])
+                if len(cases) not in inversions:
+                    inversions[len(cases)] = table_inversion(len(cases))
+                tables_noir.append(table)
+                tables_blanc.append([table[indice] for indice in inversions[len(cases)]])
+                position = fin
+            # Une table par instance, partagée par les instances d'un même motif
+            self.phases.append((constante, mobilite, parite,
+                                [tables_noir[numero] for numero, _ in INSTANCES],
+                                [tables_blanc[numero] for numero, _ in INSTANCES]))
+
+    def score(self, total):
+        """
+        Convertit une somme de poids en score de l'évaluation (UNITES_PAR_PIECE par pièce, borné par SCORE_MAXIMAL).
+        """
+        score = total // (ECHELLE // UNITES_PAR_PIECE)
+        return max(-SCORE_MAXIMAL, min(SCORE_MAXIMAL, score))
+
+    def evaluer(self, joueur, adversaire):
+        """
+        Évalue une position en calculant tous ses indices.
+
+        Args:
+            joueur: Le bitboard du joueur qui doit jouer.
+            adversaire: Le bitboard de l'adversaire.
+
+        Returns:
+            Le score, positif si la position est favorable au joueur.
+        """
+        nb_pieces = (joueur | adversaire).bit_count()
+        constante, mobilite, parite, tables, _ = self.phases[PHASES[nb_pieces]]
+        total = constante + sum(map(list.__getitem__, tables, indices_de_bitboards(joueur, adversaire)))
+        total += mobilite * (masque_coups_possibles(joueur, adversaire).bit_count()
+                             - masque_coups_possibles(adversaire, joueur).bit_count())
+        if nb_pieces & 1:
+            total += parite
+        return self.score(total)
+
+    def evaluer_planche(self, planche, couleur):
+        """
+        Évalue une PlancheBitboard à laquelle des IndicesMotifs sont attachés, sans recalculer les indices.
+
+        Args:
+            planche: La planche.
+            couleur: La couleur qui doit jouer.
+
+        Returns:
+            Le score, positif si la position est favorable à la couleur.
+        """
+        joueur, adversaire = planche.bitboards(couleur)
+        nb_pieces = (joueur | adversaire).bit_count()
+        constante, mobilite, parite, tables_noir, tables_blanc = self.phases[PHASES[nb_pieces]]
+        tables = tables_noir if couleur == "noir" else tables_blanc
+        total = constante + sum(map(list.__getitem__, tables, planche.motifs.indices))
+        total += mobilite * (masque_coups_possibles(joueur, adversaire).bit_count()
+                             - masque_coups_possibles(adversaire, joueur).bit_count())
+        if nb_pieces & 1:
+            total += parite
+        return self.score(total)
+
+    def ecrire(self, nom_fichier):
+        """
+        Écrit les poids dans un fichier: la signature, le nombre de phases, la taille de chaque motif et l'échelle,
+        puis les poids en entiers de 16 bits petit-boutistes.
+
+        Args:
+            nom_fichier: Le nom du fichier.
+        """
+        poids = array.array("h", self.poids)
+        if sys.byteorder == "big":
+            poids.byteswap()
+        with open(nom_fichier, "wb") as fichier:
+            fichier.write(SIGNATURE)
+            fichier.write(struct.pack(">BB", NB_PHASES, len(MOTIFS)))
+            fichier.write(bytes(len(cases) for _, cases in MOTIFS))
+            fichier.write(struct.pack(">H", ECHELLE))
+            poids.tofile(fichier)
+
+    @classmethod
+    def charger(cls, nom_fichier):
+        """
+        Charge les poids d'un fichier écrit par ecrire().
+
+        Args:
+            nom_fichier: Le nom du fichier.
+
+        Returns:
+            L'EvaluationMotifs.
+
+        Raises:
+            ValueError: Si le fichier n'est pas un fichier de poids ou ne correspond pas aux motifs.
+        """
+        with open(nom_fichier, "rb") as fichier:
+            if fichier.read(len(SIGNATURE)) != SIGNATURE:
+                raise ValueError("{}: ce n'est pas un fichier de poids.".format(nom_fichier))
+            nb_phases, nb_motifs = struct.unpack(">BB", fichier.read(2))
+            tailles = tuple(fichier.read(nb_motifs))
+            echelle, = struct.unpack(">H", fichier.read(2))
+            if (nb_phases != NB_PHASES or tailles != tuple(len(cases) for _, cases in MOTIFS)
+                    or echelle != ECHELLE):
+                raise ValueError("{}: les poids ne correspondent pas aux motifs de l'évaluation.".format(nom_fichier))
+            poids = array.array("h")
+            poids.frombytes(fichier.read())
+        if sys.byteorder == "big":
+            poids.byteswap()
+        return cls(poids)
+
+
+# Évaluations déjà chargées dans ce processus, par nom de fichier.
+_EVALUATIONS = {}
+
+
+def charger_evaluation(nom_fichier):
+    """
+    Charge un fichier de poids une seule fois par processus (voir EvaluationMotifs.charger).
+
+    Args:
+        nom_fichier: Le nom du fichier.
+
+    Returns:
+        L'EvaluationMotifs.
+    """
+    evaluation = _EVALUATIONS.get(nom_fichier)
+    if evaluation is None:
+        evaluation = _EVALUATIONS[nom_fichier] = EvaluationMotifs.charger(nom_fichier)
+    return evaluation
@@ -0,0 +1,311 @@
+"""
+Résolution exacte des fins de partie: le score final (différence de pièces) et le meilleur coup, en jouant
+parfaitement pour les deux joueurs jusqu'à la dernière case.
+
+Les positions sont représentées comme dans planche_bitboard, par un couple de bitboards (joueur, adversaire) du point
+de vue du joueur qui doit jouer. L'ordre des coups suit trois règles:
+    - avec beaucoup de cases vides, les coups qui laissent le moins de coups possibles à l'adversaire d'abord
+      (« fastest first »), ce qui provoque les coupures le plus tôt;
+    - avec peu de cases vides, les cases des régions (quadrants) qui ont un nombre impair de cases vides d'abord
+      (parité): on y garde le dernier coup;
+    - pour les 4 dernières cases vides, on ne calcule plus les masques de coups possibles: on essaie directement
+      chacune des cases vides (voir SolveurFinale.resoudre_petite).
+
+Le solveur peut avoir un budget de temps ou de noeuds, comme RechercheAlphaBeta: une résolution qui le dépasse est
+abandonnée (BudgetEpuise), il n'y a pas de résultat partiel.
+"""
+import time
+
+from othello.planche_bitboard import PLANCHE_PLEINE, masque_coups_possibles, masque_retournements, indices_du_masque
+from othello.recherche import BudgetEpuise, copier_en_bitboard
+
+# Nombre de cases vides à partir duquel les joueurs ordinateur résolvent la fin de partie plutôt que de chercher.
+SEUIL_FINALE = 12
+
+# En dessous de ce nombre de cases vides, on ordonne les coups par parité plutôt que par mobilité adverse.
+SEUIL_MOBILITE = 7
+
+# Nombre de cases vides à partir duquel les positions sont gardées dans la table de la résolution.
+SEUIL_TABLE = 8
+
+# Nombre de noeuds entre deux vérifications du budget.
+INTERVALLE_BUDGET = 256
+
+# Les 4 quadrants de la planche, pour la parité des régions.
+QUADRANTS = (0x000000000F0F0F0F, 0x00000000F0F0F0F0, 0x0F0F0F0F00000000, 0xF0F0F0F000000000)
+
+# Types de bornes des scores gardés dans la table.
+EXACTE = 0
+INFERIEURE = 1
+SUPERIEURE = 2
+
+
+def trier_par_parite(vides):
+    """
+    Liste les cases vides en commençant par celles des quadrants qui ont un nombre impair de cases vides.
+
+    Args:
+        vides: Le bitboard des cases vides.
+
+    Returns:
+        La liste des indices des cases vides.
+    """
+    impaires = 0
+    for quadrant in QUADRANTS:
+        if (vides & quadrant).bit_count() & 1:
+            impaires |= quadrant
+    return list(indices_du_masque(vides & impaires)) + list(indices_du_masque(vides & ~impaires))
+
+
+class SolveurFinale:
+    """
+    Recherche alpha-bêta exacte jusqu'à la fin de la partie.
+    """
+
+    def __init__(self, temps_max=None, noeuds_max=None, arret=None):
+        """
+        Initialise le solveur.
+
+        Args:
+            temps_max: Le temps maximal d'une résolution, en secondes (None pour aucune limite).
+            noeuds_max: Le nombre maximal de noeuds d'une résolution (None pour aucune limite).
+            arret: Un signal d'arrêt (threading.Event) qui interrompt la résolution, ou None.
+        """
+        self.temps_max = temps_max
+        self.noeuds_max = noeuds_max
+        self.arret = arret
+        self.debut = 0.0
+        self.verification = 0
+
+        self.noeuds = 0
+
+        # (joueur, adversaire) -> (borne, score, meilleur coup), pour les positions d'au moins SEUIL_TABLE cases vides
+        self.table = {}
+
+    def resoudre(self, joueur, adversaire, alpha=-64, beta=64):
+        """
+        Résout une position.
+
+        Args:
+            joueur: Le bitboard du joueur qui doit jouer.
+            adversaire: Le bitboard de l'adversaire.
+            alpha: La borne inférieure de la fenêtre (-64 pour le score exact).
+            beta: La borne supérieure de la fenêtre (64 pour le score exact).
+
+        Returns:
+            Un couple (score, indice du meilleur coup). Le score est la différence de pièces finale du point de vue du
+            joueur; le coup est None si le joueur doit passer son tour ou si la partie est terminée.
+
+        Raises:
+            BudgetEpuise: Si le budget de temps ou de noeuds est dépassé, ou si l'arrêt est demandé.
+        """
+        self.noeuds = 0
+        self.table.clear()
+        self.debut = time.perf_counter()
+        sans_budget = self.temps_max is None and self.noeuds_max is None and self.arret is None
+        self.verification = float("inf") if sans_budget else INTERVALLE_BUDGET
+
+        coups = masque_coups_possibles(joueur, adversaire)
+        if not coups:
+            return self.negamax(joueur, adversaire, alpha, beta), None
+
+        meilleur_score = -65
+        meilleur_coup = None
+        for indice, joueur_suivant, adversaire_suivant in self.ordonner_coups(joueur, adversaire, coups, None):
+            score = -self.negamax(joueur_suivant, adversaire_suivant, -beta, -max(alpha, meilleur_score))
+            if score > meilleur_score:
+                meilleur_score = score
+                meilleur_coup = indice
+                if score >= beta:
+                    break
+        return meilleur_score, meilleur_coup
+
+    def negamax(self, joueur, adversaire, alpha, beta):
+        """
+        Recherche alpha-bêta exacte d'une position.
+
+        Args:
+            joueur: Le bitboard du joueur qui doit jouer.
+            adversaire: Le bitboard de l'adversaire.
+            alpha: La borne inférieure de la fenêtre.
+            beta: La borne supérieure de la fenêtre.
+
+        Returns:
+            Le score de la position du point de vue du joueur (exact s'il est dans la fenêtre, une borne sinon).
+        """
+        self.noeuds += 1
+        if self.noeuds >= self.verification:
+            self.verifier_budget()
+        vides = ~(joueur | adversaire) & PLANCHE_PLEINE
+        nb_vides = vides.bit_count()
+        if nb_vides <= 4:
+            return self.resoudre_petite(joueur, adversaire, trier_par_parite(vides), alpha, beta, False)
+
+        coups = masque_coups_possibles(joueur, adversaire)
+        if not coups:
+            if not masque_coups_possibles(adversaire, joueur):
+                return joueur.bit_count() - adversaire.bit_count()
+            return -self.negamax(adversaire, joueur, -beta, -alpha)
+
+        cle = (joueur, adversaire)
+        coup_table = None
+        if nb_vides >= SEUIL_TABLE:
+            entree = self.table.get(cle)
+            if entree is not None:
+                borne, score, coup_table = entree
+                if borne == EXACTE:
+                    return score
+                if borne == INFERIEURE and score >= beta:
+                    return score
+                if borne == SUPERIEURE and score <= alpha:
+                    return score
+
+        alpha_depart = alpha
+        meilleur = -65
+        meilleur_coup = None
+        for indice, joueur_suivant, adversaire_suivant in self.ordonner_coups(joueur, adversaire, coups, coup_table):
+            score = -self.negamax(joueur_suivant, adversaire_suivant, -beta, -alpha)
+            if score > meilleur:
+                meilleur = score
+                meilleur_coup = indice
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if nb_vides >= SEUIL_TABLE:
+            if meilleur <= alpha_depart:
+                borne = SUPERIEURE
+            elif meilleur >= beta:
+                borne = INFERIEURE
+            else:
+                borne = EXACTE
+            self.table[cle] = (borne, meilleur, meilleur_coup)
+        return meilleur
+
+    def verifier_budget(self):
+        """
+        Lève BudgetEpuise si le temps ou le nombre de noeuds alloué est dépassé, ou si l'arrêt est demandé. Appelée
+        tous les INTERVALLE_BUDGET noeuds.
+        """
+        self.verification = self.noeuds + INTERVALLE_BUDGET
+        if self.arret is not None and self.arret.is_set():
+            raise BudgetEpuise()
+        if self.noeuds_max is not None and self.noeuds >= self.noeuds_max:
+            raise BudgetEpuise()
+        if self.temps_max is not None and time.perf_counter() - self.debut >= self.temps_max:
+            raise BudgetEpuise()
+
+    def ordonner_coups(self, joueur, adversaire, coups, coup_table):
+        """
+        Joue chacun des coups possibles et les trie: le coup de la table d'abord, puis par mobilité adverse croissante
+        (beaucoup de cases vides) ou par parité (peu de cases vides).
+
+        Args:
+            joueur: Le bitboard du joueur qui doit jouer.
+            adversaire: Le bitboard de l'adversaire.
+            coups: Le bitboard des coups possibles.
+            coup_table: Le meilleur coup trouvé lors d'une visite précédente de la position (ou None).
+
+        Returns:
+            La liste triée des tuples (indice, position suivante du point de vue de l'adversaire).
+        """
+        vides = ~(joueur | adversaire) & PLANCHE_PLEINE
+        suivants = []
+        if vides.bit_count() > SEUIL_MOBILITE:
+            for indice in indices_du_masque(coups):
+                retournees = masque_retournements(indice, joueur, adversaire)
+                joueur_suivant = adversaire & ~retournees
+                adversaire_suivant = joueur | retournees | (1 << indice)
+                if indice == coup_table:
+                    cle = -1
+                else:
+                    cle = masque_coups_possibles(joueur_suivant, adversaire_suivant).bit_count()
+                suivants.append((cle, indice, joueur_suivant, adversaire_suivant))
+            suivants.sort()
+        else:
+            for indice in trier_par_parite(vides):
+                if coups >> indice & 1:
+                    retournees = masque_retournements(indice, joueur, adversaire)
+                    suivants.append((0, indice, adversaire & ~retournees, joueur | retournees | (1 << indice)))
+        return [suivant[1:] for suivant in suivants]
+
+    def resoudre_petite(self, joueur, adversaire, vides, alpha, beta, passe):
+        """
+        Résout une position d'au plus 4 cases vides, sans calculer de masques de coups possibles: on essaie de jouer
+        directement chacune des cases vides, dans l'ordre de parité.
+
+        Args:
+            joueur: Le bitboard du joueur qui doit jouer.
+            adversaire: Le bitboard de l'adversaire.
+            vides: La liste des indices des cases vides, triée par parité.
+            alpha: La borne inférieure de la fenêtre.
+            beta: La borne supérieure de la fenêtre.
+            passe: True si l'adversaire vient de passer son tour.
+
+        Returns:
+            Le score de la position du point de vue du joueur.
+        """
+        if len(vides) == 1:
+            return self.resoudre_derniere(joueur, adversaire, vides[0])
+
+        meilleur = -65
+        for position, indice in enumerate(vides):
+            retournees = masque_retournements(indice, joueur, adversaire)
+            if not retournees:
+                continue
+            self.noeuds += 1
+            restantes = vides[:position] + vides[position + 1:]
+            score = -self.resoudre_petite(adversaire & ~retournees, joueur | retournees | (1 << indice), restantes,
+                                          -beta, -max(alpha, meilleur), False)
+            if score > meilleur:
+                meilleur = score
+                if score >= beta:
+                    return meilleur
+
+        if meilleur == -65:
+            # Aucun coup: on passe, ou la partie est terminée si l'adversaire vient aussi de passer
+            if passe:
+                return joueur.bit_count() - adversaire.bit_count()
+            return -self.resoudre_petite(adversaire, joueur, vides, -beta, -alpha, True)
+        return meilleur
+
+    def resoudre_derniere(self, joueur, adversaire, indice):
+        """
+        Résout une position où il ne reste qu'une case vide: le joueur la prend s'il le peut, sinon l'adversaire.
+
+        Args:
+            joueur: Le bitboard du joueur qui doit jouer.
+            adversaire: Le bitboard de l'adversaire.
+            indice: L'indice de la dernière case vide.
+
+        Returns:
+            Le score final du point de vue du joueur.
+        """
+        self.noeuds += 1
+        difference = joueur.bit_count() - adversaire.bit_count()
+        retournees = masque_retournements(indice, joueur, adversaire)
+        if retournees:
+            return difference + 2 * retournees.bit_count() + 1
+        retournees = masque_retournements(indice, adversaire, joueur)
+        if retournees:
+            return difference - 2 * retournees.bit_count() - 1
+        return difference
+
+
+def resoudre_planche(planche, couleur):
+    """
+    Résout la fin de partie d'une planche (Planche ou PlancheBitboard), par exemple chargée par Partie.charger.
+
+    Args:
+        planche: La planche, qui n'est pas modifiée.
+        couleur: La couleur qui doit jouer.
+
+    Returns:
+        Un tuple (score, coup, noeuds): la différence de pièces finale du point de vue de la couleur, le meilleur coup
+        sous forme de couple (ligne, colonne) ou None si la couleur doit passer, et le nombre de noeuds visités.
+    """
+    joueur, adversaire = copier_en_bitboard(planche).bitboards(couleur)
+    solveur = SolveurFinale()
+    score, indice = solveur.resoudre(joueur, adversaire)
+    return score, (divmod(indice, 8) if indice is not None else None), solveur.noeuds
@@ -0,0 +1,463 @@
+"""
+Instrumentation optionnelle des méthodes chaudes de la planche, de la partie et des joueurs: nombre d'appels, temps
+cumulé, temps interne et percentiles des durées.
+
+Rien n'est instrumenté tant qu'une Instrumentation n'est pas activée: les méthodes des classes ne sont remplacées par
+des enveloppes chronométrées qu'à l'activation, et les originales sont remises à la désactivation. Désactivée, elle
+ne coûte donc rien.
+
+Les durées de chaque méthode sont comptées dans un histogramme logarithmique (8 sous-intervalles par puissance de 2
+nanosecondes, soit une erreur relative d'au plus 6 % sur les percentiles): sa taille ne dépend pas du nombre d'appels
+et les histogrammes de plusieurs parties ou de plusieurs processus s'additionnent.
+
+Les mesures s'exportent en JSON (voir exporter et resume) et au format de cProfile (voir ecrire_pstats), lisible
+par pstats, snakeviz, etc.
+"""
+import functools
+import json
+import marshal
+import threading
+import time
+
+from othello.planche import Planche
+from othello.planche_bitboard import PlancheBitboard
+from othello.partie import Partie
+from othello.joueur import Joueur, JoueurHumain, JoueurOrdinateur, JoueurAlphaBeta, JoueurMCTS
+
+# Méthodes instrumentées par défaut: (classe, nom de la méthode). Seules les méthodes définies par la classe elle-même
+# sont remplacées; les sous-classes qui en héritent passent par l'enveloppe de leur parent.
+CIBLES = (
+    (Planche, "obtenir_positions_mangees"),
+    (Planche, "lister_coups_possibles_de_couleur"),
+    (Planche, "jouer_coup"),
+    (PlancheBitboard, "obtenir_positions_mangees"),
+    (PlancheBitboard, "lister_coups_possibles_de_couleur"),
+    (PlancheBitboard, "jouer_coup"),
+    (Partie, "tour"),
+    (Joueur, "choisir_coup"),
+    (JoueurHumain, "choisir_coup"),
+    (JoueurOrdinateur, "choisir_coup"),
+    (JoueurAlphaBeta, "choisir_coup"),
+    (JoueurMCTS, "choisir_coup"),
+)
+
+# Nombre de sous-intervalles de l'histogramme par puissance de 2 (doit être une puissance de 2).
+SOUS_INTERVALLES = 8
+_BITS_SOUS_INTERVALLES = SOUS_INTERVALLES.bit_length() - 1
+
+# Percentiles calculés par resume().
+PERCENTILES = (50, 90, 99)
+
+# L'instrumentation actuellement active: une seule à la fois, puisqu'elle remplace des méthodes de classes.
+_active = None
+
+
+def intervalle_de_duree(duree):
+    """
+    Trouve l'intervalle de l'histogramme d'une durée.
+
+    Args:
+        duree: La durée, en nanosecondes.
+
+    Returns:
+        L'indice de l'intervalle.
+    """
+    bits = duree.bit_length()
+    if bits <= _BITS_SOUS_INTERVALLES:
+        return duree
+    return (bits - _BITS_SOUS_INTERVALLES) * SOUS_INTERVALLES + ((duree >> (bits - 1 - _BITS_SOUS_INTERVALLES))
+                                                                 & (SOUS_INTERVALLES - 1))
+
+
+def bornes_intervalle(intervalle):
+    """
+    Inverse de intervalle_de_duree().
+
+    Args:
+        intervalle: L'indice de l'intervalle.
+
+    Returns:
+        Un couple (durée minimale, durée maximale exclue) des durées de l'intervalle, en nanosecondes.
+    """
+    if intervalle < SOUS_INTERVALLES:
+        return intervalle, intervalle + 1
+    puissance, sous_intervalle = divmod(intervalle, SOUS_INTERVALLES)
+    largeur = 1 << (puissance - 1)
+    debut = (SOUS_INTERVALLES + sous_intervalle) * largeur
+    return debut, debut + largeur
+
+
+def nom_de_cible(classe, nom_methode):
+    """
+    Retourne le nom sous lequel une méthode instrumentée est mesurée, par exemple "PlancheBitboard.jouer_coup".
+    """
+    return "{}.{}".format(classe.__name__, nom_methode)
+
+
+class MesureFonction:
+    """
+    Les mesures d'une méthode instrumentée.
+    """
+    __slots__ = ("nom", "fichier", "ligne", "appels", "appels_primitifs", "cumul", "interne", "maximum",
+                 "histogramme", "appelants", "en_cours")
+
+    def __init__(self, nom, fichier="~", ligne=0):
+        """
+        Initialise des mesures vides.
+
+        Args:
+            nom: Le nom de la méthode (voir nom_de_cible).
+            fichier: Le fichier où la méthode est définie.
+            ligne: La ligne où la méthode est définie.
+        """
+        self.nom = nom
+        self.fichier = fichier
+        self.ligne = ligne
+        self.appels = 0
+
+        # Appels qui ne sont pas récursifs: seuls ceux-ci comptent dans le temps cumulé, comme dans cProfile
+        self.appels_primitifs = 0
+
+        # Temps en nanosecondes: cumulé (sous-appels compris), interne (sans les sous-appels instrumentés) et maximal
+        self.cumul = 0
+        self.interne = 0
+        self.maximum = 0
+
+        # Indice de l'intervalle -> nombre d'appels
+        self.histogramme = {}
+
+        # Nom de l'appelant instrumenté -> [appels, appels primitifs, temps interne, temps cumulé]
+        self.appelants = {}
+
+        # Nombre d'appels en cours (plus d'un lors d'un appel récursif)
+        self.en_cours = 0
+
+    def ajouter(self, duree, interne, appelant, primitif):
+        """
+        Compte un appel.
+
+        Args:
+            duree: La durée de l'appel, sous-appels compris, en nanosecondes.
+            interne: La durée de l'appel sans les sous-appels instrumentés.
+            appelant: Le nom de la méthode instrumentée qui a fait l'appel (None pour aucune).
+            primitif: False si l'appel est récursif.
+        """
+        self.appels += 1
+        self.interne += interne
+        if primitif:
+            self.appels_primitifs += 1
+            self.cumul += duree
+        if duree > self.maximum:
+            self.maximum = duree
+        intervalle = intervalle_de_duree(duree)
+        self.histogramme[intervalle] = self.histogramme.get(intervalle, 0) + 1
+
+        if appelant is not None:
+            compteurs = self.appelants.get(appelant)
+            if compteurs is None:
+                compteurs = self.appelants[appelant] = [0, 0, 0, 0]
+            compteurs[0] += 1
+            compteurs[2] += interne
+            if primitif:
+                compteurs[1] += 1
+                compteurs[3] += duree
+
+    def percentile(self, rang):
+        """
+        Estime un percentile des durées des appels à partir de l'histogramme.
+
+        Args:
+            rang: Le percentile, de 0 à 100.
+
+        Returns:
+            La durée, en nanosecondes (le milieu de l'intervalle qui contient le percentile).
+        """
+        if self.appels == 0:
+            return 0
+        seuil = rang / 100 * self.appels
+        compte = 0
+        for intervalle in sorted(self.histogramme):
+            compte += self.histogramme[intervalle]
+            if compte >= seuil:
+                debut, fin = bornes_intervalle(intervalle)
+                return min((debut + fin - 1) // 2, self.maximum)
+        return self.maximum
+
+    def fusionner(self, donnees):
+        """
+        Ajoute des mesures exportées par exporter(), par exemple celles d'une autre partie ou d'un autre processus.
+
+        Args:
+            donnees: Le dictionnaire des mesures.
+        """
+        self.appels += donnees["appels"]
+        self.appels_primitifs += donnees["appels_primitifs"]
+        self.cumul += donnees["cumul_ns"]
+        self.interne += donnees["interne_ns"]
+        self.maximum = max(self.maximum, donnees["maximum_ns"])
+        for intervalle, nombre in donnees["histogramme"].items():
+            intervalle = int(intervalle)
+            self.histogramme[intervalle] = self.histogramme.get(intervalle, 0) + nombre
+        for appelant, compteurs in donnees["appelants"].items():
+            totaux = self.appelants.setdefault(appelant, [0, 0, 0, 0])
+            for position, valeur in enumerate(compteurs):
+                totaux[position] += valeur
+
+    def exporter(self):
+        """
+        Exporte les mesures brutes, en types JSON.
+
+        Returns:
+            Un dictionnaire (voir fusionner).
+        """
+        return {
+            "fichier": self.fichier,
+            "ligne": self.ligne,
+            "appels": self.appels,
+            "appels_primitifs": self.appels_primitifs,
+            "cumul_ns": self.cumul,
+            "interne_ns": self.interne,
+            "maximum_ns": self.maximum,
+            "histogramme": {str(intervalle): nombre for intervalle, nombre in self.histogramme.items()},
+            "appelants": {appelant: list(compteurs) for appelant, compteurs in self.appelants.items()},
+        }
+
+    def resume(self):
+        """
+        Résume les mesures, en secondes.
+
+        Returns:
+            Un dictionnaire contenant le nombre d'appels, les temps cumulé et interne, le temps moyen par appel, les
+            percentiles (voir PERCENTILES) et le temps maximal.
+        """
+        resume = {
+            "appels": self.appels,
+            "cumul": self.cumul / 1e9,
+            "interne": self.interne / 1e9,
+            "moyenne": self.cumul / self.appels_primitifs / 1e9 if self.appels_primitifs else 0.0,
+        }
+        for rang in PERCENTILES:
+            resume["p{}".format(rang)] = self.percentile(rang) / 1e9
+        resume["maximum"] = self.maximum / 1e9
+        return resume
+
+
+class Instrumentation:
+    """
+    Mesure les appels des méthodes instrumentées pendant qu'elle est active. S'utilise avec with:
+
+        with Instrumentation() as instrumentation:
+            partie.jouer()
+        instrumentation.ecrire_json("mesures.json")
+    """
+
+    def __init__(self, cibles=CIBLES):
+        """
+        Initialise une instrumentation inactive et sans mesures.
+
+        Args:
+            cibles: Les méthodes à instrumenter, des couples (classe, nom de la méthode).
+        """
+        self.cibles = cibles
+        self.mesures = {}
+
+        # (classe, nom de la méthode, méthode originale) de chaque méthode remplacée
+        self.originales = []
+
+        # Pile des appels instrumentés en cours de chaque fil d'exécution: des listes [mesure, temps des sous-appels]
+        self.local = threading.local()
+
+    @property
+    def active(self):
+        return _active is self
+
+    def activer(self):
+        """
+        Remplace les méthodes des cibles par des enveloppes chronométrées.
+
+        Raises:
+            RuntimeError: Si une autre instrumentation est déjà active.
+        """
+        global _active
+        if _active is self:
+            return
+        if _active is not None:
+            raise RuntimeError("Instrumentation: une autre instrumentation est déjà active.")
+        for classe, nom_methode in self.cibles:
+            methode = classe.__dict__.get(nom_methode)
+            if methode is None:
+                continue
+            self.originales.append((classe, nom_methode, methode))
+            setattr(classe, nom_methode, self.envelopper(methode, self.mesure(nom_de_cible(classe, nom_methode),
+                                                                              methode)))
+        _active = self
+
+    def desactiver(self):
+        """
+        Remet les méthodes originales. Les mesures sont gardées.
+        """
+        global _active
+        if _active is not self:
+            return
+        for classe, nom_methode, methode in reversed(self.originales):
+            setattr(classe, nom_methode, methode)
+        self.originales = []
+        _active = None
+
+    def __enter__(self):
+        self.activer()
+        return self
+
+    def __exit__(self, *exception):
+        self.desactiver()
+
+    def mesure(self, nom, methode=None):
+        """
+        Retourne les mesures d'une méthode, créées au besoin.
+
+        Args:
+            nom: Le nom de la méthode (voir nom_de_cible).
+            methode: La méthode, pour retrouver son fichier et sa ligne.
+
+        Returns:
+            La MesureFonction.
+        """
+        mesure = self.mesures.get(nom)
+        if mesure is None:
+            code = getattr(methode, "__code__", None)
+            if code is not None:
+                mesure = MesureFonction(nom, code.co_filename, code.co_firstlineno)
+            else:
+                mesure = MesureFonction(nom)
+            self.mesures[nom] = mesure
+        return mesure
+
+    def envelopper(self, methode, mesure):
+        """
+        Crée l'enveloppe chronométrée d'une méthode.
+
+        Args:
+            methode: La méthode originale.
+            mesure: La MesureFonction où compter ses appels.
+
+        Returns:
+            L'enveloppe, qui appelle la méthode originale.
+        """
+        local = self.local
+
+        @functools.wraps(methode)
+        def enveloppe(*args, **kwargs):
+            pile = getattr(local, "pile", None)
+            if pile is None:
+                pile = local.pile = []
+            appelant = pile[-1][0].nom if pile else None
+            cadre = [mesure, 0]
+            pile.append(cadre)
+            mesure.en_cours += 1
+            debut = time.perf_counter_ns()
+            try:
+                return methode(*args, **kwargs)
+            finally:
+                duree = time.perf_counter_ns() - debut
+                mesure.en_cours -= 1
+                pile.pop()
+                if pile:
+                    pile[-1][1] += duree
+                mesure.ajouter(duree, duree - cadre[1], appelant, mesure.en_cours == 0)
+
+        return enveloppe
+
+    def reinitialiser(self):
+        """
+        Efface les mesures, par exemple entre deux parties.
+        """
+        for mesure in self.mesures.values():
+            mesure.__init__(mesure.nom, mesure.fichier, mesure.ligne)
+
+    def exporter(self):
+        """
+        Exporte les mesures brutes de toutes les méthodes, en types JSON (par exemple pour les envoyer d'un processus
+        à un autre, voir fusionner).
+
+        Returns:
+            Un dictionnaire: nom de la méthode -> mesures (voir MesureFonction.exporter).
+        """
+        return {nom: mesure.exporter() for nom, mesure in self.mesures.items() if mesure.appels}
+
+    def fusionner(self, donnees):
+        """
+        Ajoute des mesures exportées par exporter().
+
+        Args:
+            donnees: Le dictionnaire des mesures.
+        """
+        for nom, donnees_mesure in donnees.items():
+            mesure = self.mesures.get(nom)
+            if mesure is None:
+                mesure = self.mesures[nom] = MesureFonction(nom, donnees_mesure["fichier"], donnees_mesure["ligne"])
+            mesure.fusionner(donnees_mesure)
+
+    def resume(self):
+        """
+        Résume les mesures de chaque méthode (voir MesureFonction.resume), par temps cumulé décroissant.
+
+        Returns:
+            Un dictionnaire: nom de la méthode -> résumé.
+        """
+        mesures = sorted((mesure for mesure in self.mesures.values() if mesure.appels),
+                         key=lambda mesure: mesure.cumul, reverse=True)
+        return {mesure.nom: mesure.resume() for mesure in mesures}
+
+    def ecrire_json(self, nom_fichier, brutes=False):
+        """
+        Écrit les mesures dans un fichier JSON.
+
+        Args:
+            nom_fichier: Le nom du fichier.
+            brutes: True pour écrire les mesures brutes (exporter), qui peuvent être fusionnées plus tard, plutôt que
+                le résumé.
+        """
+        with open(nom_fichier, "w") as fichier:
+            json.dump(self.exporter() if brutes else self.resume(), fichier, indent=2)
+
+    def statistiques_pstats(self):
+        """
+        Convertit les mesures au format des statistiques de cProfile (voir pstats.Stats).
+
+        Returns:
+            Un dictionnaire: (fichier, ligne, nom) -> (appels primitifs, appels, temps interne, temps cumulé,
+            appelants), les temps en secondes.
+        """
+        cles = {nom: (mesure.fichier, mesure.ligne, nom) for nom, mesure in self.mesures.items()}
+        statistiques = {}
+        for nom, mesure in self.mesures.items():
+            if not mesure.appels:
+                continue
+            appelants = {cles[appelant]: (nombre, primitifs, interne / 1e9, cumul / 1e9)
+                         for appelant, (nombre, primitifs, interne, cumul) in mesure.appelants.items()
+                         if appelant in cles}
+            statistiques[cles[nom]] = (mesure.appels_primitifs, mesure.appels, mesure.interne / 1e9,
+                                       mesure.cumul / 1e9, appelants)
+        return statistiques
+
+    def ecrire_pstats(self, nom_fichier):
+        """
+        Écrit les mesures au format des fichiers de cProfile, lisible par pstats.Stats(nom_fichier).
+
+        Args:
+            nom_fichier: Le nom du fichier.
+        """
+        with open(nom_fichier, "wb") as fichier:
+            marshal.dump(self.statistiques_pstats(), fichier)
+
+    def __repr__(self):
+        """
+        Affiche le résumé sous forme de tableau, une méthode par ligne.
+        """
+        lignes = ["{:<45} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+            "méthode", "appels", "cumul (s)", "interne", "p50 (µs)", "p90", "p99")]
+        for nom, resume in self.resume().items():
+            lignes.append("{:<45} {:>10} {:>10.3f} {:>10.3f} {:>10.1f} {:>10.1f} {:>10.1f}".format(
+                nom, resume["appels"], resume["cumul"], resume["interne"], resume["p50"] * 1e6, resume["p90"] * 1e6,
+                resume["p99"] * 1e6))
+        return "\n".join(lignes)
@@ -1,4 +1,15 @@
 import random
+import threading
+import time
+
+from othello.recherche import RechercheAlphaBeta, BudgetEpuise, copier_en_bitboard
+from othello.recherche_parallele import RechercheParallele
+from othello.mcts import RechercheMCTS
+from othello.finale import SolveurFinale, SEUIL_FINALE
+from othello.evaluation import bitboards_de_planche
+
+# Valeur retournée par JoueurHumain.choisir_coup lorsque l'usager demande d'annuler son dernier coup.
+ANNULER = "annuler"
 
 class Joueur:
     """
@@ -16,6 +27,9 @@ class Joueur:
 
         self.couleur = couleur
 
+        # Si False, le joueur n'affiche rien en console (parties sans console, voir Partie).
+        self.verbeux = True
+
     def obtenir_type_joueur(self):
         '''
         Cette méthode sera utilisée par les sous-classes JoueurHumain et JoueurOrdinateur.
@@ -37,6 +51,29 @@ class Joueur:
         '''
         pass
 
+    def commencer_reflexion(self, planche, couleur_adverse):
+        """
+        Appelée lorsque l'adversaire humain commence à choisir son coup: un joueur ordinateur peut en profiter pour
+        chercher ses réponses pendant ce temps (voir JoueurAlphaBeta). Par défaut, ne fait rien.
+
+        Args:
+            planche: La planche actuelle, qui ne doit pas être modifiée.
+            couleur_adverse: La couleur de l'adversaire qui doit jouer.
+        """
+        pass
+
+    def arreter_reflexion(self):
+        """
+        Arrête la réflexion commencée par commencer_reflexion(), s'il y en a une. Par défaut, ne fait rien.
+        """
+        pass
+
+    def fermer(self):
+        """
+        Libère les ressources du joueur (processus, mémoire partagée) à la fin de la partie. Par défaut, ne fait rien.
+        """
+        pass
+
 
 class JoueurHumain(Joueur):
     """
@@ -59,16 +96,21 @@ class JoueurHumain(Joueur):
         Nous vous avons déjà fourni une portion de code permettant d'attrapper au passage les erreurs qui peuvent
         survenir lorsque l'utilisateur entre autre chose qu'un nombre entier.
 
+        L'usager peut aussi entrer "a" à la place de la ligne pour annuler son dernier coup.
+
         Args:
             coups_possibles: La liste des coups possibles
 
         Returns:
-            un couple (ligne, colonne) représentant la position du coup désiré.
+            un couple (ligne, colonne) représentant la position du coup désiré, ou ANNULER.
         """
         try:
             # On demande a l'utilisateur la position du coup qu'il souhaite jouer
-            print("Quel coup voulez vous jouer ? : \n")
-            x = int(input("x : "))
+            print("Quel coup voulez vous jouer ? ('a' pour annuler votre dernier coup) : \n")
+            reponse = input("x : ")
+            if reponse.strip().lower() in ["a", "annuler"]:
+                return ANNULER
+            x = int(reponse)
             y = int(input("y : "))
 
         except ValueError:
@@ -86,18 +128,86 @@ class JoueurOrdinateur(Joueur):
     """
     Classe modélisant un joueur Ordinateur.
     """
-    def __init__(self, couleur):
+    def __init__(self, couleur, generateur=None):
         """
         Cette méthode va construire un objet Joueur et l'initialiser avec la bonne couleur.
+
+        Args:
+            couleur: La couleur qui sera jouée par le joueur.
+            generateur: Le générateur aléatoire à utiliser (un random.Random, pour des parties reproductibles), ou
+                None pour le module random.
         """
         super().__init__(couleur)
+        self.generateur = generateur if generateur is not None else random
+
+        # Bibliothèque d'ouvertures consultée avant de chercher (voir BibliothequeOuvertures), ou None.
+        self.bibliotheque = None
+
+        # Nombre de cases vides à partir duquel la fin de partie est résolue exactement (None pour jamais).
+        self.seuil_finale = None
 
     def obtenir_type_joueur(self):
         return "Ordinateur"
 
+    def coup_de_bibliotheque(self, planche):
+        """
+        Cherche la position courante dans la bibliothèque d'ouvertures du joueur.
 
+        Args:
+            planche : La planche actuelle
 
-    def choisir_coup(self, coups_possibles):
+        Returns:
+            un couple (ligne, colonne) représentant le coup de la bibliothèque, ou None si le joueur n'a pas de
+            bibliothèque ou si la position n'y est pas.
+        """
+        if self.bibliotheque is None or planche is None:
+            return None
+        joueur, adversaire = copier_en_bitboard(planche).bitboards(self.couleur)
+        indice = self.bibliotheque.choisir_coup(joueur, adversaire)
+        if indice is None:
+            return None
+
+        coup = divmod(indice, 8)
+        if self.verbeux:
+            print("{} ({}) joue {} (bibliothèque d'ouvertures)".format(self.obtenir_type_joueur(), self.couleur, coup))
+        return coup
+
+    def coup_de_finale(self, planche, temps=None, noeuds=None, arret=None):
+        """
+        Résout exactement la fin de partie (voir SolveurFinale) s'il reste au plus seuil_finale cases vides, dans le
+        budget du coup.
+
+        Args:
+            planche : La planche actuelle
+            temps: Le temps maximal de la résolution, en secondes (None pour aucune limite).
+            noeuds: Le nombre maximal de noeuds de la résolution (None pour aucune limite).
+            arret: Le signal d'arrêt de la recherche du joueur, ou None.
+
+        Returns:
+            un couple (ligne, colonne) représentant le coup parfait, ou None s'il reste trop de cases vides ou si la
+            résolution n'a pas abouti dans le budget.
+        """
+        if self.seuil_finale is None or planche is None or planche.nb_vides > self.seuil_finale:
+            return None
+        joueur, adversaire = copier_en_bitboard(planche).bitboards(self.couleur)
+        solveur = SolveurFinale(temps, noeuds, arret)
+        try:
+            score, indice = solveur.resoudre(joueur, adversaire)
+        except BudgetEpuise:
+            if self.verbeux:
+                print("{} ({}): fin de partie non résolue dans le budget ({} noeuds), recherche normale".format(
+                    self.obtenir_type_joueur(), self.couleur, solveur.noeuds))
+            return None
+        if indice is None:
+            return None
+
+        coup = divmod(indice, 8)
+        if self.verbeux:
+            print("{} ({}) joue {}: fin de partie résolue, score final {:+d} ({} noeuds)".format(
+                self.obtenir_type_joueur(), self.couleur, coup, score, solveur.noeuds))
+        return coup
+
+    def choisir_coup(self, coups_possibles, planche=None):
         """
         Pour votre joueur ordinateur, vous n'avez qu'à sélectionner un coup au hasard parmi la liste des coups
         possibles. Affichez ensuite en console les numéros de ligne et de colonne.
@@ -114,4 +224,257 @@ class JoueurOrdinateur(Joueur):
         """
 
 
-        return random.choice(coups_possibles)
+        return self.generateur.choice(coups_possibles)
+
+
+class JoueurAlphaBeta(JoueurOrdinateur):
+    """
+    Classe modélisant un joueur Ordinateur qui choisit son coup par une recherche alpha-bêta sur la planche (voir
+    RechercheAlphaBeta).
+    """
+    def __init__(self, couleur, profondeur=4, temps=None, noeuds=None, memoire_mo=16, seuil_finale=SEUIL_FINALE,
+                 evaluation=None, reflexion=True, processus=1):
+        """
+        Cette méthode va construire un objet Joueur et l'initialiser avec la bonne couleur et son budget de recherche.
+
+        Args:
+            couleur: La couleur qui sera jouée par le joueur.
+            profondeur: La profondeur maximale de recherche, en demi-coups.
+            temps: Le temps maximal de réflexion par coup, en secondes (None pour aucune limite).
+            noeuds: Le nombre maximal de noeuds visités par coup (None pour aucune limite).
+            memoire_mo: La taille de la table de transposition, en mégaoctets.
+            seuil_finale: Le nombre de cases vides à partir duquel la fin de partie est résolue exactement plutôt que
+                cherchée (None pour jamais).
+            evaluation: L'évaluation par motifs de la recherche (voir evaluation.EvaluationMotifs), ou None pour
+                l'évaluation positionnelle.
+            reflexion: True pour chercher pendant que l'adversaire humain choisit son coup (voir
+                commencer_reflexion).
+            processus: Le nombre de processus de la recherche: au-delà de 1, des processus auxiliaires partagent
+                sa table de transposition (voir RechercheParallele).
+        """
+        super().__init__(couleur)
+        if processus > 1:
+            self.recherche = RechercheParallele(profondeur, temps, noeuds, taille_table_mo=memoire_mo,
+                                                evaluation=evaluation, processus=processus)
+        else:
+            self.recherche = RechercheAlphaBeta(profondeur, temps, noeuds, taille_table_mo=memoire_mo,
+                                                evaluation=evaluation)
+        self.seuil_finale = seuil_finale
+
+        self.reflexion = reflexion
+        self.fil_reflexion = None
+
+        # Réponses trouvées pendant la réflexion: (bitboard noir, bitboard blanc) de la position après le coup de
+        # l'adversaire -> (coup, profondeur atteinte)
+        self.reponses = {}
+
+    def obtenir_type_joueur(self):
+        return "AlphaBeta"
+
+    def choisir_coup(self, coups_possibles, planche=None):
+        """
+        Joue le coup de la bibliothèque d'ouvertures si la position y est, ou le coup parfait s'il reste peu de cases
+        vides. Sinon, cherche le meilleur coup sur la planche et affiche les statistiques de la recherche, dont le
+        débit en noeuds par seconde. Sans planche, on se rabat sur un coup au hasard.
+
+        Args:
+            coups_possibles: La liste des coups possibles
+            planche : La planche actuelle
+
+        Returns:
+            un couple (ligne, colonne) représentant la position du coup désiré.
+        """
+        self.arreter_reflexion()
+        if planche is None:
+            return super().choisir_coup(coups_possibles)
+
+        debut = time.perf_counter()
+        coup = self.coup_de_bibliotheque(planche) or self.coup_de_finale(planche, self.recherche.temps_max,
+                                                                         self.recherche.noeuds_max,
+                                                                         self.recherche.arret)
+        if coup is not None:
+            return coup
+
+        # Une réponse cherchée assez profondément pendant la réflexion est jouée sans chercher de nouveau
+        reponse = self.reponses.get(bitboards_de_planche(planche))
+        if reponse is not None and reponse[1] >= self.recherche.profondeur_max:
+            if self.verbeux:
+                print("AlphaBeta ({}) joue {}: profondeur {}, trouvé pendant la réflexion".format(
+                    self.couleur, reponse[0], reponse[1]))
+            return reponse[0]
+
+        # Le temps passé à tenter de résoudre la fin de partie est déduit de celui de la recherche
+        temps_max = self.recherche.temps_max
+        if temps_max is not None:
+            self.recherche.temps_max = max(0.0, temps_max - (time.perf_counter() - debut))
+        try:
+            coup = self.recherche.chercher(planche, self.couleur)
+        finally:
+            self.recherche.temps_max = temps_max
+        if coup is None:
+            return super().choisir_coup(coups_possibles)
+
+        statistiques = self.recherche.statistiques()
+        if self.verbeux:
+            print("AlphaBeta ({}) joue {}: profondeur {}, {} noeuds en {:.2f} s ({:.0f} noeuds/s)".format(
+                self.couleur, coup, statistiques["profondeur"], statistiques["noeuds"], statistiques["duree"],
+                statistiques["noeuds_par_seconde"]))
+        return coup
+
+    def commencer_reflexion(self, planche, couleur_adverse):
+        """
+        Commence à chercher, dans un fil d'exécution en arrière-plan, les réponses aux coups possibles de
+        l'adversaire humain (voir reflechir). La recherche garde sa table de transposition: même une réponse qui n'a
+        pas été cherchée jusqu'au bout est ensuite retrouvée plus vite.
+
+        Args:
+            planche: La planche actuelle, qui n'est pas modifiée (la réflexion travaille sur une copie).
+            couleur_adverse: La couleur de l'adversaire qui doit jouer.
+        """
+        if not self.reflexion:
+            return
+        self.arreter_reflexion()
+        self.reponses = {}
+        self.fil_reflexion = threading.Thread(target=self.reflechir, args=(copier_en_bitboard(planche),
+                                                                           couleur_adverse), daemon=True)
+        self.fil_reflexion.start()
+
+    def arreter_reflexion(self):
+        """
+        Arrête la réflexion en cours et attend la fin de son fil d'exécution. Les réponses trouvées sont gardées.
+        """
+        if self.fil_reflexion is None:
+            return
+        self.recherche.arret.set()
+        self.fil_reflexion.join()
+        self.fil_reflexion = None
+        self.recherche.arret.clear()
+
+    def fermer(self):
+        """
+        Arrête la réflexion et termine les processus auxiliaires de la recherche, s'il y en a.
+        """
+        self.arreter_reflexion()
+        if isinstance(self.recherche, RechercheParallele):
+            self.recherche.fermer()
+
+    def reflechir(self, planche, couleur_adverse):
+        """
+        Cherche les réponses aux coups possibles de l'adversaire jusqu'à ce que la réflexion soit arrêtée: d'abord
+        la réponse au coup que la dernière recherche a prévu pour l'adversaire, jusqu'à la profondeur maximale, puis
+        les réponses aux autres coups, une profondeur à la fois pour toutes. La réflexion n'a pas de limite de temps.
+
+        Args:
+            planche: La copie de la planche (PlancheBitboard), que la réflexion peut modifier.
+            couleur_adverse: La couleur de l'adversaire qui doit jouer.
+        """
+        recherche = self.recherche
+        profondeur_max, temps_max = recherche.profondeur_max, recherche.temps_max
+        recherche.temps_max = None
+        try:
+            coups = planche.lister_coups_possibles_de_couleur(couleur_adverse)
+            prevu = recherche.coup_prevu(planche, couleur_adverse)
+            if prevu in coups:
+                coups.remove(prevu)
+                self.reflechir_a(planche, couleur_adverse, prevu, profondeur_max)
+            for profondeur in range(1, profondeur_max + 1):
+                for coup in coups:
+                    if recherche.arret.is_set():
+                        return
+                    self.reflechir_a(planche, couleur_adverse, coup, profondeur)
+        finally:
+            recherche.profondeur_max, recherche.temps_max = profondeur_max, temps_max
+
+    def reflechir_a(self, planche, couleur_adverse, coup_adverse, profondeur):
+        """
+        Cherche la réponse à un coup de l'adversaire et la garde dans self.reponses.
+
+        Args:
+            planche: La copie de la planche de la réflexion.
+            couleur_adverse: La couleur de l'adversaire.
+            coup_adverse: Le coup de l'adversaire.
+            profondeur: La profondeur maximale de la recherche.
+        """
+        recherche = self.recherche
+        planche.faire_coup(coup_adverse, couleur_adverse)
+        cle = (planche.noir, planche.blanc)
+        recherche.profondeur_max = profondeur
+        coup = recherche.chercher(planche, self.couleur)
+        # Une recherche interrompue garde le coup de sa dernière itération complète. Avec au plus un coup possible,
+        # elle n'itère pas (profondeur atteinte nulle): choisir_coup trouvera de toute façon le coup immédiatement.
+        if recherche.profondeur_atteinte > self.reponses.get(cle, (None, 0))[1]:
+            self.reponses[cle] = (coup, recherche.profondeur_atteinte)
+        planche.annuler_coup()
+
+
+class JoueurMCTS(JoueurOrdinateur):
+    """
+    Classe modélisant un joueur Ordinateur qui choisit son coup par une recherche arborescente Monte-Carlo (voir
+    RechercheMCTS). Les parties aléatoires de la recherche jouent comme JoueurOrdinateur.
+    """
+    def __init__(self, couleur, playouts=1000, temps=None, processus=1, graine=None, seuil_finale=SEUIL_FINALE):
+        """
+        Cette méthode va construire un objet Joueur et l'initialiser avec la bonne couleur et son budget de recherche.
+
+        Args:
+            couleur: La couleur qui sera jouée par le joueur.
+            playouts: Le nombre de playouts par processus et par coup (None pour aucune limite).
+            temps: Le temps maximal de réflexion par coup, en secondes (None pour aucune limite).
+            processus: Le nombre de processus, chacun construisant son propre arbre.
+            graine: La graine des générateurs aléatoires de la recherche (None pour une graine au hasard).
+            seuil_finale: Le nombre de cases vides à partir duquel la fin de partie est résolue exactement plutôt que
+                cherchée (None pour jamais).
+        """
+        super().__init__(couleur)
+        self.recherche = RechercheMCTS(playouts, temps, processus, graine)
+        self.seuil_finale = seuil_finale
+
+    def obtenir_type_joueur(self):
+        return "MCTS"
+
+    def choisir_coup(self, coups_possibles, planche=None):
+        """
+        Joue le coup de la bibliothèque d'ouvertures si la position y est, ou le coup parfait s'il reste peu de cases
+        vides. Sinon, cherche le meilleur coup sur la planche et affiche les statistiques de la recherche, dont le
+        débit en playouts par seconde de chaque processus. Sans planche, on se rabat sur un coup au hasard.
+
+        Args:
+            coups_possibles: La liste des coups possibles
+            planche : La planche actuelle
+
+        Returns:
+            un couple (ligne, colonne) représentant la position du coup désiré.
+        """
+        if planche is None:
+            return super().choisir_coup(coups_possibles)
+
+        debut = time.perf_counter()
+        coup = self.coup_de_bibliotheque(planche) or self.coup_de_finale(planche, self.recherche.temps)
+        if coup is not None:
+            return coup
+
+        # Le temps passé à tenter de résoudre la fin de partie est déduit de celui de la recherche
+        joueur, adversaire = copier_en_bitboard(planche).bitboards(self.couleur)
+        temps = self.recherche.temps
+        if temps is not None:
+            self.recherche.temps = max(0.0, temps - (time.perf_counter() - debut))
+        try:
+            indice = self.recherche.chercher(joueur, adversaire)
+        finally:
+            self.recherche.temps = temps
+        if indice is None:
+            return super().choisir_coup(coups_possibles)
+        coup = divmod(indice, 8)
+
+        statistiques = self.recherche.statistiques()
+        if self.verbeux and statistiques["playouts"]:
+            print("MCTS ({}) joue {}: {} playouts en {:.2f} s ({} playouts/s par processus)".format(
+                self.couleur, coup, statistiques["playouts"], statistiques["duree"],
+                ", ".join("{:.0f}".format(debit) for debit in statistiques["playouts_par_seconde"])))
+        return coup
+
+    def fermer(self):
+        """
+        Termine les processus de la recherche, s'il y en a.
+        """
+        self.recherche.fermer()
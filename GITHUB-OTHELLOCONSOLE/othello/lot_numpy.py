@@ -0,0 +1,241 @@
+"""
+Génération de coups et retournements pour un lot de N planches à la fois, avec NumPy.
+
+Les planches sont représentées par deux tableaux de N bitboards (numpy.uint64, même convention que
+planche_bitboard: le bit ligne * 8 + colonne), un pour le joueur qui doit jouer et un pour son adversaire. Chaque
+opération de planche_bitboard est appliquée à tout le lot par des décalages vectorisés, sans boucle Python sur les
+planches. NumPy n'est nécessaire que pour ce module.
+"""
+import numpy as np
+
+from othello.piece import NOIR, BLANC
+from othello.planche import Planche
+from othello.planche_bitboard import PlancheBitboard, PLANCHE_PLEINE, DIRECTIONS
+
+# Les directions de planche_bitboard, avec des décalages et des masques de type numpy.uint64.
+DIRECTIONS_LOT = [(np.uint64(abs(decalage)), decalage > 0, np.uint64(masque)) for decalage, masque in DIRECTIONS]
+
+_UN = np.uint64(1)
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+
+def decaler_lot(bitboards, decalage, vers_la_gauche, masque):
+    """
+    Décale toutes les pièces de chaque bitboard du lot d'une case dans une direction.
+
+    Args:
+        bitboards: Le tableau de bitboards (numpy.uint64).
+        decalage: La valeur absolue du décalage de bits de la direction.
+        vers_la_gauche: True si le décalage est positif (vers les bits de poids fort).
+        masque: Le masque de la direction, qui retire les pièces sorties de la planche.
+
+    Returns:
+        Le tableau de bitboards décalés.
+    """
+    if vers_la_gauche:
+        # Les bits qui dépassent 64 sont perdus, comme avec le "& PLANCHE_PLEINE" de planche_bitboard.decaler
+        return (bitboards << decalage) & masque
+    return (bitboards >> decalage) & masque
+
+
+def coups_possibles_lot(joueurs, adversaires):
+    """
+    Calcule les coups possibles de chaque planche du lot (voir planche_bitboard.masque_coups_possibles).
+
+    Args:
+        joueurs: Le tableau des bitboards du joueur qui doit jouer.
+        adversaires: Le tableau des bitboards de l'adversaire.
+
+    Returns:
+        Le tableau des bitboards des coups possibles.
+    """
+    vides = ~(joueurs | adversaires)
+    coups = np.zeros_like(joueurs)
+    for decalage, vers_la_gauche, masque in DIRECTIONS_LOT:
+        x = decaler_lot(joueurs, decalage, vers_la_gauche, masque) & adversaires
+        for _ in range(5):
+            x |= decaler_lot(x, decalage, vers_la_gauche, masque) & adversaires
+        coups |= decaler_lot(x, decalage, vers_la_gauche, masque) & vides
+    return coups
+
+
+def retournements_lot(indices, joueurs, adversaires):
+    """
+    Calcule les pièces retournées par un coup choisi sur chaque planche du lot (voir
+    planche_bitboard.masque_retournements).
+
+    Args:
+        indices: Le tableau des indices (ligne * 8 + colonne) des cases jouées, un par planche. Un indice négatif
+            (planche où l'on passe son tour) ne retourne rien.
+        joueurs: Le tableau des bitboards du joueur qui joue.
+        adversaires: Le tableau des bitboards de l'adversaire.
+
+    Returns:
+        Le tableau des bitboards des pièces retournées.
+    """
+    indices = np.asarray(indices)
+    departs = np.where(indices >= 0, _UN << np.clip(indices, 0, 63).astype(np.uint64), np.uint64(0))
+    retournees = np.zeros_like(joueurs)
+    for decalage, vers_la_gauche, masque in DIRECTIONS_LOT:
+        # Pièces adverses contiguës à partir de la case jouée, puis la case qui suit la dernière
+        x = decaler_lot(departs, decalage, vers_la_gauche, masque) & adversaires
+        for _ in range(5):
+            x |= decaler_lot(x, decalage, vers_la_gauche, masque) & adversaires
+        fermees = (decaler_lot(x, decalage, vers_la_gauche, masque) & joueurs) != 0
+        retournees |= np.where(fermees, x, np.uint64(0))
+    return retournees
+
+
+def jouer_lot(indices, joueurs, adversaires):
+    """
+    Joue un coup sur chaque planche du lot. Les coups doivent être possibles (ou négatifs pour passer son tour).
+
+    Args:
+        indices: Le tableau des indices des cases jouées, un par planche.
+        joueurs: Le tableau des bitboards du joueur qui joue.
+        adversaires: Le tableau des bitboards de l'adversaire.
+
+    Returns:
+        Un couple (joueurs, adversaires) des nouveaux tableaux, toujours du point de vue du joueur qui vient de jouer.
+    """
+    indices = np.asarray(indices)
+    retournees = retournements_lot(indices, joueurs, adversaires)
+    poses = np.where(indices >= 0, _UN << np.clip(indices, 0, 63).astype(np.uint64), np.uint64(0))
+    return joueurs | retournees | poses, adversaires & ~retournees
+
+
+def perft_lot(joueur, adversaire, profondeur, passe=False):
+    """
+    Perft (voir le module perft) en largeur: toutes les positions d'un niveau sont développées en un seul lot.
+
+    Args:
+        joueur: Le bitboard du joueur qui doit jouer (un entier).
+        adversaire: Le bitboard de l'adversaire.
+        profondeur: La profondeur, en demi-coups.
+        passe: True si le joueur précédent vient de passer son tour.
+
+    Returns:
+        Le nombre de feuilles.
+    """
+    joueurs = np.array([joueur], dtype=np.uint64)
+    adversaires = np.array([adversaire], dtype=np.uint64)
+    passes = np.array([passe])
+    feuilles = 0
+    for _ in range(profondeur):
+        coups = coups_possibles_lot(joueurs, adversaires)
+        sans_coup = coups == 0
+
+        # Parties terminées: ce sont des feuilles
+        feuilles += int(np.count_nonzero(sans_coup & passes))
+
+        # Tours passés: un seul enfant, où l'adversaire joue
+        a_passer = sans_coup & ~passes
+        joueurs_passe = adversaires[a_passer]
+        adversaires_passe = joueurs[a_passer]
+
+        # Coups joués: un enfant par bit de chaque masque de coups possibles
+        bits = np.unpackbits(coups.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+        planches, indices = np.nonzero(bits)
+        nouveaux_joueurs, nouveaux_adversaires = jouer_lot(indices, joueurs[planches], adversaires[planches])
+
+        joueurs = np.concatenate([nouveaux_adversaires, joueurs_passe])
+        adversaires = np.concatenate([nouveaux_joueurs, adversaires_passe])
+        passes = np.concatenate([np.zeros(len(indices), dtype=bool), np.ones(len(joueurs_passe), dtype=bool)])
+    return feuilles + len(joueurs)
+
+
+def compter_lot(bitboards):
+    """
+    Compte les bits à 1 de chaque bitboard du lot (nombre de pièces, de coups possibles...).
+
+    Args:
+        bitboards: Le tableau de bitboards.
+
+    Returns:
+        Un tableau d'entiers de même forme.
+    """
+    x = bitboards - ((bitboards >> _UN) & _M1)
+    x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+    x = (x + (x >> np.uint64(4))) & _M4
+    return ((x * _H01) >> np.uint64(56)).astype(np.int64)
+
+
+def tableaux_en_bitboards(tableaux):
+    """
+    Convertit un tableau (N, 8, 8) de codes de couleur (VIDE, NOIR, BLANC; voir piece.py) en bitboards.
+
+    Args:
+        tableaux: Le tableau de codes, de forme (N, 8, 8) ou (N, 64).
+
+    Returns:
+        Un couple (noirs, blancs) de tableaux de N bitboards.
+    """
+    tableaux = np.asarray(tableaux).reshape(-1, 64)
+    noirs = np.packbits(tableaux == NOIR, axis=1, bitorder="little").view("<u8").ravel()
+    blancs = np.packbits(tableaux == BLANC, axis=1, bitorder="little").view("<u8").ravel()
+    return noirs.astype(np.uint64), blancs.astype(np.uint64)
+
+
+def bitboards_en_tableaux(noirs, blancs):
+    """
+    Inverse de tableaux_en_bitboards().
+
+    Args:
+        noirs: Le tableau des bitboards des pièces noires.
+        blancs: Le tableau des bitboards des pièces blanches.
+
+    Returns:
+        Un tableau (N, 8, 8) de codes de couleur (numpy.uint8).
+    """
+    noirs = np.ascontiguousarray(noirs, dtype="<u8")
+    blancs = np.ascontiguousarray(blancs, dtype="<u8")
+    bits_noirs = np.unpackbits(noirs.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    bits_blancs = np.unpackbits(blancs.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    tableaux = bits_noirs * np.uint8(NOIR) + bits_blancs * np.uint8(BLANC)
+    return tableaux.reshape(-1, 8, 8)
+
+
+def planches_en_bitboards(planches):
+    """
+    Convertit une liste de planches (Planche ou PlancheBitboard) en bitboards.
+
+    Args:
+        planches: Les planches à convertir.
+
+    Returns:
+        Un couple (noirs, blancs) de tableaux de N bitboards.
+    """
+    noirs = np.empty(len(planches), dtype=np.uint64)
+    blancs = np.empty(len(planches), dtype=np.uint64)
+    for i, planche in enumerate(planches):
+        if isinstance(planche, PlancheBitboard):
+            noirs[i] = planche.noir
+            blancs[i] = planche.blanc
+        else:
+            cases = np.frombuffer(planche.cases, dtype=np.uint8)
+            noirs[i] = np.packbits(cases == NOIR, bitorder="little").view("<u8")[0]
+            blancs[i] = np.packbits(cases == BLANC, bitorder="little").view("<u8")[0]
+    return noirs, blancs
+
+
+def bitboards_en_planches(noirs, blancs, type_planche=Planche):
+    """
+    Construit une planche pour chaque position du lot.
+
+    Args:
+        noirs: Le tableau des bitboards des pièces noires.
+        blancs: Le tableau des bitboards des pièces blanches.
+        type_planche: La classe des planches à construire, Planche ou PlancheBitboard.
+
+    Returns:
+        La liste des planches, prêtes à être jouées (compteurs, hachage et coups possibles à jour).
+    """
+    planches = []
+    for noir, blanc in zip(noirs.tolist(), blancs.tolist()):
+        planche = type_planche()
+        planche.charger_bitboards(noir & PLANCHE_PLEINE, blanc & PLANCHE_PLEINE)
+        planches.append(planche)
+    return planches
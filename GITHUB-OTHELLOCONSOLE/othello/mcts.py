@@ -0,0 +1,270 @@
+"""
+Recherche arborescente Monte-Carlo (MCTS) avec sélection UCT et parallélisme à la racine.
+
+Les positions sont représentées du point de vue du joueur qui doit jouer, par un couple de bitboards (joueur,
+adversaire), ce qui rend les parties aléatoires rapides. Chaque processus construit son propre arbre; on additionne
+ensuite le nombre de visites de chaque coup à la racine.
+"""
+import math
+import multiprocessing
+import random
+import time
+
+from othello.planche_bitboard import masque_coups_possibles, masque_retournements, indices_du_masque
+
+# Constante d'exploration de la formule UCT.
+EXPLORATION = 1.4
+
+# Valeur du coup "passer son tour" dans l'arbre.
+PASSE = -1
+
+
+def jouer_bitboards(indice, joueur, adversaire):
+    """
+    Joue un coup et retourne la nouvelle position, du point de vue du prochain joueur.
+
+    Args:
+        indice: L'indice de la case jouée, ou PASSE.
+        joueur: Le bitboard du joueur qui joue.
+        adversaire: Le bitboard de l'adversaire.
+
+    Returns:
+        Le couple (adversaire, joueur) après le coup: c'est à l'adversaire de jouer.
+    """
+    if indice == PASSE:
+        return adversaire, joueur
+    retournees = masque_retournements(indice, joueur, adversaire)
+    return adversaire & ~retournees, joueur | retournees | (1 << indice)
+
+
+def partie_aleatoire(joueur, adversaire, generateur):
+    """
+    Termine la partie en jouant des coups au hasard (comme JoueurOrdinateur) pour les deux joueurs.
+
+    Args:
+        joueur: Le bitboard du joueur qui doit jouer.
+        adversaire: Le bitboard de l'adversaire.
+        generateur: Le générateur aléatoire.
+
+    Returns:
+        Le résultat pour le joueur qui devait jouer: 1 pour une victoire, 0.5 pour une nulle et 0 pour une défaite.
+    """
+    signe = 1
+    passe = False
+    while True:
+        coups = masque_coups_possibles(joueur, adversaire)
+        if coups:
+            passe = False
+            indice = generateur.choice(list(indices_du_masque(coups)))
+            joueur, adversaire = jouer_bitboards(indice, joueur, adversaire)
+        elif passe:
+            break
+        else:
+            passe = True
+            joueur, adversaire = adversaire, joueur
+        signe = -signe
+
+    # "joueur" est maintenant le joueur au trait à la fin; signe indique s'il s'agit du joueur de départ
+    difference = (joueur.bit_count() - adversaire.bit_count()) * signe
+    if difference > 0:
+        return 1.0
+    if difference < 0:
+        return 0.0
+    return 0.5
+
+
+class NoeudMCTS:
+    """
+    Un noeud de l'arbre: une position et les statistiques des parties qui y sont passées.
+
+    Le total des gains est compté du point de vue du joueur qui a joué le coup menant à ce noeud, ce qui permet au
+    parent de choisir directement l'enfant dont le taux de gain est le plus élevé.
+    """
+    __slots__ = ("joueur", "adversaire", "coup", "parent", "enfants", "coups_a_essayer", "visites", "gains")
+
+    def __init__(self, joueur, adversaire, coup=None, parent=None):
+        """
+        Crée un noeud.
+
+        Args:
+            joueur: Le bitboard du joueur qui doit jouer dans cette position.
+            adversaire: Le bitboard de l'adversaire.
+            coup: Le coup qui a mené à ce noeud (None pour la racine).
+            parent: Le noeud parent (None pour la racine).
+        """
+        self.joueur = joueur
+        self.adversaire = adversaire
+        self.coup = coup
+        self.parent = parent
+        self.enfants = []
+        self.visites = 0
+        self.gains = 0.0
+
+        coups = masque_coups_possibles(joueur, adversaire)
+        if coups:
+            self.coups_a_essayer = list(indices_du_masque(coups))
+        elif masque_coups_possibles(adversaire, joueur):
+            self.coups_a_essayer = [PASSE]
+        else:
+            # Fin de partie
+            self.coups_a_essayer = []
+
+    def selectionner_enfant(self):
+        """
+        Choisit l'enfant qui maximise la formule UCT (taux de gain plus bonus d'exploration).
+
+        Returns:
+            Le noeud enfant choisi.
+        """
+        logarithme = math.log(self.visites)
+        return max(self.enfants,
+                   key=lambda enfant: enfant.gains / enfant.visites
+                   + EXPLORATION * math.sqrt(logarithme / enfant.visites))
+
+
+def developper_arbre(joueur, adversaire, playouts_max, temps_max, graine):
+    """
+    Construit un arbre MCTS à partir d'une position, jusqu'à épuisement du budget de playouts ou de temps. Cette
+    fonction est exécutée par chaque processus de la recherche.
+
+    Args:
+        joueur: Le bitboard du joueur qui doit jouer.
+        adversaire: Le bitboard de l'adversaire.
+        playouts_max: Le nombre maximal de playouts (None pour aucune limite).
+        temps_max: Le temps maximal, en secondes (None pour aucune limite).
+        graine: La graine du générateur aléatoire de l'arbre.
+
+    Returns:
+        Un tuple (visites de chaque coup de la racine sous forme de dictionnaire, nombre de playouts, durée).
+    """
+    generateur = random.Random(graine)
+    racine = NoeudMCTS(joueur, adversaire)
+    debut = time.perf_counter()
+    playouts = 0
+
+    while True:
+        if playouts_max is not None and playouts >= playouts_max:
+            break
+        # Au moins un playout, pour que la racine ait un enfant même si le temps est déjà écoulé
+        if temps_max is not None and playouts and playouts & 15 == 0 and time.perf_counter() - debut >= temps_max:
+            break
+
+        # 1) Sélection: on descend tant que le noeud est entièrement développé
+        noeud = racine
+        while not noeud.coups_a_essayer and noeud.enfants:
+            noeud = noeud.selectionner_enfant()
+
+        # 2) Expansion: on ajoute un enfant pour un coup pas encore essayé
+        if noeud.coups_a_essayer:
+            coup = noeud.coups_a_essayer.pop(generateur.randrange(len(noeud.coups_a_essayer)))
+            joueur_enfant, adversaire_enfant = jouer_bitboards(coup, noeud.joueur, noeud.adversaire)
+            enfant = NoeudMCTS(joueur_enfant, adversaire_enfant, coup, noeud)
+            noeud.enfants.append(enfant)
+            noeud = enfant
+
+        # 3) Simulation: partie aléatoire, résultat du point de vue du joueur qui a joué le coup menant au noeud
+        resultat = 1.0 - partie_aleatoire(noeud.joueur, noeud.adversaire, generateur)
+        playouts += 1
+
+        # 4) Rétropropagation, en alternant le point de vue à chaque niveau
+        while noeud is not None:
+            noeud.visites += 1
+            noeud.gains += resultat
+            resultat = 1.0 - resultat
+            noeud = noeud.parent
+
+    visites = {enfant.coup: enfant.visites for enfant in racine.enfants}
+    return visites, playouts, time.perf_counter() - debut
+
+
+def _developper_arbre_tache(tache):
+    """
+    Adapte developper_arbre à Pool.map, qui ne passe qu'un argument.
+    """
+    return developper_arbre(*tache)
+
+
+class RechercheMCTS:
+    """
+    Recherche MCTS parallélisée à la racine: chaque processus construit un arbre indépendant à partir de la même
+    position, puis les visites des coups de la racine sont additionnées. Le coup le plus visité est choisi.
+    """
+
+    def __init__(self, playouts=1000, temps=None, processus=1, graine=None):
+        """
+        Initialise la recherche.
+
+        Args:
+            playouts: Le nombre de playouts par processus et par coup (None pour aucune limite).
+            temps: Le temps de réflexion par coup, en secondes (None pour aucune limite).
+            processus: Le nombre d'arbres (et de processus) indépendants.
+            graine: La graine des générateurs aléatoires (None pour une graine au hasard).
+        """
+        assert playouts is not None or temps is not None, "RechercheMCTS: il faut un budget de playouts ou de temps."
+        self.playouts = playouts
+        self.temps = temps
+        self.processus = processus
+        self.generateur = random.Random(graine)
+        self.pool = None
+
+        # Statistiques de la dernière recherche: une entrée (playouts, durée) par processus.
+        self.resultats_processus = []
+
+    def chercher(self, joueur, adversaire):
+        """
+        Cherche le meilleur coup d'une position.
+
+        Args:
+            joueur: Le bitboard du joueur qui doit jouer.
+            adversaire: Le bitboard de l'adversaire.
+
+        Returns:
+            L'indice de la case du coup choisi, ou None si le joueur n'a aucun coup possible.
+        """
+        coups = masque_coups_possibles(joueur, adversaire)
+        if not coups:
+            return None
+        if coups & (coups - 1) == 0:
+            # Un seul coup possible, inutile de chercher
+            self.resultats_processus = []
+            return coups.bit_length() - 1
+
+        taches = [(joueur, adversaire, self.playouts, self.temps, self.generateur.getrandbits(64))
+                  for _ in range(self.processus)]
+        if self.processus > 1:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(self.processus)
+            resultats = self.pool.map(_developper_arbre_tache, taches)
+        else:
+            resultats = [developper_arbre(*taches[0])]
+
+        visites = {}
+        for visites_arbre, _, _ in resultats:
+            for coup, nombre in visites_arbre.items():
+                visites[coup] = visites.get(coup, 0) + nombre
+        self.resultats_processus = [(playouts, duree) for _, playouts, duree in resultats]
+        return max(visites, key=visites.get)
+
+    def statistiques(self):
+        """
+        Retourne les statistiques de la dernière recherche.
+
+        Returns:
+            Un dictionnaire contenant le nombre total de playouts, la durée la plus longue parmi les processus et la
+            liste des débits (playouts par seconde) de chaque processus.
+        """
+        return {
+            "playouts": sum(playouts for playouts, _ in self.resultats_processus),
+            "duree": max((duree for _, duree in self.resultats_processus), default=0.0),
+            "playouts_par_seconde": [playouts / duree if duree > 0 else 0.0
+                                     for playouts, duree in self.resultats_processus],
+        }
+
+    def fermer(self):
+        """
+        Termine les processus de la recherche, s'il y en a.
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
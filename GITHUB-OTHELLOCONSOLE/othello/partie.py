@@ -1,9 +1,16 @@
 from othello.planche import Planche
-from othello.joueur import JoueurOrdinateur, JoueurHumain
-from othello.piece import Piece
+from othello.planche_bitboard import PlancheBitboard
+from othello.joueur import JoueurOrdinateur, JoueurHumain, JoueurAlphaBeta, JoueurMCTS, ANNULER
+
+# Représentations de planche disponibles, selon le paramètre type_planche de Partie.
+TYPES_PLANCHE = {
+    "dictionnaire": Planche,
+    "bitboard": PlancheBitboard,
+}
 
 class Partie:
-    def __init__(self, nom_fichier = None):
+    def __init__(self, nom_fichier = None, type_planche = "dictionnaire", joueur_noir = None, joueur_blanc = None,
+                 verbeux = True, bibliotheque = None, taille = 8):
         """
         Méthode d'initialisation d'une partie. On initialise 4 membres:
         - planche: contient la planche de la partie, celui-ci contenant le dictionnaire de pièces.
@@ -14,14 +21,42 @@ class Partie:
            devra se terminer.
         - coups_possibles : une liste de tous les coups possibles en fonction de l'état actuel de la planche,
            initialement vide.
+        - historique : la liste des tours joués, chacun sous forme d'un tuple (couleur du joueur, tour précédent
+           passé, deux tours passés, coup joué ou None si le tour a été passé), qui permet d'annuler des coups (voir
+           annuler_tour) et d'enregistrer la partie (voir coups_joues).
+        - position_depart : None si la partie commence à la position initiale, sinon un tuple (planche sous forme de
+           chaîne, couleur du joueur courant, tour précédent passé) de la position chargée d'un fichier.
 
         On initialise ensuite les joueurs selon la paramètre nom_fichier. Si l'utilisateur a précisé un nom_fichier,
         on fait appel à la méthode self.charger() pour charger la partie à partir d'un fichier. Sinon, on fait appel
         à self.initialiser_joueurs(), qui va demander à l'utilisateur quels sont les types de joueurs qu'il désire.
+
+        Le paramètre type_planche choisit la représentation de la planche: "dictionnaire" (Planche, par défaut) ou
+        "bitboard" (PlancheBitboard). Les deux offrent les mêmes méthodes publiques.
+
+        Le paramètre taille choisit le nombre de lignes (et de colonnes) de la planche: 8 par défaut, ou une autre
+        taille paire (6, 10, 16...). Une partie chargée d'un fichier prend plutôt la taille enregistrée. Les joueurs
+        AlphaBeta et MCTS, ainsi que la bibliothèque d'ouvertures, ne jouent que sur une planche 8x8.
+
+        Pour jouer sans console (simulations), on peut passer directement les objets joueur_noir et joueur_blanc, qui
+        remplacent alors ceux du fichier ou ceux demandés à l'usager, et verbeux=False pour ne rien afficher. Le
+        résultat de la partie est ensuite disponible dans les attributs gagnant, nb_coups et nb_passes.
+
+        Si une bibliothèque d'ouvertures (BibliothequeOuvertures) est passée, les joueurs ordinateur la consultent
+        avant de chercher leur coup.
         """
+        assert type_planche in TYPES_PLANCHE, "Partie: type de planche invalide."
+
+        self.verbeux = verbeux
+
+        # Statistiques de la partie: nombre de coups joués, de tours passés, et couleur gagnante une fois la partie
+        # terminée (None en cas d'égalité).
+        self.nb_coups = 0
+        self.nb_passes = 0
+        self.gagnant = None
 
         # La planche possede des None aux emplacementss vide (non prévu dans l'énnoncé) pour plus de facilité dans son parcours
-        self.planche = Planche()    
+        self.planche = TYPES_PLANCHE[type_planche](taille)
 
         # Le joueur noir commence
         self.couleur_joueur_courant = "noir"
@@ -31,14 +66,47 @@ class Partie:
         self.deux_tours_passes = False
 
         self.coups_possibles = []
+
+        self.historique = []
+
+        self.position_depart = None
   
         self.couleur_joueur_courant = "noir"
 
         if nom_fichier is not None:
             self.charger(nom_fichier)
-        else:
+        elif joueur_noir is None or joueur_blanc is None:
             self.initialiser_joueurs()
 
+        if joueur_noir is not None and joueur_blanc is not None:
+            self.joueur_noir = joueur_noir
+            self.joueur_blanc = joueur_blanc
+            self.joueur_courant = self.joueur_noir if self.couleur_joueur_courant == "noir" else self.joueur_blanc
+
+        self.joueur_noir.verbeux = verbeux
+        self.joueur_blanc.verbeux = verbeux
+
+        if self.planche.nb_cases != 8:
+            for joueur in [self.joueur_noir, self.joueur_blanc]:
+                assert not isinstance(joueur, (JoueurAlphaBeta, JoueurMCTS)), \
+                    "Partie: les joueurs AlphaBeta et MCTS ne jouent que sur une planche 8x8."
+            assert bibliotheque is None, "Partie: la bibliothèque d'ouvertures ne sert que sur une planche 8x8."
+
+        if bibliotheque is not None:
+            for joueur in [self.joueur_noir, self.joueur_blanc]:
+                if isinstance(joueur, JoueurOrdinateur):
+                    joueur.bibliotheque = bibliotheque
+
+    def afficher(self, message):
+        """
+        Affiche un message en console, sauf si la partie est jouée sans console (verbeux=False).
+
+        Args:
+            message: Le message (ou l'objet, comme la planche) à afficher.
+        """
+        if self.verbeux:
+            print(message)
+
     def initialiser_joueurs(self):
         """
         On initialise ici trois attributs : joueur_noir, joueur_blanc et joueur_courant (initialisé à joueur_noir).
@@ -51,7 +119,10 @@ class Partie:
 
     def demander_type_joueur(self, couleur):
         """
-        Demande à l'usager quel type de joueur ('Humain' ou 'Ordinateur') il désire pour le joueur de la couleur.
+        Demande à l'usager quel type de joueur ('Humain', 'Ordinateur', 'AlphaBeta' ou 'MCTS') il désire pour le
+        joueur de la couleur. Pour un joueur 'AlphaBeta', on demande aussi la profondeur maximale, le temps alloué
+        par coup et le nombre de processus; pour un joueur 'MCTS', le nombre de playouts, le temps alloué par coup et
+        le nombre de processus.
 
         Tant que l'entrée n'est pas valide, on continue de demander à l'utilisateur.
 
@@ -62,17 +133,53 @@ class Partie:
 
         Returns:
             Un objet Joueur, de type JoueurHumain si l'usager a entré 'Humain', JoueurOrdinateur s'il a entré
-            'Ordinateur'.
+            'Ordinateur', JoueurAlphaBeta s'il a entré 'AlphaBeta', JoueurMCTS s'il a entré 'MCTS'.
         """
         
         reponse = input("Quel type de joueur sera " + couleur + " ?")
-        while reponse not in ['Humain', 'Ordinateur']:
-            print("Vous devez repondre Ordinateur ou Humain !!")
+        while reponse not in ['Humain', 'Ordinateur', 'AlphaBeta', 'MCTS']:
+            print("Vous devez repondre Ordinateur, AlphaBeta, MCTS ou Humain !!")
             reponse = input("Quel type de joueur sera " + couleur + " ?")
+
+        if reponse == 'AlphaBeta':
+            profondeur = self.demander_nombre("Profondeur maximale de recherche ? ", int, 4)
+            temps = self.demander_nombre("Temps maximal par coup en secondes (vide pour aucune limite) ? ", float, None)
+            processus = self.demander_nombre("Nombre de processus (vide pour 1) ? ", int, 1)
+            return self.creer_joueur(reponse, couleur, profondeur, temps, processus=processus)
+
+        if reponse == 'MCTS':
+            playouts = self.demander_nombre("Nombre de playouts par coup (vide pour 1000) ? ", int, 1000)
+            temps = self.demander_nombre("Temps maximal par coup en secondes (vide pour aucune limite) ? ", float, None)
+            processus = self.demander_nombre("Nombre de processus (vide pour 1) ? ", int, 1)
+            return self.creer_joueur(reponse, couleur, temps=temps, playouts=playouts, processus=processus)
         
         return self.creer_joueur(reponse, couleur)
 
-    def creer_joueur(self, type, couleur):
+    def demander_nombre(self, question, conversion, defaut):
+        """
+        Demande un nombre positif à l'usager, tant que l'entrée n'est pas valide.
+
+        Args:
+            question: La question à afficher.
+            conversion: La fonction de conversion de la réponse (int ou float).
+            defaut: La valeur retournée si l'usager n'entre rien.
+
+        Returns:
+            Le nombre entré, ou la valeur par défaut.
+        """
+        while True:
+            reponse = input(question).strip()
+            if reponse == "":
+                return defaut
+            try:
+                nombre = conversion(reponse)
+                if nombre > 0:
+                    return nombre
+            except ValueError:
+                pass
+            print("Vous devez repondre un nombre positif !!")
+
+    def creer_joueur(self, type, couleur, profondeur=4, temps=None, playouts=1000, processus=1):
         """
         Crée l'objet Joueur approprié, selon le type passé en paramètre.
 
@@ -80,15 +187,24 @@ class Partie:
         JoueurHumain(couleur), par exemple.
 
         Args:
-            type: le type de joueur, "Ordinateur" ou "Humain"
+            type: le type de joueur, "Ordinateur", "AlphaBeta", "MCTS" ou "Humain"
             couleur: la couleur du pion joué par le jouer, "blanc" ou "noir"
+            profondeur: la profondeur maximale de recherche d'un joueur "AlphaBeta"
+            temps: le temps maximal par coup d'un joueur "AlphaBeta" ou "MCTS", en secondes (None pour aucune limite)
+            playouts: le nombre de playouts par processus et par coup d'un joueur "MCTS"
+            processus: le nombre de processus d'un joueur "AlphaBeta" ou "MCTS"
 
         Returns:
-            Un objet JoueurHumain si le type est "Humain", JoueurOrdinateur sinon
+            Un objet JoueurHumain si le type est "Humain", JoueurAlphaBeta si le type est "AlphaBeta",
+            JoueurMCTS si le type est "MCTS", JoueurOrdinateur sinon
         """
         
         if type == "Ordinateur":
             return JoueurOrdinateur(couleur)
+        elif type == "AlphaBeta":
+            return JoueurAlphaBeta(couleur, profondeur, temps, processus=processus)
+        elif type == "MCTS":
+            return JoueurMCTS(couleur, playouts, temps, processus)
         else:
             return JoueurHumain(couleur)
 
@@ -122,9 +238,10 @@ class Partie:
         # 1) Le coup tenté représente une position valide de la planche de jeu.
         if self.planche.position_valide(position_coup):
             # 2) Aucune pièce se trouve déjà à la position souhaitée.
-            if self.planche.cases[(position_coup)] is None:
-                # 3) Le coup fait partie de la liste des coups valides.
-                if position_coup in self.coups_possibles:
+            if self.planche.get_piece(position_coup) is None:
+                # 3) Le coup fait partie des coups valides. La planche garde les pièces mangées du coup vérifié, que
+                #    jouer_coup réutilise ensuite.
+                if self.planche.coup_est_possible(position_coup, self.couleur_joueur_courant):
                     coup_valide = True
                 else:
                     message_erreur = "Le coup ne fait pas partie de la liste des coups valides \n"
@@ -149,22 +266,74 @@ class Partie:
 
         ***Vous disposez d'une méthode pour demander le coup à l'usager dans cette classe et la classe planche
         possède à son tour une méthode pour jouer un coup, utilisez-les !***
+
+        Un joueur humain peut demander d'annuler son dernier coup (voir annuler_tour) plutôt que de jouer.
+
+        Returns:
+            La position jouée, ou None si le tour a plutôt été annulé.
         """
-        if self.joueur_courant.obtenir_type_joueur() == "Ordinateur":
-            coup_ordinateur = self.joueur_courant.choisir_coup(self.planche.lister_coups_possibles_de_couleur(self.couleur_joueur_courant))
+        # Les coups possibles ont déjà été calculés par jouer() pour ce tour, on ne refait pas la recherche.
+        # Les joueurs ordinateur reçoivent aussi la planche, dont les joueurs à recherche ont besoin.
+        if self.joueur_courant.obtenir_type_joueur() != "Humain":
+            coup_ordinateur = self.joueur_courant.choisir_coup(self.coups_possibles, self.planche)
             self.planche.jouer_coup(coup_ordinateur, self.couleur_joueur_courant)
+            return coup_ordinateur
 
         if self.joueur_courant.obtenir_type_joueur() == "Humain":
 
+            # L'adversaire peut chercher ses réponses pendant que l'usager choisit son coup
+            adversaire = self.joueur_blanc if self.couleur_joueur_courant == "noir" else self.joueur_noir
+            adversaire.commencer_reflexion(self.planche, self.couleur_joueur_courant)
+
             # L utilisateur choisit un coup qui fonctionne
-            position_choisie = self.joueur_courant.choisir_coup(self.planche.lister_coups_possibles_de_couleur(self.joueur_courant.couleur))
+            position_choisie = self.joueur_courant.choisir_coup(self.coups_possibles)
 
             # Tant que la position choisie n est pas correct on lui redemande
-            while not self.valider_position_coup(position_choisie)[0]:
-                print(self.valider_position_coup(position_choisie)[1])
-                position_choisie = self.joueur_courant.choisir_coup(self.planche.lister_coups_possibles_de_couleur(self.joueur_courant.couleur))
+            while True:
+                if position_choisie == ANNULER:
+                    if self.annuler_tour():
+                        adversaire.arreter_reflexion()
+                        return None
+                    message_erreur = "Aucun coup a annuler \n"
+                else:
+                    coup_valide, message_erreur = self.valider_position_coup(position_choisie)
+                    if coup_valide:
+                        break
+                self.afficher(message_erreur)
+                position_choisie = self.joueur_courant.choisir_coup(self.coups_possibles)
             # On joue le coup choisi
-            print (self.planche.jouer_coup(position_choisie, self.joueur_courant.couleur))
+            self.afficher(self.planche.jouer_coup(position_choisie, self.joueur_courant.couleur))
+            return position_choisie
+
+    def annuler_tour(self):
+        """
+        Annule les tours joués depuis le dernier coup d'un joueur humain, ce coup compris (les coups de l'ordinateur et
+        les tours passés qui l'ont suivi sont donc aussi annulés). On peut l'appeler plusieurs fois de suite pour
+        remonter plus loin dans la partie.
+
+        Chaque coup est défait par self.planche.annuler_coup(), qui ne touche qu'aux cases modifiées par le coup.
+
+        Returns:
+            True si un coup a été annulé, False s'il n'y avait aucun coup humain à annuler.
+        """
+        joueurs = {"noir": self.joueur_noir, "blanc": self.joueur_blanc}
+        if not any(coup_joue and joueurs[couleur].obtenir_type_joueur() == "Humain"
+                   for couleur, _, _, coup_joue in self.historique):
+            return False
+
+        while True:
+            couleur, tour_precedent_passe, deux_tours_passes, coup_joue = self.historique.pop()
+            if coup_joue:
+                self.planche.annuler_coup()
+                self.nb_coups -= 1
+            else:
+                self.nb_passes -= 1
+            self.couleur_joueur_courant = couleur
+            self.joueur_courant = joueurs[couleur]
+            self.tour_precedent_passe = tour_precedent_passe
+            self.deux_tours_passes = deux_tours_passes
+            if coup_joue and self.joueur_courant.obtenir_type_joueur() == "Humain":
+                return True
 
     def passer_tour(self):
         """
@@ -173,7 +342,7 @@ class Partie:
         """
 
 
-        print("Le joueur {} ne peut pas jouer et passe son tour".format(self.couleur_joueur_courant))
+        self.afficher("Le joueur {} ne peut pas jouer et passe son tour".format(self.couleur_joueur_courant))
         self.changerTour()
 
 
@@ -188,14 +357,8 @@ class Partie:
             self.determiner_gagnant()
             return True
         
-        # Si il reste aucune case vide la partie est terminee
-        is_partie_terminee = True
-        for case in self.planche.cases.values():
-            if case is None:
-                is_partie_terminee = False
-
-        # partie terminee on indique le gagnant
-        if is_partie_terminee:
+        # Si il reste aucune case vide la partie est terminee (la planche tient le compte des cases vides)
+        if self.planche.nb_vides == 0:
             self.determiner_gagnant()
             return True
         return False
@@ -209,21 +372,18 @@ class Partie:
         Affichez un message indiquant la couleur gagnante ainsi que le nombre de pièces de sa couleur ou encore
         un message annonçant un match nul, le cas échéant.
         """
-        nombre_de_noir = 0
-        nombre_de_blanc = 0
+        nombre_de_noir = self.planche.nb_noir
+        nombre_de_blanc = self.planche.nb_blanc
 
-        for case in self.planche.cases.values():
-            if type(case) is Piece:
-                if case.couleur == "noir":
-                    nombre_de_noir += 1
-                else:
-                    nombre_de_blanc += 1
         if nombre_de_blanc > nombre_de_noir:
-            print("Les blancs ont gagné !!!")
+            self.gagnant = "blanc"
+            self.afficher("Les blancs ont gagné !!!")
         if nombre_de_blanc < nombre_de_noir:
-            print("Les noirs ont gagné !!!")
+            self.gagnant = "noir"
+            self.afficher("Les noirs ont gagné !!!")
         if nombre_de_blanc == nombre_de_noir:
-            print("Egalité...")
+            self.gagnant = None
+            self.afficher("Egalité...")
 
 
     def jouer(self):
@@ -245,23 +405,72 @@ class Partie:
         5) Lorsque la partie est terminée, afficher un message mentionnant le résultat de la partie. Vous avez une
            fonction à implémenter que vous pourriez tout simplement appeler.
         """
-        while not self.partie_terminee():
-            print(self.planche)
+        try:
+            while not self.partie_terminee():
+                self.afficher(self.planche)
 
-            print("C'est au tour de {}".format(self.couleur_joueur_courant))
+                self.afficher("C'est au tour de {}".format(self.couleur_joueur_courant))
 
-            self.coups_possibles = self.planche.lister_coups_possibles_de_couleur(self.couleur_joueur_courant)
+                self.coups_possibles = self.planche.lister_coups_possibles_de_couleur(self.couleur_joueur_courant)
             
 
 
-            if len(self.coups_possibles) == 0:
+                etat = (self.couleur_joueur_courant, self.tour_precedent_passe, self.deux_tours_passes)
+
+                if len(self.coups_possibles) == 0:
+                    if self.tour_precedent_passe:
+                        self.deux_tours_passes = True
+                    self.tour_precedent_passe = True
+                    self.nb_passes += 1
+                    self.historique.append(etat + (None,))
+                    self.passer_tour()
+                else:
+                    coup_joue = self.tour()
+                    if coup_joue is not None:
+                        # Un coup a été joué: un éventuel tour passé avant lui n'est plus le tour précédent
+                        self.tour_precedent_passe = False
+                        self.nb_coups += 1
+                        self.historique.append(etat + (coup_joue,))
+                        self.changerTour()
+        finally:
+            # Une réflexion commencée pendant le dernier coup humain n'a plus d'objet, ni les processus des joueurs,
+            # même si la partie est interrompue (Ctrl-C)
+            self.joueur_noir.arreter_reflexion()
+            self.joueur_blanc.arreter_reflexion()
+            self.joueur_noir.fermer()
+            self.joueur_blanc.fermer()
+
+    def rejouer(self, coups):
+        """
+        Rejoue une suite de coups sans rien demander aux joueurs, par exemple pour reconstruire une partie
+        enregistrée (voir le module enregistrement). L'état de la partie (joueur courant, tours passés, historique)
+        est mis à jour comme dans jouer().
+
+        Args:
+            coups: Les coups à jouer, dans l'ordre: des couples (ligne, colonne), ou None pour un tour passé.
+        """
+        for coup in coups:
+            etat = (self.couleur_joueur_courant, self.tour_precedent_passe, self.deux_tours_passes)
+            if coup is None:
                 if self.tour_precedent_passe:
                     self.deux_tours_passes = True
                 self.tour_precedent_passe = True
-                self.passer_tour()
+                self.nb_passes += 1
             else:
-                self.tour()
-                self.changerTour()
+                assert self.planche.jouer_coup(coup, self.couleur_joueur_courant) == "ok", "Partie: coup invalide."
+                self.tour_precedent_passe = False
+                self.nb_coups += 1
+            self.historique.append(etat + (coup,))
+            self.changerTour()
+
+    def coups_joues(self):
+        """
+        Retourne la liste des coups joués depuis le début de la partie (ou depuis la position chargée).
+
+        Returns:
+            La liste des coups, des couples (ligne, colonne), ou None pour un tour passé.
+        """
+        return [coup_joue for _, _, _, coup_joue in self.historique]
 
             
             
@@ -285,6 +494,8 @@ class Partie:
         - Une ligne contenant True ou False, si les deux derniers tours ont été passés.
         - Une ligne contenant le type du joueur blanc.
         - Une ligne contenant le type du joueur noir.
+        - Seulement si la planche n'est pas 8x8: une ligne "taille,n" donnant son nombre de lignes (et de colonnes).
+          Les parties 8x8 gardent ainsi exactement le format d'origine.
         - Le reste des lignes correspondant à la planche. Voir la méthode convertir_en_chaine de la planche
          pour le format.
 
@@ -295,46 +506,61 @@ class Partie:
         Args:
             nom_fichier: Le nom du fichier où sauvegarder, un string.
         """
-        # On ouvre (crée si il n'existe pas) un fichier texte
-        mon_fichier = open(nom_fichier, 'w')
-        mon_fichier.write(self.couleur_joueur_courant + '\n')
-        mon_fichier.write(str(self.tour_precedent_passe) + '\n')
-        mon_fichier.write(str(self.deux_tours_passes) + '\n')
-        mon_fichier.write(self.joueur_blanc.obtenir_type_joueur() + '\n')
-        mon_fichier.write(self.joueur_noir.obtenir_type_joueur() + '\n')
-        mon_fichier.write(self.planche.convertir_en_chaine())
+        # On ouvre (crée si il n'existe pas) un fichier texte, qui est fermé à la fin de l'écriture
+        with open(nom_fichier, 'w') as mon_fichier:
+            mon_fichier.write(self.couleur_joueur_courant + '\n')
+            mon_fichier.write(str(self.tour_precedent_passe) + '\n')
+            mon_fichier.write(str(self.deux_tours_passes) + '\n')
+            mon_fichier.write(self.joueur_blanc.obtenir_type_joueur() + '\n')
+            mon_fichier.write(self.joueur_noir.obtenir_type_joueur() + '\n')
+            if self.planche.nb_cases != 8:
+                mon_fichier.write("taille," + str(self.planche.nb_cases) + '\n')
+            mon_fichier.write(self.planche.convertir_en_chaine())
 
     def charger(self, nom_fichier):
         """
-        Charge une partie dans à partir d'un fichier. Le fichier a le même format que la méthode de sauvegarde.
+        Charge une partie dans à partir d'un fichier. Le fichier a le même format que la méthode de sauvegarde. La
+        partie chargée prend la taille de planche enregistrée (8x8 si le fichier n'a pas de ligne "taille,").
 
         Args:
             nom_fichier: Le nom du fichier à charger, un string.
         """
         # On converti le fichier en une liste pour plus de facilité la tache
-        lines = []
-        f = open(nom_fichier,'r')
-        for line in f:
-            lines.append(line)
-        f.close()
+        with open(nom_fichier, 'r') as f:
+            lines = f.readlines()
+
+        # Une planche d'une autre taille que celle enregistrée est remplacée avant d'y placer les pièces
+        taille = 8
+        if len(lines) > 5 and lines[5].startswith("taille,"):
+            taille = int(lines[5].strip().split(",")[1])
+        if self.planche.nb_cases != taille:
+            self.planche = type(self.planche)(taille)
 
         # On remplie la partie selon la liste
         for i in range(len(lines)):
             if i == 0:
                 self.couleur_joueur_courant = lines[0].strip('\n')
             elif i == 1:
-                self.tour_precedent_passe = eval(lines[1].strip('\n')) #eval va venir evaluer l'expression si on a false
+                self.tour_precedent_passe = lines[1].strip() == "True"
             elif i == 2:
-                self.deux_tours_passes = eval(lines[2].strip('\n')) #regarde si on a false et donc 2 tour passer
+                self.deux_tours_passes = lines[2].strip() == "True"
             elif i == 3:
-                self.joueur_noir = self.creer_joueur(lines[3].strip('\n'),"noir")
+                # Même ordre que sauvegarder(): le joueur blanc, puis le joueur noir
+                self.joueur_blanc = self.creer_joueur(lines[3].strip('\n'),"blanc")
             elif i == 4:
-                self.joueur_blanc = self.creer_joueur(lines[4].strip('\n'),"blanc")
+                self.joueur_noir = self.creer_joueur(lines[4].strip('\n'),"noir")
+            elif i == 5 and lines[5].startswith("taille,"):
+                # Déjà lue avant la boucle
+                pass
             else:
                 self.planche.charger_dune_chaine(lines[i].strip('\n'))
 
+        # La partie enregistrée (voir coups_joues) commence à cette position plutôt qu'à la position initiale
+        self.position_depart = (self.planche.convertir_en_chaine(), self.couleur_joueur_courant,
+                                self.tour_precedent_passe)
+
         # Selon la couleur du joueur courant on met a jour le joueur_courant
-        if self.couleur_joueur_courant is "noir":
+        if self.couleur_joueur_courant == "noir":
             self.joueur_courant = self.joueur_noir
         else :
             self.joueur_courant = self.joueur_blanc
@@ -0,0 +1,227 @@
+"""
+Perft: compte les feuilles de l'arbre de tous les coups possibles jusqu'à une profondeur donnée, pour vérifier la
+génération de coups de chaque représentation de la planche et en comparer la vitesse.
+
+Un tour passé compte comme un demi-coup, comme dans Partie.jouer: si le joueur n'a aucun coup possible, la position
+a un seul enfant, celle où l'adversaire joue. Une position où aucun des deux joueurs ne peut jouer (partie terminée)
+compte comme une feuille.
+
+Le module mesure aussi comment le coût d'un coup (lister les coups possibles, puis jouer l'un d'eux) grandit avec la
+taille de la planche (voir comparer_tailles).
+"""
+import random
+import time
+
+from othello.partie import Partie, TYPES_PLANCHE
+from othello.recherche import autre_couleur
+
+# Nombres de feuilles publiés depuis la position initiale, pour les profondeurs 1 à 10.
+PERFT_INITIAL = (4, 12, 56, 244, 1396, 8200, 55092, 390216, 3005288, 24571284)
+
+# Représentations mesurées: celles de Partie, plus le traitement par lots de lot_numpy.
+REPRESENTATIONS = list(TYPES_PLANCHE) + ["numpy"]
+
+# Tailles de planche mesurées par défaut par comparer_tailles.
+TAILLES = (6, 8, 10, 16, 32)
+
+
+def perft(planche, couleur, profondeur, passe=False):
+    """
+    Compte les feuilles à partir d'une planche, en jouant et en annulant les coups (faire_coup et annuler_coup).
+
+    Args:
+        planche: La planche (Planche ou PlancheBitboard). Elle est remise dans son état de départ.
+        couleur: La couleur qui doit jouer.
+        profondeur: La profondeur, en demi-coups.
+        passe: True si le joueur précédent vient de passer son tour.
+
+    Returns:
+        Le nombre de feuilles.
+    """
+    if profondeur == 0:
+        return 1
+    coups = planche.lister_coups_possibles_de_couleur(couleur)
+    adversaire = autre_couleur(couleur)
+    if not coups:
+        if passe:
+            return 1
+        return perft(planche, adversaire, profondeur - 1, True)
+
+    feuilles = 0
+    for coup in coups:
+        planche.faire_coup(coup, couleur)
+        feuilles += perft(planche, adversaire, profondeur - 1)
+        planche.annuler_coup()
+    return feuilles
+
+
+def charger_position(representation, nom_fichier=None, taille=8):
+    """
+    Prépare la position de départ d'un perft.
+
+    Args:
+        representation: "dictionnaire", "bitboard" ou "numpy".
+        nom_fichier: Une partie sauvegardée (voir Partie.sauvegarder), ou None pour la position initiale.
+        taille: La taille de la planche de la position initiale (la partie sauvegardée a la sienne).
+
+    Returns:
+        Un tuple (planche, couleur qui doit jouer, tour précédent passé).
+    """
+    type_planche = "bitboard" if representation == "numpy" else representation
+    if nom_fichier is None:
+        planche, couleur, passe = TYPES_PLANCHE[type_planche](taille), "noir", False
+    else:
+        partie = Partie(nom_fichier, type_planche=type_planche, verbeux=False)
+        planche, couleur, passe = partie.planche, partie.couleur_joueur_courant, partie.tour_precedent_passe
+    return planche, couleur, passe
+
+
+def mesurer(representation, profondeur, nom_fichier=None, taille=8):
+    """
+    Effectue un perft avec une représentation de la planche et le chronomètre.
+
+    Args:
+        representation: "dictionnaire", "bitboard" ou "numpy".
+        profondeur: La profondeur, en demi-coups.
+        nom_fichier: Une partie sauvegardée, ou None pour la position initiale.
+        taille: La taille de la planche de la position initiale.
+
+    Returns:
+        Un dictionnaire contenant le nombre de feuilles, la durée (secondes) et le débit en feuilles par seconde.
+    """
+    planche, couleur, passe = charger_position(representation, nom_fichier, taille)
+    assert representation != "numpy" or planche.nb_cases == 8, "mesurer: lot_numpy ne traite que des planches 8x8."
+    if representation == "numpy":
+        # Importé seulement ici: NumPy n'est pas nécessaire pour les autres représentations
+        from othello.lot_numpy import perft_lot
+
+    debut = time.perf_counter()
+    if representation == "numpy":
+        joueur, adversaire = planche.bitboards(couleur)
+        feuilles = perft_lot(joueur, adversaire, profondeur, passe)
+    else:
+        feuilles = perft(planche, couleur, profondeur, passe)
+    duree = time.perf_counter() - debut
+    return {
+        "feuilles": feuilles,
+        "duree": duree,
+        "noeuds_par_seconde": feuilles / duree if duree > 0 else 0.0,
+    }
+
+
+def comparer(profondeur, representations=None, nom_fichier=None, afficher=print, taille=8):
+    """
+    Effectue le perft avec chaque représentation, vérifie que toutes trouvent le même nombre de feuilles (et le nombre
+    publié, depuis la position initiale 8x8) et affiche leurs débits.
+
+    Args:
+        profondeur: La profondeur, en demi-coups.
+        representations: Les représentations à mesurer (None pour toutes, voir REPRESENTATIONS; sans "numpy" sur une
+            planche d'une autre taille que 8x8).
+        nom_fichier: Une partie sauvegardée, ou None pour la position initiale.
+        afficher: La fonction utilisée pour afficher les résultats (None pour ne rien afficher).
+        taille: La taille de la planche de la position initiale.
+
+    Returns:
+        True si tous les nombres de feuilles sont corrects.
+    """
+    if representations is None:
+        representations = REPRESENTATIONS if taille == 8 else list(TYPES_PLANCHE)
+    attendu = None
+    if nom_fichier is None and taille == 8 and profondeur <= len(PERFT_INITIAL):
+        attendu = PERFT_INITIAL[profondeur - 1] if profondeur > 0 else 1
+
+    correct = True
+    for representation in representations:
+        resultat = mesurer(representation, profondeur, nom_fichier, taille)
+        if attendu is None:
+            attendu = resultat["feuilles"]
+        valide = resultat["feuilles"] == attendu
+        correct = correct and valide
+        if afficher is not None:
+            afficher("perft({}) {:<12} {:>12} feuilles en {:8.3f} s ({:>12.0f} noeuds/s){}".format(
+                profondeur, representation, resultat["feuilles"], resultat["duree"],
+                resultat["noeuds_par_seconde"], "" if valide else "  ERREUR: {} attendues".format(attendu)))
+    return correct
+
+
+def mesurer_taille(type_planche, taille, parties=20, graine=0):
+    """
+    Joue des parties au hasard sur une planche d'une taille donnée et chronomètre chaque coup: la liste des coups
+    possibles, puis le coup choisi (faire_coup). Le tirage des coups dépend seulement de la graine, les deux
+    représentations jouent donc les mêmes parties.
+
+    Args:
+        type_planche: "dictionnaire" ou "bitboard" (voir TYPES_PLANCHE).
+        taille: La taille de la planche.
+        parties: Le nombre de parties à jouer.
+        graine: La graine du tirage des coups.
+
+    Returns:
+        Un dictionnaire contenant le nombre de coups joués, la durée totale (secondes) et la durée moyenne d'un coup
+        (microsecondes).
+    """
+    assert type_planche in TYPES_PLANCHE, "mesurer_taille: type de planche invalide."
+    generateur = random.Random(graine)
+    nb_coups = 0
+    duree = 0.0
+    for _ in range(parties):
+        planche = TYPES_PLANCHE[type_planche](taille)
+        couleur = "noir"
+        passe = False
+        while True:
+            debut = time.perf_counter()
+            coups = planche.lister_coups_possibles_de_couleur(couleur)
+            if coups:
+                planche.faire_coup(generateur.choice(coups), couleur)
+            duree += time.perf_counter() - debut
+            if coups:
+                nb_coups += 1
+                passe = False
+            elif passe:
+                break
+            else:
+                passe = True
+            couleur = autre_couleur(couleur)
+    return {
+        "coups": nb_coups,
+        "duree": duree,
+        "microsecondes_par_coup": duree / nb_coups * 1e6 if nb_coups else 0.0,
+    }
+
+
+def comparer_tailles(tailles=TAILLES, representations=None, parties=20, graine=0, afficher=print):
+    """
+    Mesure le coût moyen d'un coup sur chaque taille de planche avec chaque représentation (voir mesurer_taille), et
+    l'affiche relativement à celui de la planche 8x8 et par case de la planche.
+
+    Args:
+        tailles: Les tailles de planche à mesurer.
+        representations: Les représentations à mesurer (None pour celles de Partie, voir TYPES_PLANCHE).
+        parties: Le nombre de parties jouées sur chaque planche.
+        graine: La graine du tirage des coups.
+        afficher: La fonction utilisée pour afficher les résultats (None pour ne rien afficher).
+
+    Returns:
+        Un dictionnaire {(représentation, taille): résultat de mesurer_taille}.
+    """
+    if representations is None:
+        representations = list(TYPES_PLANCHE)
+    resultats = {}
+    for representation in representations:
+        for taille in tailles:
+            resultats[representation, taille] = mesurer_taille(representation, taille, parties, graine)
+
+    if afficher is not None:
+        for representation in representations:
+            reference = resultats.get((representation, 8))
+            for taille in tailles:
+                resultat = resultats[representation, taille]
+                rapport = ""
+                if reference is not None and reference["microsecondes_par_coup"] > 0:
+                    rapport = " ({:5.2f} x 8x8)".format(
+                        resultat["microsecondes_par_coup"] / reference["microsecondes_par_coup"])
+                afficher("{:<12} {:>3}x{:<3} {:>8} coups {:10.1f} us/coup {:8.3f} us/case{}".format(
+                    representation, taille, taille, resultat["coups"], resultat["microsecondes_par_coup"],
+                    resultat["microsecondes_par_coup"] / (taille * taille), rapport))
+    return resultats
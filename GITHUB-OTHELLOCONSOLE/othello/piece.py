@@ -1,7 +1,23 @@
+# Codes entiers des couleurs, utilisés par la planche pour représenter chaque case sur un seul octet. La couleur
+# opposée à un code c (non vide) est 3 - c.
+VIDE = 0
+NOIR = 1
+BLANC = 2
+
+# Correspondances entre les couleurs ("noir", "blanc") et leurs codes.
+CODES_COULEUR = {"noir": NOIR, "blanc": BLANC}
+COULEURS = (None, "noir", "blanc")
+
+
 class Piece:
     """
     Classe modélisant une pièce d'un jeu d'Othello.
+
+    La planche ne conserve pas d'objets Piece: elle ne garde que le code de couleur de chaque case et construit une
+    pièce à la demande (voir Planche.get_piece). Une pièce ne contient donc que son code de couleur.
     """
+    __slots__ = ("code",)
+
     def __init__(self, couleur):
         """
         La méthode spéciale __init__ d'une classe est appelée lorsqu'on instancie un nouvel objet. Elle peut prendre
@@ -14,7 +30,14 @@ class Piece:
         """
         assert couleur in ["blanc", "noir"], "Piece: couleur invalide."
 
-        self.couleur = couleur
+        self.code = CODES_COULEUR[couleur]
+
+    @property
+    def couleur(self):
+        """
+        La couleur de la pièce, "blanc" ou "noir".
+        """
+        return COULEURS[self.code]
 
     def est_blanc(self):
         """
@@ -23,7 +46,7 @@ class Piece:
         Returns:
             True si la pièce est de couleur blanche, False autrement.
         """
-        return self.couleur == "blanc"
+        return self.code == BLANC
 
     def est_noir(self):
         """
@@ -32,13 +55,13 @@ class Piece:
         Returns:
             True si la pièce est de couleur noire, False autrement.
         """
-        return self.couleur == "noir"
+        return self.code == NOIR
 
     def echange_couleur(self):
         """
         Fait le changement de couleur de la pièce lorsqu'elle est mangée.
         """
-        self.couleur = "noir" if self.est_blanc() else "blanc"
+        self.code = 3 - self.code
 
     def __repr__(self):
         """
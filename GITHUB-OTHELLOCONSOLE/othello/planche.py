@@ -1,27 +1,184 @@
-from othello.piece import Piece
+from othello.piece import Piece, VIDE, NOIR, BLANC, CODES_COULEUR, COULEURS
+from othello.zobrist import cles_zobrist
+
+# Les 8 directions autour d'une case (sens horaire), en déplacement (ligne, colonne).
+DIRECTIONS = [(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)]
+
+
+def creer_tables_rayons(n):
+    """
+    Précalcule, pour chaque case d'une planche n x n, les rayons qui en partent et ses voisines.
+
+    Args:
+        n: Le nombre de lignes (et de colonnes) de la planche.
+
+    Returns:
+        Un tuple (rayons par direction, rayons, rayons de retournement, voisines), chacun indicé par l'indice
+        (ligne * n + colonne) de la case:
+        - rayons par direction: pour chacune des DIRECTIONS, le tuple des indices des cases jusqu'au bord, dans
+          l'ordre du parcours (vide au bord de la planche);
+        - rayons: les rayons non vides;
+        - rayons de retournement: les rayons d'au moins deux cases, les seuls où un coup peut manger des pièces;
+        - voisines: le tuple des indices des cases voisines.
+    """
+    rayons_par_direction = []
+    for indice in range(n * n):
+        x_depart, y_depart = divmod(indice, n)
+        rayons_case = []
+        for x_direction, y_direction in DIRECTIONS:
+            rayon = []
+            x, y = x_depart + x_direction, y_depart + y_direction
+            while 0 <= x < n and 0 <= y < n:
+                rayon.append(x * n + y)
+                x += x_direction
+                y += y_direction
+            rayons_case.append(tuple(rayon))
+        rayons_par_direction.append(tuple(rayons_case))
+
+    rayons = tuple(tuple(rayon for rayon in rayons_case if rayon) for rayons_case in rayons_par_direction)
+    rayons_retournement = tuple(tuple(rayon for rayon in rayons_case if len(rayon) >= 2)
+                                for rayons_case in rayons_par_direction)
+    voisines = tuple(tuple(rayon[0] for rayon in rayons_case) for rayons_case in rayons)
+    return tuple(rayons_par_direction), rayons, rayons_retournement, voisines
+
+
+# Tables de la planche 8x8, calculées une seule fois à l'importation.
+RAYONS_PAR_DIRECTION, RAYONS, RAYONS_RETOURNEMENT, VOISINES = creer_tables_rayons(8)
+
+# Tables de chaque taille de planche (voir tables_rayons).
+_TABLES_PAR_TAILLE = {8: (RAYONS_PAR_DIRECTION, RAYONS, RAYONS_RETOURNEMENT, VOISINES)}
+
+
+def tables_rayons(n):
+    """
+    Retourne les tables de creer_tables_rayons pour une planche n x n, calculées à la première planche de cette
+    taille puis partagées par toutes les autres.
+
+    Args:
+        n: Le nombre de lignes (et de colonnes) de la planche.
+
+    Returns:
+        Le tuple (rayons par direction, rayons, rayons de retournement, voisines).
+    """
+    tables = _TABLES_PAR_TAILLE.get(n)
+    if tables is None:
+        tables = _TABLES_PAR_TAILLE[n] = creer_tables_rayons(n)
+    return tables
+
+
+def valider_taille(taille):
+    """
+    Vérifie qu'une taille de planche est utilisable: la position initiale occupe les 4 cases du centre, il faut donc un
+    nombre pair de lignes, au moins 4.
+
+    Args:
+        taille: Le nombre de lignes (et de colonnes) de la planche.
+    """
+    assert isinstance(taille, int) and taille >= 4 and taille % 2 == 0, "Planche: taille invalide."
+
+
+def dessiner_planche(planche):
+    """
+    Dessine une planche (Planche ou PlancheBitboard) avec les numéros de lignes et de colonnes. Les numéros de
+    colonnes de plus d'un chiffre débordent sur le trait qui les entoure, pour que toutes les cases gardent la même
+    largeur.
+
+    Args:
+        planche: La planche à dessiner.
+
+    Returns:
+        La chaîne de caractères.
+    """
+    n = planche.nb_cases
+    marge = " " * len(str(n - 1))
+    numeros = marge + " +" + "+".join(str(j).center(3, "-") for j in range(n)) + "+\n"
+    separation = "\n" + marge + " +" + "---+" * n + "\n"
+
+    s = numeros
+    for i in range(0, n):
+        s += str(i).rjust(len(marge)) + " | "
+        for j in range(0, n):
+            piece = planche.get_piece((i, j))
+            if piece is not None:
+                s += str(piece) + " | "
+            else:
+                s += "  | "
+        s += str(i)
+        if i != n - 1:
+            s += separation
+
+    s += "\n" + numeros
+
+    return s
 
 
 class Planche:
     """
     Classe représentant la planche d'un jeu d'Othello.
+
+    Les cases sont conservées dans un bytearray de 64 octets, indicé par ligne * 8 + colonne, qui contient le code de
+    couleur de chaque case (VIDE, NOIR ou BLANC, voir le module piece). Aucun objet Piece n'est conservé: jouer un coup
+    ne fait que changer quelques octets. Les méthodes publiques continuent toutefois de recevoir et de retourner des
+    positions (ligne, colonne) et des couleurs "noir" / "blanc".
+
+    La planche peut aussi avoir une autre taille paire (6x6, 10x10, 16x16...): les cases sont alors indicées par
+    ligne * taille + colonne et les rayons précalculés (voir tables_rayons) sont ceux de cette taille.
     """
+    __slots__ = ("cases", "nb_cases", "frontiere", "coups_legaux", "listes_coups", "nb_noir", "nb_blanc", "nb_vides",
+                 "pile_annulation", "hachage", "motifs", "rayons_par_direction", "rayons", "rayons_retournement",
+                 "voisines", "cles_zobrist", "cles_retournement")
 
-    def __init__(self):
+    def __init__(self, taille=8):
         """
         Méthode spéciale initialisant une nouvelle planche.
+
+        Args:
+            taille: Le nombre de lignes (et de colonnes) de la planche, 8 par défaut (voir valider_taille).
         """
-        # Dictionnaire de cases. La clé est une position (ligne, colonne), et la valeur une instance de la classe Piece.
-        self.cases = {}
+        valider_taille(taille)
 
-        # On joue au Othello 8x8
-        self.nb_cases = 8
+        # On joue au Othello 8x8, à moins qu'une autre taille soit demandée
+        self.nb_cases = taille
+
+        # Rayons et clés de Zobrist de cette taille de planche (voir tables_rayons et zobrist.cles_zobrist).
+        self.rayons_par_direction, self.rayons, self.rayons_retournement, self.voisines = tables_rayons(taille)
+        self.cles_zobrist, self.cles_retournement = cles_zobrist(taille)
+
+        # Code de couleur de chaque case, indicé par ligne * nb_cases + colonne.
+        self.cases = bytearray(self.nb_cases * self.nb_cases)
+
+        # Ensemble des indices des cases vides voisines d'au moins une pièce. Seules ces cases peuvent être des coups
+        # possibles.
+        self.frontiere = set()
+
+        # Indices des coups possibles de chaque couleur (indicés par code de couleur), tenus à jour à chaque
+        # changement de la planche, ainsi que la liste triée de positions retournée par
+        # lister_coups_possibles_de_couleur (None si elle doit être reconstruite).
+        self.coups_legaux = [None, set(), set()]
+        self.listes_coups = [None, None, None]
+
+        # Nombre de pièces de chaque couleur et de cases vides, tenus à jour à chaque coup.
+        self.nb_noir = 0
+        self.nb_blanc = 0
+        self.nb_vides = self.nb_cases * self.nb_cases
+
+        # Pile des coups joués, chacun sous forme d'enregistrement d'annulation (voir faire_coup).
+        self.pile_annulation = []
+
+        # Hachage de Zobrist des pièces de la planche (voir le module zobrist), tenu à jour à chaque coup.
+        self.hachage = 0
+
+        # Indices des motifs de l'évaluation (voir evaluation.IndicesMotifs), tenus à jour à chaque coup s'ils sont
+        # attachés à la planche.
+        self.motifs = None
 
         # Appel de la méthode qui initialise une planche par défaut.
         self.initialiser_planche_par_default()
 
     def get_piece(self, position):
         """
-        Récupère une pièce dans la planche.
+        Récupère une pièce dans la planche. La pièce est construite à la demande à partir du code de la case: la
+        modifier n'a donc aucun effet sur la planche.
 
         Args:
             position: La position où récupérer la pièce, un tuple de coordonnées matricielles (ligne, colonne).
@@ -29,8 +186,10 @@ class Planche:
         Returns:
             La pièce à cette position s'il y en a une, None autrement.
         """
-        if self.position_valide(position) and self.cases[position] is not None:
-            return self.cases[position]
+        if self.position_valide(position):
+            code = self.cases[position[0] * self.nb_cases + position[1]]
+            if code != VIDE:
+                return Piece(COULEURS[code])
         return None
 
     def position_valide(self, position):
@@ -43,7 +202,7 @@ class Planche:
         Returns:
             True si la position est valide, False autrement
         """
-        return 0 <= position[0] <= 7 and 0 <= position[1] <= 7  # va retourner un booleen
+        return 0 <= position[0] < self.nb_cases and 0 <= position[1] < self.nb_cases  # va retourner un booleen
 
     def obtenir_positions_mangees(self, position, couleur):
         """
@@ -70,16 +229,8 @@ class Planche:
         Returns:
             une liste contenant toutes les positions qui seraient mangées par le coup.
         """
-        
-        # Liste des 8 directions (sens horaire)
-        liste_directions = [(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)]
-
-        # Liste des positions que le coup va manger
-        liste_positions_mangees = []
-
-        for direction in liste_directions:
-            liste_positions_mangees.extend(self.obtenir_positions_mangees_direction(couleur, direction, position))
-        return liste_positions_mangees
+        indices = self.indices_manges(position[0] * self.nb_cases + position[1], CODES_COULEUR[couleur])
+        return [divmod(indice, self.nb_cases) for indice in indices]
 
     def obtenir_positions_mangees_direction(self, couleur, direction, position):
         """
@@ -113,31 +264,93 @@ class Planche:
         """
         x, y = position
         x_direction, y_direction = direction
-        autre_couleur = "noir" if couleur == "blanc" else "blanc"
-        liste_positions_mangees_direction = []
-
-        # On recupere toutes les pieces qui vont possiblement etre mangées
-        while self.position_valide((x + x_direction, y + y_direction)) and self.cases[(x + x_direction, y + y_direction)] is not None and self.cases[(x + x_direction, y + y_direction)].couleur == autre_couleur:
-            x += x_direction
-            y += y_direction
-            liste_positions_mangees_direction.append((x, y))   
-        
-        # On vérifie qu'elles soient bien encerclées par deux pieces de la meme couleur
-        encercle = False
-        if len(liste_positions_mangees_direction) > 0:
-            if self.position_valide((x + x_direction, y + y_direction)) and self.cases[(x + x_direction, y + y_direction)] is not None and self.cases[(x + x_direction, y + y_direction)].couleur == couleur:
-                encercle = True
-            
-        if not encercle:
-            liste_positions_mangees_direction.clear()
-
-        return liste_positions_mangees_direction
+        nombre = self.compter_mangees_direction(x, y, CODES_COULEUR[couleur], x_direction, y_direction)
+        return [(x + k * x_direction, y + k * y_direction) for k in range(1, nombre + 1)]
 
+    def compter_mangees_direction(self, x, y, code, x_direction, y_direction):
+        """
+        Compte les pièces mangées dans une direction par un coup du code de couleur "code" joué en (x, y), sans
+        construire de liste: les pièces mangées sont les "nombre" cases qui suivent (x, y) dans la direction.
+
+        Args:
+            x: La ligne du coup évalué.
+            y: La colonne du coup évalué.
+            code: Le code de couleur du coup évalué (NOIR ou BLANC).
+            x_direction: Le déplacement en ligne de la direction.
+            y_direction: Le déplacement en colonne de la direction.
+
+        Returns:
+            Le nombre de pièces mangées dans cette direction (0 si aucune).
+        """
+        cases = self.cases
+        rayon = self.rayons_par_direction[x * self.nb_cases + y][DIRECTIONS.index((x_direction, y_direction))]
+        autre_code = 3 - code
+
+        # On avance tant qu'on est sur une pièce adverse. Les pièces sont mangées seulement si elles sont encerclées
+        # par une pièce de la couleur du coup.
+        for nombre, indice in enumerate(rayon):
+            if cases[indice] != autre_code:
+                return nombre if cases[indice] == code else 0
+        return 0
+
+    def indices_manges(self, indice, code):
+        """
+        Détermine les indices des cases mangées si un coup du code de couleur "code" est joué sur la case "indice".
+
+        Args:
+            indice: L'indice (ligne * nb_cases + colonne) de la case jouée.
+            code: Le code de couleur du coup (NOIR ou BLANC).
+
+        Returns:
+            La liste (peut-être vide) des indices des cases mangées.
+        """
+        cases = self.cases
+        autre_code = 3 - code
+        indices = []
+        for rayon in self.rayons_retournement[indice]:
+            # Un rayon dont la première case n'est pas adverse ne mange rien: on ne le parcourt pas
+            if cases[rayon[0]] != autre_code:
+                continue
+            for nombre in range(1, len(rayon)):
+                code_case = cases[rayon[nombre]]
+                if code_case != autre_code:
+                    if code_case == code:
+                        indices.extend(rayon[:nombre])
+                    break
+        return indices
+
+    def mange_au_moins_une(self, indice, code):
+        """
+        Détermine si un coup du code de couleur "code" sur la case "indice" mange au moins une pièce. Le parcours
+        s'arrête à la première direction qui mange.
+
+        Args:
+            indice: L'indice (ligne * nb_cases + colonne) de la case jouée.
+            code: Le code de couleur du coup (NOIR ou BLANC).
+
+        Returns:
+            True si au moins une pièce est mangée, False autrement.
+        """
+        cases = self.cases
+        autre_code = 3 - code
+        for rayon in self.rayons_retournement[indice]:
+            if cases[rayon[0]] != autre_code:
+                continue
+            for nombre in range(1, len(rayon)):
+                code_case = cases[rayon[nombre]]
+                if code_case != autre_code:
+                    if code_case == code:
+                        return True
+                    break
+        return False
 
     def coup_est_possible(self, position, couleur):
         """
         Détermine si un coup est possible. Un coup est possible si au moins une pièce est mangée par celui-ci. ET SI LA POSITION NEST PAS DEJA PRISE
 
+        Les coups possibles de chaque couleur sont tenus à jour par jouer_coup (voir mettre_a_jour_coups), il suffit
+        donc de vérifier l'appartenance à cet ensemble.
+
         Args:
             position: La position du coup évalué
             couleur: La couleur du coup évalué
@@ -145,10 +358,9 @@ class Planche:
         Returns:
             True, si le coup est valide, False sinon
         """
-
-        return len(self.obtenir_positions_mangees(position,couleur)) > 0 and type(self.cases[position]) is not Piece
-
-
+        if not self.position_valide(position):
+            return False
+        return position[0] * self.nb_cases + position[1] in self.coups_legaux[CODES_COULEUR[couleur]]
 
     def lister_coups_possibles_de_couleur(self, couleur):
         """
@@ -161,15 +373,174 @@ class Planche:
             couleur: La couleur ("blanc", "noir") des pièces dont on considère le déplacement, un string
 
         Returns:
-            Une liste de positions de coups possibles pour la couleur "couleur"
+            Une liste de positions de coups possibles pour la couleur "couleur", dans l'ordre des lignes.
+        """
+        # La liste n'est reconstruite que si un coup a changé les coups possibles de cette couleur depuis le dernier
+        # appel. On en retourne une copie pour que l'appelant puisse la modifier sans corrompre la planche.
+        code = CODES_COULEUR[couleur]
+        if self.listes_coups[code] is None:
+            self.listes_coups[code] = [divmod(indice, self.nb_cases) for indice in sorted(self.coups_legaux[code])]
+        return list(self.listes_coups[code])
+
+    def est_frontiere(self, indice):
+        """
+        Détermine si une case vide touche au moins une pièce (seules ces cases peuvent être des coups possibles).
+
+        Args:
+            indice: L'indice de la case vide.
+
+        Returns:
+            True si une des 8 cases voisines est occupée, False autrement.
         """
-        coups_possible = []
-        for case in self.cases:      
-            # Si il y a des coups possibles pour cette case                           
-            if self.coup_est_possible((case[0], case[1]), couleur):
-                coups_possible.append((case[0], case[1]))            
+        cases = self.cases
+        for voisine in self.voisines[indice]:
+            if cases[voisine] != VIDE:
+                return True
+        return False
 
-        return coups_possible
+    def mettre_a_jour_coups(self, indices_modifies):
+        """
+        Met à jour la frontière et les coups possibles des deux couleurs après la modification de quelques cases.
+
+        Seule une case vide située sur un rayon partant d'une case modifiée peut voir ses coups changer: on parcourt
+        donc chaque rayon depuis les cases modifiées jusqu'à la première case vide (ou le bord), et on ne réévalue
+        que ces cases-là, plutôt que toutes les cases de la planche.
+
+        Args:
+            indices_modifies: Les indices des cases dont le contenu vient de changer.
+        """
+        cases = self.cases
+        rayons = self.rayons
+        legaux_noir = self.coups_legaux[NOIR]
+        legaux_blanc = self.coups_legaux[BLANC]
+
+        a_verifier = set()
+        for indice in indices_modifies:
+            if cases[indice] == VIDE:
+                a_verifier.add(indice)
+            else:
+                self.frontiere.discard(indice)
+                legaux_noir.discard(indice)
+                legaux_blanc.discard(indice)
+
+            for rayon in rayons[indice]:
+                for voisine in rayon:
+                    if cases[voisine] == VIDE:
+                        a_verifier.add(voisine)
+                        break
+
+        for indice in a_verifier:
+            if self.est_frontiere(indice):
+                self.frontiere.add(indice)
+                if self.mange_au_moins_une(indice, NOIR):
+                    legaux_noir.add(indice)
+                else:
+                    legaux_noir.discard(indice)
+                if self.mange_au_moins_une(indice, BLANC):
+                    legaux_blanc.add(indice)
+                else:
+                    legaux_blanc.discard(indice)
+            else:
+                self.frontiere.discard(indice)
+                legaux_noir.discard(indice)
+                legaux_blanc.discard(indice)
+
+        self.listes_coups[NOIR] = None
+        self.listes_coups[BLANC] = None
+
+    def recalculer_coups(self):
+        """
+        Reconstruit entièrement la frontière et les coups possibles, après une réinitialisation de la planche.
+        """
+        self.frontiere.clear()
+        self.coups_legaux[NOIR].clear()
+        self.coups_legaux[BLANC].clear()
+        self.mettre_a_jour_coups([indice for indice, code in enumerate(self.cases) if code != VIDE])
+
+    def faire_coup(self, position, couleur):
+        """
+        Joue une pièce de la couleur "couleur" à la position "position" et empile l'enregistrement d'annulation du coup.
+
+        L'enregistrement est un tuple (indice, code de couleur, indices mangés): il suffit à annuler_coup pour remettre
+        la planche dans son état précédent en ne touchant qu'aux cases modifiées.
+
+        Args:
+            position: La position du coup.
+            couleur: La couleur du coup.
+
+        Returns:
+            L'enregistrement d'annulation si le coup est valide, None autrement.
+        """
+        if not self.coup_est_possible(position, couleur):
+            return None
+
+        code = CODES_COULEUR[couleur]
+        indice = position[0] * self.nb_cases + position[1]
+        indices_manges = self.indices_manges(indice, code)
+
+        # On pose la piece et on retourne les pieces mangées
+        cases = self.cases
+        cases[indice] = code
+        hachage = self.hachage ^ self.cles_zobrist[code][indice]
+        cles_retournement = self.cles_retournement
+        for i in indices_manges:
+            cases[i] = code
+            hachage ^= cles_retournement[i]
+        self.hachage = hachage
+
+        if code == NOIR:
+            self.nb_noir += len(indices_manges) + 1
+            self.nb_blanc -= len(indices_manges)
+        else:
+            self.nb_blanc += len(indices_manges) + 1
+            self.nb_noir -= len(indices_manges)
+        self.nb_vides -= 1
+
+        enregistrement = (indice, code, tuple(indices_manges))
+        self.pile_annulation.append(enregistrement)
+        if self.motifs is not None:
+            self.motifs.faire_coup(indice, code, indices_manges)
+
+        # Seuls les rayons touchés par le coup sont réévalués
+        indices_manges.append(indice)
+        self.mettre_a_jour_coups(indices_manges)
+        return enregistrement
+
+    def annuler_coup(self):
+        """
+        Annule le dernier coup joué (voir faire_coup) en ne remettant que les cases qu'il avait modifiées.
+
+        Returns:
+            L'enregistrement d'annulation du coup annulé, ou None si aucun coup n'a été joué.
+        """
+        if not self.pile_annulation:
+            return None
+
+        enregistrement = self.pile_annulation.pop()
+        indice, code, indices_manges = enregistrement
+
+        cases = self.cases
+        cases[indice] = VIDE
+        hachage = self.hachage ^ self.cles_zobrist[code][indice]
+        cles_retournement = self.cles_retournement
+        autre_code = 3 - code
+        for i in indices_manges:
+            cases[i] = autre_code
+            hachage ^= cles_retournement[i]
+        self.hachage = hachage
+
+        if code == NOIR:
+            self.nb_noir -= len(indices_manges) + 1
+            self.nb_blanc += len(indices_manges)
+        else:
+            self.nb_blanc -= len(indices_manges) + 1
+            self.nb_noir += len(indices_manges)
+        self.nb_vides += 1
+        if self.motifs is not None:
+            self.motifs.annuler_coup(indice, code, indices_manges)
+
+        self.mettre_a_jour_coups(indices_manges + (indice,))
+        return enregistrement
 
     def jouer_coup(self, position, couleur):
         """
@@ -183,6 +554,8 @@ class Planche:
         ATTENTION: Ne dupliquez pas de code! Vous savez déjà qu'un coup est valide si au moins une pièce est mangée
                    par celui-ci. Vous avez une méthode qui fait exactement ce travail à programmer !
 
+        Le coup est empilé et peut être annulé par annuler_coup.
+
         Args:
             position: La position du coup.
         couleur: La couleur du coup.
@@ -191,13 +564,7 @@ class Planche:
             "ok" si le déplacement a été effectué car il est valide, "erreur" autrement.
         """
 
-        if self.coup_est_possible(position,couleur):
-        # On pose la piece
-            self.cases[(position[0],position[1])] = Piece(couleur)
-            # On retourne les pieces mangées
-            positions_mangees = self.obtenir_positions_mangees(position, couleur)
-            for pos in positions_mangees:
-                self.get_piece(pos).echange_couleur()
+        if self.faire_coup(position, couleur) is not None:
             return "ok"
         return "erreur"
 
@@ -212,22 +579,17 @@ class Planche:
         Returns:
             La chaîne de caractères.
         """
-
-        # dictionaire { "key" : "value"}
-        # planche {"position" : "piece"}
-
-
         chaine = ""
-        # On regarde les items du dictionnaires sous forme de tuple (key,value) = (position,piece)
-        # rappel notre
-        for position, piece in self.cases.items():
-            if type(piece) is Piece:
-                chaine += str(position[0]) + ',' # on ajoute ',' car on veut format ligne,colonne,couleur
-                chaine += str(position[1]) + ','
-                chaine += piece.couleur
+        # On parcourt les cases dans l'ordre des lignes, en ne gardant que les cases occupées
+        for indice, code in enumerate(self.cases):
+            if code != VIDE:
+                ligne, colonne = divmod(indice, self.nb_cases)
+                chaine += str(ligne) + ',' # on ajoute ',' car on veut format ligne,colonne,couleur
+                chaine += str(colonne) + ','
+                chaine += COULEURS[code]
                 chaine += "\n"
         return chaine
-            
+
     def charger_dune_chaine(self, chaine):
         """
         Remplit la planche à partir d'une chaîne de caractères comportant l'information d'une pièce sur chaque ligne.
@@ -238,45 +600,93 @@ class Planche:
             chaine: La chaîne de caractères, un string.
         """
         info_chaine = chaine.split(",")
-        self.cases[(int(info_chaine[0]), int(info_chaine[1]))] = Piece(info_chaine[2])
+        assert info_chaine[2] in ["blanc", "noir"], "Piece: couleur invalide."
+        indice = int(info_chaine[0]) * self.nb_cases + int(info_chaine[1])
+        code = CODES_COULEUR[info_chaine[2]]
+
+        # La ligne peut remplacer une pièce déjà présente (celles de la position initiale, par exemple)
+        ancien_code = self.cases[indice]
+        if ancien_code == VIDE:
+            self.nb_vides -= 1
+        elif ancien_code == NOIR:
+            self.nb_noir -= 1
+            self.hachage ^= self.cles_zobrist[NOIR][indice]
+        else:
+            self.nb_blanc -= 1
+            self.hachage ^= self.cles_zobrist[BLANC][indice]
+        self.hachage ^= self.cles_zobrist[code][indice]
+        if code == NOIR:
+            self.nb_noir += 1
+        else:
+            self.nb_blanc += 1
+
+        self.cases[indice] = code
+        self.mettre_a_jour_coups([indice])
 
     def initialiser_planche_par_default(self):
         """
-        Initialise une planche de base avec la position initiale des pièces.
+        Initialise une planche de base avec la position initiale des pièces, sur les 4 cases du centre.
         """
-        self.cases.clear()
         self.remplirCasesDeNone()
-        self.cases[(3, 3)] = Piece("blanc")
-        self.cases[(3, 4)] = Piece("noir")
-        self.cases[(4, 3)] = Piece("noir")
-        self.cases[(4, 4)] = Piece("blanc")
+        centre = self.nb_cases // 2
+        self.cases[(centre - 1) * self.nb_cases + centre - 1] = BLANC
+        self.cases[(centre - 1) * self.nb_cases + centre] = NOIR
+        self.cases[centre * self.nb_cases + centre - 1] = NOIR
+        self.cases[centre * self.nb_cases + centre] = BLANC
+        self.pile_annulation.clear()
+        self.compter_pieces()
+        self.recalculer_hachage()
+        self.recalculer_coups()
+
+    def charger_bitboards(self, noir, blanc):
+        """
+        Remplace toutes les pièces de la planche par une position complète, donnée par ses bitboards (un bit par case,
+        indicé par ligne * nb_cases + colonne). Les compteurs, le hachage et les coups possibles sont recalculés, la
+        pile d'annulation est vidée et les indices des motifs sont détachés (voir IndicesMotifs.attacher).
+
+        Args:
+            noir: Le bitboard des pièces noires.
+            blanc: Le bitboard des pièces blanches.
+        """
+        self.remplirCasesDeNone()
+        for bitboard, code in ((noir, NOIR), (blanc, BLANC)):
+            while bitboard:
+                bit = bitboard & -bitboard
+                self.cases[bit.bit_length() - 1] = code
+                bitboard ^= bit
+        self.pile_annulation.clear()
+        self.motifs = None
+        self.compter_pieces()
+        self.recalculer_hachage()
+        self.recalculer_coups()
+
+    def compter_pieces(self):
+        """
+        Recompte les pièces de chaque couleur et les cases vides, après une modification directe des cases.
+        """
+        self.nb_noir = self.cases.count(NOIR)
+        self.nb_blanc = self.cases.count(BLANC)
+        self.nb_vides = self.cases.count(VIDE)
+
+    def recalculer_hachage(self):
+        """
+        Recalcule le hachage de Zobrist de la planche à partir de toutes ses cases.
+        """
+        self.hachage = 0
+        for indice, code in enumerate(self.cases):
+            if code != VIDE:
+                self.hachage ^= self.cles_zobrist[code][indice]
 
     def remplirCasesDeNone(self):
         """
-        Rempli la planche de None afin d'eviter les keyError et faciliter le parcourt
+        Vide toutes les cases de la planche.
         """
-        for i in range(self.nb_cases):
-            for j in range(self.nb_cases):
-                self.cases[(i, j)] = None
+        self.cases[:] = bytes(self.nb_cases * self.nb_cases)
 
     def __repr__(self):
         """
         Cette méthode spéciale permet de modifier le comportement d'une instance de la classe Planche pour l'affichage.
-        Faire un print(une_planche) affichera la planche à l'écran. 
+        Faire un print(une_planche) affichera la planche à l'écran.
         Legere modification pour prendre en compte les None
         """
-        s = "  +-0-+-1-+-2-+-3-+-4-+-5-+-6-+-7-+\n"
-        for i in range(0, self.nb_cases):
-            s += str(i)+" | "
-            for j in range(0, self.nb_cases):
-                if ((i, j) in self.cases and self.cases[(i, j)] is not None):
-                    s += str(self.cases[(i, j)])+" | "
-                else:
-                    s += "  | "
-            s += str(i)
-            if i != self.nb_cases - 1:
-                s += "\n  +---+---+---+---+---+---+---+---+\n"
-
-        s += "\n  +-0-+-1-+-2-+-3-+-4-+-5-+-6-+-7-+\n"
-
-        return s
\ No newline at end of file
+        return dessiner_planche(self)
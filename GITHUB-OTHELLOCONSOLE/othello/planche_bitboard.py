@@ -0,0 +1,628 @@
+from othello.piece import Piece, NOIR, BLANC
+from othello.planche import valider_taille, dessiner_planche
+from othello.zobrist import cles_zobrist, hacher_bitboards
+
+# Un bitboard est un entier de 64 bits où le bit (ligne * 8 + colonne) vaut 1 si une pièce occupe la case.
+PLANCHE_PLEINE = 0xFFFFFFFFFFFFFFFF
+
+# Masques retirant les cases qui "débordent" d'une rangée à l'autre lors d'un décalage horizontal.
+SANS_COLONNE_0 = 0xFEFEFEFEFEFEFEFE
+SANS_COLONNE_7 = 0x7F7F7F7F7F7F7F7F
+
+# Pour chacune des 8 directions (ligne, colonne): le décalage de bits correspondant et le masque à appliquer.
+DIRECTIONS = [
+    (1, SANS_COLONNE_0),    # (0, 1)
+    (9, SANS_COLONNE_0),    # (1, 1)
+    (8, PLANCHE_PLEINE),    # (1, 0)
+    (7, SANS_COLONNE_7),    # (1, -1)
+    (-1, SANS_COLONNE_7),   # (0, -1)
+    (-9, SANS_COLONNE_7),   # (-1, -1)
+    (-8, PLANCHE_PLEINE),   # (-1, 0)
+    (-7, SANS_COLONNE_0),   # (-1, 1)
+]
+
+
+def decaler(bitboard, decalage, masque):
+    """
+    Décale toutes les pièces d'un bitboard d'une case dans une direction.
+
+    Args:
+        bitboard: Le bitboard à décaler, un entier.
+        decalage: Le décalage de bits de la direction (voir DIRECTIONS).
+        masque: Le masque de la direction, qui retire les pièces sorties de la planche.
+
+    Returns:
+        Le bitboard décalé.
+    """
+    if decalage > 0:
+        return (bitboard << decalage) & masque & PLANCHE_PLEINE
+    return (bitboard >> -decalage) & masque
+
+
+def masque_coups_possibles(joueur, adversaire):
+    """
+    Calcule, pour toutes les cases en même temps, les coups possibles du joueur.
+
+    Pour chaque direction, on propage les pièces du joueur à travers les pièces adverses contiguës (au plus 6 cases),
+    puis on garde les cases vides atteintes juste après.
+
+    Args:
+        joueur: Le bitboard des pièces du joueur qui doit jouer.
+        adversaire: Le bitboard des pièces de l'adversaire.
+
+    Returns:
+        Un bitboard où chaque bit à 1 est un coup possible.
+    """
+    vides = ~(joueur | adversaire) & PLANCHE_PLEINE
+    coups = 0
+    for decalage, masque in DIRECTIONS:
+        x = decaler(joueur, decalage, masque) & adversaire
+        x |= decaler(x, decalage, masque) & adversaire
+        x |= decaler(x, decalage, masque) & adversaire
+        x |= decaler(x, decalage, masque) & adversaire
+        x |= decaler(x, decalage, masque) & adversaire
+        x |= decaler(x, decalage, masque) & adversaire
+        coups |= decaler(x, decalage, masque) & vides
+    return coups
+
+
+def masque_retournements(indice, joueur, adversaire):
+    """
+    Calcule les pièces adverses retournées si le joueur pose une pièce sur la case "indice".
+
+    Args:
+        indice: L'indice (ligne * 8 + colonne) de la case jouée.
+        joueur: Le bitboard des pièces du joueur qui joue.
+        adversaire: Le bitboard des pièces de l'adversaire.
+
+    Returns:
+        Le bitboard des pièces retournées (0 si le coup ne mange rien).
+    """
+    retournees = 0
+    depart = 1 << indice
+    for decalage, masque in DIRECTIONS:
+        direction = 0
+        x = decaler(depart, decalage, masque)
+        while x & adversaire:
+            direction |= x
+            x = decaler(x, decalage, masque)
+        if x & joueur:
+            retournees |= direction
+    return retournees
+
+
+class GeometrieBitboard:
+    """
+    Décalages et masques des bitboards d'une planche n x n: des entiers de n * n bits, où le bit (ligne * n + colonne)
+    vaut 1 si une pièce occupe la case. Python gère les entiers de toute taille, les fonctions du module se
+    généralisent donc telles quelles.
+
+    La recherche garde les fonctions du module, qui ne traitent que des entiers de 64 bits.
+    """
+
+    def __init__(self, n):
+        """
+        Méthode spéciale calculant les masques d'une taille de planche.
+
+        Args:
+            n: Le nombre de lignes (et de colonnes) de la planche.
+        """
+        self.n = n
+        self.pleine = (1 << (n * n)) - 1
+        colonne_0 = sum(1 << (ligne * n) for ligne in range(n))
+        sans_colonne_0 = self.pleine & ~colonne_0
+        sans_derniere_colonne = self.pleine & ~(colonne_0 << (n - 1))
+
+        # Mêmes directions, dans le même ordre, que DIRECTIONS
+        self.directions = [
+            (1, sans_colonne_0),
+            (n + 1, sans_colonne_0),
+            (n, self.pleine),
+            (n - 1, sans_derniere_colonne),
+            (-1, sans_derniere_colonne),
+            (-n - 1, sans_derniere_colonne),
+            (-n, self.pleine),
+            (-n + 1, sans_colonne_0),
+        ]
+
+    def masque_coups_possibles(self, joueur, adversaire):
+        """
+        Calcule les coups possibles du joueur, comme masque_coups_possibles. La propagation à travers les pièces
+        adverses s'arrête dès qu'elle n'avance plus plutôt qu'après un nombre fixe de cases, qui grandirait avec n.
+
+        Args:
+            joueur: Le bitboard des pièces du joueur qui doit jouer.
+            adversaire: Le bitboard des pièces de l'adversaire.
+
+        Returns:
+            Un bitboard où chaque bit à 1 est un coup possible.
+        """
+        vides = ~(joueur | adversaire) & self.pleine
+        coups = 0
+        for decalage, masque in self.directions:
+            if decalage > 0:
+                x = (joueur << decalage) & masque & adversaire
+                while x:
+                    suivant = x | ((x << decalage) & masque & adversaire)
+                    if suivant == x:
+                        break
+                    x = suivant
+                coups |= (x << decalage) & masque & vides
+            else:
+                x = (joueur >> -decalage) & masque & adversaire
+                while x:
+                    suivant = x | ((x >> -decalage) & masque & adversaire)
+                    if suivant == x:
+                        break
+                    x = suivant
+                coups |= (x >> -decalage) & masque & vides
+        return coups
+
+    def masque_retournements(self, indice, joueur, adversaire):
+        """
+        Calcule les pièces adverses retournées si le joueur pose une pièce sur la case "indice", comme
+        masque_retournements.
+
+        Args:
+            indice: L'indice (ligne * n + colonne) de la case jouée.
+            joueur: Le bitboard des pièces du joueur qui joue.
+            adversaire: Le bitboard des pièces de l'adversaire.
+
+        Returns:
+            Le bitboard des pièces retournées (0 si le coup ne mange rien).
+        """
+        # Pas de decaler() ici: son masque PLANCHE_PLEINE couperait les bitboards de plus de 64 bits
+        retournees = 0
+        depart = 1 << indice
+        for decalage, masque in self.directions:
+            direction = 0
+            if decalage > 0:
+                x = (depart << decalage) & masque
+                while x & adversaire:
+                    direction |= x
+                    x = (x << decalage) & masque
+            else:
+                x = (depart >> -decalage) & masque
+                while x & adversaire:
+                    direction |= x
+                    x = (x >> -decalage) & masque
+            if x & joueur:
+                retournees |= direction
+        return retournees
+
+
+# Géométries de chaque taille de planche (voir geometrie_bitboard).
+_GEOMETRIES = {}
+
+
+def geometrie_bitboard(n):
+    """
+    Retourne la GeometrieBitboard d'une planche n x n, calculée à la première demande puis conservée.
+
+    Args:
+        n: Le nombre de lignes (et de colonnes) de la planche.
+
+    Returns:
+        La GeometrieBitboard.
+    """
+    geometrie = _GEOMETRIES.get(n)
+    if geometrie is None:
+        geometrie = _GEOMETRIES[n] = GeometrieBitboard(n)
+    return geometrie
+
+
+def indices_du_masque(masque):
+    """
+    Énumère les indices des bits à 1 d'un bitboard, du plus petit au plus grand.
+
+    Args:
+        masque: Le bitboard à parcourir.
+
+    Returns:
+        Un générateur d'indices (ligne * 8 + colonne).
+    """
+    while masque:
+        bit = masque & -masque
+        yield bit.bit_length() - 1
+        masque ^= bit
+
+
+class PlancheBitboard:
+    """
+    Planche d'Othello représentée par deux bitboards de 64 bits, un pour les pièces noires et un pour les blanches.
+
+    Elle offre les mêmes méthodes publiques que la classe Planche, de sorte qu'une Partie peut utiliser l'une ou
+    l'autre sans modification. La génération de coups et les retournements se font par décalages et masques de bits
+    plutôt que par des parcours case par case. Sur une planche d'une autre taille, les bitboards sont des entiers de
+    taille * taille bits (voir GeometrieBitboard).
+    """
+
+    def __init__(self, taille=8):
+        """
+        Méthode spéciale initialisant une nouvelle planche.
+
+        Args:
+            taille: Le nombre de lignes (et de colonnes) de la planche, 8 par défaut (voir planche.valider_taille).
+        """
+        valider_taille(taille)
+        self.noir = 0
+        self.blanc = 0
+
+        # On joue au Othello 8x8, à moins qu'une autre taille soit demandée
+        self.nb_cases = taille
+
+        # Génération de coups et clés de Zobrist de cette taille de planche (voir GeometrieBitboard).
+        geometrie = geometrie_bitboard(taille)
+        self.masque_coups_possibles = geometrie.masque_coups_possibles
+        self.masque_retournements = geometrie.masque_retournements
+        self.cles_zobrist, self.cles_retournement = cles_zobrist(taille)
+
+        # Dernier coup vérifié par coup_est_possible: (indice, couleur, bitboard noir, bitboard blanc, pièces
+        # mangées), ou None. La partie vérifie le coup choisi par l'usager avant de le jouer: faire_coup réutilise alors
+        # les pièces mangées plutôt que de les recalculer.
+        self.coup_verifie = None
+
+        # Pile des coups joués, chacun sous forme d'enregistrement d'annulation (voir faire_coup).
+        self.pile_annulation = []
+
+        # Hachage de Zobrist des pièces de la planche (voir le module zobrist), tenu à jour à chaque coup.
+        self.hachage = 0
+
+        # Indices des motifs de l'évaluation (voir evaluation.IndicesMotifs), tenus à jour à chaque coup s'ils sont
+        # attachés à la planche.
+        self.motifs = None
+
+        # Appel de la méthode qui initialise une planche par défaut.
+        self.initialiser_planche_par_default()
+
+    @property
+    def cases(self):
+        """
+        Vue de compatibilité avec Planche.cases: un dictionnaire (ligne, colonne) -> Piece ou None, construit à la
+        demande. Elle ne doit servir qu'à la lecture, les modifications ne sont pas reportées dans les bitboards.
+        """
+        return {(i, j): self.get_piece((i, j)) for i in range(self.nb_cases) for j in range(self.nb_cases)}
+
+    @property
+    def nb_noir(self):
+        """
+        Le nombre de pièces noires sur la planche.
+        """
+        return self.noir.bit_count()
+
+    @property
+    def nb_blanc(self):
+        """
+        Le nombre de pièces blanches sur la planche.
+        """
+        return self.blanc.bit_count()
+
+    @property
+    def nb_vides(self):
+        """
+        Le nombre de cases vides sur la planche.
+        """
+        return self.nb_cases * self.nb_cases - (self.noir | self.blanc).bit_count()
+
+    def bitboards(self, couleur):
+        """
+        Retourne les bitboards dans l'ordre (joueur, adversaire) pour la couleur donnée.
+
+        Args:
+            couleur: La couleur du joueur, "blanc" ou "noir".
+
+        Returns:
+            Un couple (bitboard du joueur, bitboard de l'adversaire).
+        """
+        if couleur == "noir":
+            return self.noir, self.blanc
+        return self.blanc, self.noir
+
+    def retournements(self, indice, couleur):
+        """
+        Retourne les pièces mangées par un coup, celles du dernier coup vérifié s'il s'agit du même coup sur la même
+        position (voir coup_verifie).
+
+        Args:
+            indice: L'indice de la case jouée, qui doit être vide.
+            couleur: La couleur du coup.
+
+        Returns:
+            Le bitboard des pièces mangées.
+        """
+        verifie = self.coup_verifie
+        if (verifie is not None and verifie[0] == indice and verifie[1] == couleur and verifie[2] == self.noir
+                and verifie[3] == self.blanc):
+            return verifie[4]
+        joueur, adversaire = self.bitboards(couleur)
+        return self.masque_retournements(indice, joueur, adversaire)
+
+    def get_piece(self, position):
+        """
+        Récupère une pièce dans la planche. La pièce est construite à la demande à partir des bitboards.
+
+        Args:
+            position: La position où récupérer la pièce, un tuple de coordonnées matricielles (ligne, colonne).
+
+        Returns:
+            La pièce à cette position s'il y en a une, None autrement.
+        """
+        if not self.position_valide(position):
+            return None
+        bit = 1 << (position[0] * self.nb_cases + position[1])
+        if self.noir & bit:
+            return Piece("noir")
+        if self.blanc & bit:
+            return Piece("blanc")
+        return None
+
+    def position_valide(self, position):
+        """
+        Vérifie si une position est valide (chaque coordonnée doit être dans les bornes).
+
+        Args:
+            position: Un couple (ligne, colonne), tuple de deux éléments.
+
+        Returns:
+            True si la position est valide, False autrement
+        """
+        return 0 <= position[0] < self.nb_cases and 0 <= position[1] < self.nb_cases
+
+    def obtenir_positions_mangees(self, position, couleur):
+        """
+        Détermine quelles positions seront mangées si un coup de la couleur passée est joué à la position passée.
+
+        Args:
+            position: La position du coup à jouer.
+            couleur: La couleur du coup à jouer.
+
+        Returns:
+            une liste contenant toutes les positions qui seraient mangées par le coup.
+        """
+        retournees = self.retournements(position[0] * self.nb_cases + position[1], couleur)
+        return [divmod(indice, self.nb_cases) for indice in indices_du_masque(retournees)]
+
+    def obtenir_positions_mangees_direction(self, couleur, direction, position):
+        """
+        Détermine les positions qui seront mangées si un coup de couleur "couleur" est joué à la position "position",
+        si on parcourt la planche dans une direction "direction".
+
+        Args:
+            couleur: La couleur du coup évalué
+            direction: La direction de parcours évaluée
+            position: La position du coup évalué
+
+        Returns:
+            La liste (peut-être vide) de toutes les positions mangées à partir du coup et de la direction donnés.
+        """
+        joueur, adversaire = self.bitboards(couleur)
+        x, y = position
+        positions = []
+        while True:
+            x += direction[0]
+            y += direction[1]
+            if not self.position_valide((x, y)):
+                return []
+            bit = 1 << (x * self.nb_cases + y)
+            if adversaire & bit:
+                positions.append((x, y))
+            elif joueur & bit:
+                return positions
+            else:
+                return []
+
+    def coup_est_possible(self, position, couleur):
+        """
+        Détermine si un coup est possible. Un coup est possible si la case est libre et qu'au moins une pièce est
+        mangée par celui-ci.
+
+        Args:
+            position: La position du coup évalué
+            couleur: La couleur du coup évalué
+
+        Returns:
+            True, si le coup est valide, False sinon
+        """
+        if not self.position_valide(position):
+            return False
+        indice = position[0] * self.nb_cases + position[1]
+        if (self.noir | self.blanc) >> indice & 1:
+            return False
+        retournees = self.retournements(indice, couleur)
+        self.coup_verifie = (indice, couleur, self.noir, self.blanc, retournees)
+        return retournees != 0
+
+    def lister_coups_possibles_de_couleur(self, couleur):
+        """
+        Fonction retournant la liste des coups possibles d'une certaine couleur.
+
+        Args:
+            couleur: La couleur ("blanc", "noir") des pièces dont on considère le déplacement, un string
+
+        Returns:
+            Une liste de positions de coups possibles pour la couleur "couleur", dans l'ordre des lignes.
+        """
+        joueur, adversaire = self.bitboards(couleur)
+        return [divmod(indice, self.nb_cases) for indice in indices_du_masque(self.masque_coups_possibles(joueur, adversaire))]
+
+    def faire_coup(self, position, couleur):
+        """
+        Joue une pièce de la couleur "couleur" à la position "position" et empile l'enregistrement d'annulation du coup.
+
+        L'enregistrement est un tuple (position, couleur, bitboard des pièces mangées).
+
+        Args:
+            position: La position du coup.
+            couleur: La couleur du coup.
+
+        Returns:
+            L'enregistrement d'annulation si le coup est valide, None autrement.
+        """
+        if not self.position_valide(position):
+            return None
+        indice = position[0] * self.nb_cases + position[1]
+        if (self.noir | self.blanc) >> indice & 1:
+            return None
+        retournees = self.retournements(indice, couleur)
+        if not retournees:
+            return None
+        joueur, adversaire = self.bitboards(couleur)
+
+        joueur |= retournees | (1 << indice)
+        adversaire &= ~retournees
+        if couleur == "noir":
+            self.noir, self.blanc = joueur, adversaire
+            self.hachage ^= self.cles_zobrist[NOIR][indice]
+        else:
+            self.blanc, self.noir = joueur, adversaire
+            self.hachage ^= self.cles_zobrist[BLANC][indice]
+        self.retourner_hachage(retournees)
+        if self.motifs is not None:
+            self.motifs.faire_coup(indice, NOIR if couleur == "noir" else BLANC, indices_du_masque(retournees))
+
+        enregistrement = ((position[0], position[1]), couleur, retournees)
+        self.pile_annulation.append(enregistrement)
+        return enregistrement
+
+    def annuler_coup(self):
+        """
+        Annule le dernier coup joué (voir faire_coup).
+
+        Returns:
+            L'enregistrement d'annulation du coup annulé, ou None si aucun coup n'a été joué.
+        """
+        if not self.pile_annulation:
+            return None
+
+        enregistrement = self.pile_annulation.pop()
+        position, couleur, retournees = enregistrement
+        indice = position[0] * self.nb_cases + position[1]
+        joueur, adversaire = self.bitboards(couleur)
+        joueur &= ~(retournees | (1 << indice))
+        adversaire |= retournees
+        if couleur == "noir":
+            self.noir, self.blanc = joueur, adversaire
+            self.hachage ^= self.cles_zobrist[NOIR][indice]
+        else:
+            self.blanc, self.noir = joueur, adversaire
+            self.hachage ^= self.cles_zobrist[BLANC][indice]
+        self.retourner_hachage(retournees)
+        if self.motifs is not None:
+            self.motifs.annuler_coup(indice, NOIR if couleur == "noir" else BLANC, indices_du_masque(retournees))
+        return enregistrement
+
+    def retourner_hachage(self, retournees):
+        """
+        Met à jour le hachage de Zobrist pour des pièces qui viennent de changer de couleur.
+
+        Args:
+            retournees: Le bitboard des pièces retournées.
+        """
+        hachage = self.hachage
+        cles_retournement = self.cles_retournement
+        while retournees:
+            bit = retournees & -retournees
+            hachage ^= cles_retournement[bit.bit_length() - 1]
+            retournees ^= bit
+        self.hachage = hachage
+
+    def jouer_coup(self, position, couleur):
+        """
+        Joue une pièce de la couleur "couleur" à la position "position" et retourne les pièces mangées. Le coup est
+        empilé et peut être annulé par annuler_coup.
+
+        Args:
+            position: La position du coup.
+            couleur: La couleur du coup.
+
+        Returns:
+            "ok" si le déplacement a été effectué car il est valide, "erreur" autrement.
+        """
+        if self.faire_coup(position, couleur) is not None:
+            return "ok"
+        return "erreur"
+
+    def convertir_en_chaine(self):
+        """
+        Retourne une chaîne de caractères où chaque case est écrite sur une ligne distincte.
+        Chaque ligne contient l'information suivante :
+        ligne,colonne,couleur
+
+        Returns:
+            La chaîne de caractères.
+        """
+        chaine = ""
+        for indice in range(self.nb_cases * self.nb_cases):
+            bit = 1 << indice
+            if self.noir & bit:
+                chaine += "{},{},noir\n".format(*divmod(indice, self.nb_cases))
+            elif self.blanc & bit:
+                chaine += "{},{},blanc\n".format(*divmod(indice, self.nb_cases))
+        return chaine
+
+    def charger_dune_chaine(self, chaine):
+        """
+        Place une pièce à partir d'une ligne au format ligne,colonne,couleur (voir Planche.charger_dune_chaine).
+
+        Args:
+            chaine: La chaîne de caractères, un string.
+        """
+        info_chaine = chaine.split(",")
+        assert info_chaine[2] in ["blanc", "noir"], "Piece: couleur invalide."
+        indice = int(info_chaine[0]) * self.nb_cases + int(info_chaine[1])
+        bit = 1 << indice
+
+        # La ligne peut remplacer une pièce déjà présente: on la retire du hachage avant de placer la nouvelle
+        if self.noir & bit:
+            self.hachage ^= self.cles_zobrist[NOIR][indice]
+        elif self.blanc & bit:
+            self.hachage ^= self.cles_zobrist[BLANC][indice]
+
+        if info_chaine[2] == "noir":
+            self.noir |= bit
+            self.blanc &= ~bit
+            self.hachage ^= self.cles_zobrist[NOIR][indice]
+        else:
+            self.blanc |= bit
+            self.noir &= ~bit
+            self.hachage ^= self.cles_zobrist[BLANC][indice]
+
+    def initialiser_planche_par_default(self):
+        """
+        Initialise une planche de base avec la position initiale des pièces, sur les 4 cases du centre.
+        """
+        n = self.nb_cases
+        centre = n // 2
+        self.noir = (1 << ((centre - 1) * n + centre)) | (1 << (centre * n + centre - 1))
+        self.blanc = (1 << ((centre - 1) * n + centre - 1)) | (1 << (centre * n + centre))
+        self.pile_annulation.clear()
+        self.hachage = hacher_bitboards(self.noir, self.blanc, self.cles_zobrist)
+
+    def vider(self):
+        """
+        Retire toutes les pièces de la planche, par exemple avant d'y charger une position complète.
+        """
+        self.noir = 0
+        self.blanc = 0
+        self.pile_annulation.clear()
+        self.hachage = 0
+
+    def charger_bitboards(self, noir, blanc):
+        """
+        Remplace toutes les pièces de la planche par une position complète, comme Planche.charger_bitboards.
+
+        Args:
+            noir: Le bitboard des pièces noires.
+            blanc: Le bitboard des pièces blanches.
+        """
+        self.noir = noir
+        self.blanc = blanc
+        self.pile_annulation.clear()
+        self.motifs = None
+        self.hachage = hacher_bitboards(noir, blanc, self.cles_zobrist)
+
+    def __repr__(self):
+        """
+        Affiche la planche de la même façon que Planche.__repr__.
+        """
+        return dessiner_planche(self)
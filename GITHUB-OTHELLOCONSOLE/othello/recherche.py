@@ -0,0 +1,404 @@
+import threading
+import time
+
+from othello.planche_bitboard import PlancheBitboard, masque_coups_possibles, masque_retournements
+from othello.transposition import TableTransposition, EXACTE, INFERIEURE, SUPERIEURE, AUCUN_COUP
+from othello.zobrist import CLE_TRAIT_BLANC
+from othello.evaluation import IndicesMotifs
+
+# Score d'une fin de partie: la différence de pièces multipliée par ce facteur, pour dépasser toute évaluation.
+SCORE_FIN = 1000
+INFINI = 1000000
+
+# Poids positionnels classiques de chaque case, regroupés par valeur sous forme de masques de bits.
+POIDS_CASES = [
+    100, -20, 10, 5, 5, 10, -20, 100,
+    -20, -50, -2, -2, -2, -2, -50, -20,
+    10, -2, -1, -1, -1, -1, -2, 10,
+    5, -2, -1, -1, -1, -1, -2, 5,
+    5, -2, -1, -1, -1, -1, -2, 5,
+    10, -2, -1, -1, -1, -1, -2, 10,
+    -20, -50, -2, -2, -2, -2, -50, -20,
+    100, -20, 10, 5, 5, 10, -20, 100,
+]
+MASQUES_POIDS = {}
+for _indice, _poids in enumerate(POIDS_CASES):
+    MASQUES_POIDS[_poids] = MASQUES_POIDS.get(_poids, 0) | (1 << _indice)
+MASQUES_POIDS = list(MASQUES_POIDS.items())
+
+# Poids de la mobilité (différence du nombre de coups possibles) dans l'évaluation.
+POIDS_MOBILITE = 5
+
+
+class BudgetEpuise(Exception):
+    """
+    Levée pendant la recherche lorsque le temps ou le nombre de noeuds alloué au coup est dépassé.
+    """
+    pass
+
+
+def autre_couleur(couleur):
+    """
+    Retourne la couleur adverse.
+
+    Args:
+        couleur: "blanc" ou "noir".
+
+    Returns:
+        "noir" si la couleur est "blanc", "blanc" autrement.
+    """
+    return "noir" if couleur == "blanc" else "blanc"
+
+
+def copier_en_bitboard(planche):
+    """
+    Construit une PlancheBitboard contenant les mêmes pièces que la planche passée, quelle que soit sa représentation.
+    La recherche travaille sur cette copie, ce qui laisse la planche de la partie intacte.
+
+    Args:
+        planche: La planche à copier (Planche ou PlancheBitboard).
+
+    Returns:
+        Une nouvelle PlancheBitboard.
+    """
+    assert planche.nb_cases == 8, "copier_en_bitboard: la recherche ne joue que sur une planche 8x8."
+    copie = PlancheBitboard()
+    copie.vider()
+    for ligne in planche.convertir_en_chaine().splitlines():
+        copie.charger_dune_chaine(ligne)
+    return copie
+
+
+def evaluer_position(joueur, adversaire):
+    """
+    Évalue une position du point de vue du joueur qui doit jouer: somme des poids positionnels des cases occupées,
+    plus la différence de mobilité.
+
+    Args:
+        joueur: Le bitboard des pièces du joueur qui doit jouer.
+        adversaire: Le bitboard des pièces de l'adversaire.
+
+    Returns:
+        Un score entier, positif si la position est favorable au joueur.
+    """
+    score = 0
+    for poids, masque in MASQUES_POIDS:
+        score += poids * ((joueur & masque).bit_count() - (adversaire & masque).bit_count())
+    mobilite = masque_coups_possibles(joueur, adversaire).bit_count()
+    mobilite_adverse = masque_coups_possibles(adversaire, joueur).bit_count()
+    return score + POIDS_MOBILITE * (mobilite - mobilite_adverse)
+
+
+class RechercheAlphaBeta:
+    """
+    Recherche negamax avec élagage alpha-bêta et approfondissement itératif.
+
+    Les coups sont ordonnés selon le meilleur coup de l'itération précédente (ou celui de la table de transposition),
+    les coups "killer" (qui ont causé une coupure au même niveau), l'historique des coupures et, près de la racine, la
+    mobilité laissée à l'adversaire. Les positions déjà cherchées, atteintes par un autre ordre de coups, sont
+    retrouvées dans une table de transposition indexée par le hachage de Zobrist de la planche. La recherche s'arrête
+    proprement lorsque le budget de temps ou de noeuds est épuisé: on garde alors le meilleur coup de la dernière
+    itération complétée.
+    """
+
+    def __init__(self, profondeur_max=4, temps_max=None, noeuds_max=None, table=None, taille_table_mo=16,
+                 evaluation=None):
+        """
+        Initialise une recherche.
+
+        Args:
+            profondeur_max: La profondeur maximale de l'approfondissement itératif, en demi-coups.
+            temps_max: Le temps maximal alloué à un coup, en secondes (None pour aucune limite).
+            noeuds_max: Le nombre maximal de noeuds visités pour un coup (None pour aucune limite).
+            table: La table de transposition à utiliser (None pour en créer une).
+            taille_table_mo: La taille de la table créée, en mégaoctets, si aucune table n'est passée.
+            evaluation: L'évaluation par motifs des feuilles (evaluation.EvaluationMotifs), ou None pour
+                evaluer_position.
+        """
+        self.profondeur_max = profondeur_max
+        self.temps_max = temps_max
+        self.noeuds_max = noeuds_max
+        self.evaluation = evaluation
+
+        # Première profondeur de l'approfondissement itératif. Les recherches auxiliaires de RechercheParallele
+        # commencent plus profond, pour que les processus ne cherchent pas tous la même itération.
+        self.profondeur_depart = 1
+
+        # Signal d'arrêt venant d'un autre fil d'exécution (voir JoueurAlphaBeta.arreter_reflexion): la recherche
+        # s'arrête comme si son budget était épuisé.
+        self.arret = threading.Event()
+
+        # La table est conservée d'un coup à l'autre: les positions cherchées au coup précédent resservent.
+        self.table = table if table is not None else TableTransposition(taille_table_mo)
+
+        # Historique des coupures, indicé par couleur puis par case, conservé d'un coup à l'autre.
+        self.historique = {"noir": [0] * 64, "blanc": [0] * 64}
+        self.killers = []
+
+        self.planche = None
+        self.noeuds = 0
+        self.debut = 0.0
+
+        # Statistiques de la dernière recherche (voir statistiques()).
+        self.profondeur_atteinte = 0
+        self.duree = 0.0
+        self.meilleur_score = 0
+
+    def chercher(self, planche, couleur):
+        """
+        Cherche le meilleur coup de la couleur donnée sur la planche.
+
+        Args:
+            planche: La planche de la partie, qui n'est pas modifiée.
+            couleur: La couleur qui doit jouer.
+
+        Returns:
+            Le meilleur coup trouvé, un couple (ligne, colonne), ou None si la couleur n'a aucun coup possible.
+        """
+        self.planche = copier_en_bitboard(planche)
+        if self.evaluation is not None:
+            # Les indices des motifs sont tenus à jour par les coups de la recherche
+            IndicesMotifs.attacher(self.planche)
+        self.noeuds = 0
+        self.debut = time.perf_counter()
+        self.profondeur_atteinte = 0
+        self.killers = [[None, None] for _ in range(self.profondeur_max + 64)]
+
+        coups = self.planche.lister_coups_possibles_de_couleur(couleur)
+        meilleur_coup = coups[0] if coups else None
+        if len(coups) <= 1:
+            self.duree = time.perf_counter() - self.debut
+            return meilleur_coup
+
+        for profondeur in range(self.profondeur_depart, self.profondeur_max + 1):
+            try:
+                score, coup = self.chercher_racine(coups, couleur, profondeur, meilleur_coup)
+            except BudgetEpuise:
+                # On défait les coups de l'itération interrompue
+                while self.planche.pile_annulation:
+                    self.planche.annuler_coup()
+                break
+            meilleur_coup = coup
+            self.meilleur_score = score
+            self.profondeur_atteinte = profondeur
+            if abs(score) >= SCORE_FIN:
+                # Fin de partie atteinte: chercher plus loin ne changera rien
+                break
+
+        self.duree = time.perf_counter() - self.debut
+        return meilleur_coup
+
+    def chercher_racine(self, coups, couleur, profondeur, meilleur_coup):
+        """
+        Effectue une itération complète de la recherche à la profondeur donnée.
+
+        Args:
+            coups: Les coups possibles à la racine.
+            couleur: La couleur qui doit jouer.
+            profondeur: La profondeur de cette itération.
+            meilleur_coup: Le meilleur coup de l'itération précédente, essayé en premier.
+
+        Returns:
+            Un couple (score, meilleur coup).
+        """
+        alpha = -INFINI
+        coup_choisi = None
+        for coup in self.ordonner_coups(coups, couleur, 0, profondeur, meilleur_coup):
+            self.planche.faire_coup(coup, couleur)
+            score = -self.negamax(profondeur - 1, -INFINI, -alpha, autre_couleur(couleur), 1, False)
+            self.planche.annuler_coup()
+            if coup_choisi is None or score > alpha:
+                alpha = score
+                coup_choisi = coup
+        self.table.enregistrer(self.cle_table(couleur), profondeur, EXACTE, alpha, coup_choisi[0] * 8 + coup_choisi[1])
+        return alpha, coup_choisi
+
+    def cle_table(self, couleur):
+        """
+        Retourne la clé de la position courante dans la table de transposition: le hachage de Zobrist de la planche,
+        combiné à la couleur qui doit jouer.
+
+        Args:
+            couleur: La couleur qui doit jouer.
+
+        Returns:
+            La clé de 64 bits.
+        """
+        if couleur == "blanc":
+            return self.planche.hachage ^ CLE_TRAIT_BLANC
+        return self.planche.hachage
+
+    def negamax(self, profondeur, alpha, beta, couleur, niveau, passe):
+        """
+        Recherche negamax avec élagage alpha-bêta.
+
+        Args:
+            profondeur: La profondeur restante.
+            alpha: La borne inférieure de la fenêtre.
+            beta: La borne supérieure de la fenêtre.
+            couleur: La couleur qui doit jouer.
+            niveau: La distance à la racine, en demi-coups.
+            passe: True si le joueur précédent vient de passer son tour.
+
+        Returns:
+            Le score de la position du point de vue de la couleur qui doit jouer.
+        """
+        self.noeuds += 1
+        if self.noeuds & 255 == 0:
+            self.verifier_budget()
+
+        planche = self.planche
+        if profondeur <= 0:
+            if self.evaluation is not None:
+                return self.evaluation.evaluer_planche(planche, couleur)
+            joueur, adversaire = planche.bitboards(couleur)
+            return evaluer_position(joueur, adversaire)
+
+        # Si la position a déjà été cherchée assez profondément, son score peut suffire
+        cle = self.cle_table(couleur)
+        entree = self.table.sonder(cle)
+        coup_table = None
+        if entree is not None:
+            profondeur_table, borne, score, coup = entree
+            if coup != AUCUN_COUP:
+                coup_table = divmod(coup, 8)
+            if profondeur_table >= profondeur:
+                if borne == EXACTE:
+                    return score
+                if borne == INFERIEURE and score >= beta:
+                    return score
+                if borne == SUPERIEURE and score <= alpha:
+                    return score
+
+        coups = planche.lister_coups_possibles_de_couleur(couleur)
+        if not coups:
+            if passe:
+                joueur, adversaire = planche.bitboards(couleur)
+                return SCORE_FIN * (joueur.bit_count() - adversaire.bit_count())
+            return -self.negamax(profondeur, -beta, -alpha, autre_couleur(couleur), niveau + 1, True)
+
+        alpha_depart = alpha
+        meilleur = -INFINI
+        meilleur_coup = None
+        for coup in self.ordonner_coups(coups, couleur, niveau, profondeur, coup_table):
+            planche.faire_coup(coup, couleur)
+            score = -self.negamax(profondeur - 1, -beta, -alpha, autre_couleur(couleur), niveau + 1, False)
+            planche.annuler_coup()
+            if score > meilleur:
+                meilleur = score
+                meilleur_coup = coup
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.enregistrer_coupure(coup, couleur, niveau, profondeur)
+                        break
+
+        if meilleur <= alpha_depart:
+            borne = SUPERIEURE
+        elif meilleur >= beta:
+            borne = INFERIEURE
+        else:
+            borne = EXACTE
+        self.table.enregistrer(cle, profondeur, borne, meilleur, meilleur_coup[0] * 8 + meilleur_coup[1])
+        return meilleur
+
+    def ordonner_coups(self, coups, couleur, niveau, profondeur, meilleur_coup):
+        """
+        Trie les coups du plus prometteur au moins prometteur.
+
+        Args:
+            coups: La liste des coups à trier.
+            couleur: La couleur qui joue les coups.
+            niveau: La distance à la racine.
+            profondeur: La profondeur restante; la mobilité n'est calculée que si elle vaut au moins 3.
+            meilleur_coup: Un coup à essayer en premier (ou None).
+
+        Returns:
+            La liste triée des coups.
+        """
+        historique = self.historique[couleur]
+        killers = self.killers[niveau]
+        joueur, adversaire = self.planche.bitboards(couleur)
+
+        def priorite(coup):
+            if coup == meilleur_coup:
+                return 1 << 40
+            indice = coup[0] * 8 + coup[1]
+            valeur = historique[indice]
+            if coup == killers[0] or coup == killers[1]:
+                valeur += 1 << 30
+            if profondeur >= 3:
+                retournees = masque_retournements(indice, joueur, adversaire)
+                mobilite = masque_coups_possibles(adversaire & ~retournees, joueur | retournees | (1 << indice))
+                valeur -= mobilite.bit_count() << 20
+            return valeur
+
+        return sorted(coups, key=priorite, reverse=True)
+
+    def enregistrer_coupure(self, coup, couleur, niveau, profondeur):
+        """
+        Retient un coup qui a causé une coupure, pour l'essayer plus tôt ailleurs dans l'arbre.
+
+        Args:
+            coup: Le coup qui a causé la coupure.
+            couleur: La couleur qui a joué le coup.
+            niveau: La distance à la racine.
+            profondeur: La profondeur restante au moment de la coupure.
+        """
+        self.historique[couleur][coup[0] * 8 + coup[1]] += profondeur * profondeur
+        killers = self.killers[niveau]
+        if killers[0] != coup:
+            killers[1] = killers[0]
+            killers[0] = coup
+
+    def verifier_budget(self):
+        """
+        Lève BudgetEpuise si le temps ou le nombre de noeuds alloué est dépassé, ou si l'arrêt est demandé.
+        """
+        if self.arret.is_set():
+            raise BudgetEpuise()
+        if self.noeuds_max is not None and self.noeuds >= self.noeuds_max:
+            raise BudgetEpuise()
+        if self.temps_max is not None and time.perf_counter() - self.debut >= self.temps_max:
+            raise BudgetEpuise()
+
+    def coup_prevu(self, planche, couleur):
+        """
+        Retourne le meilleur coup d'une position selon la table de transposition, par exemple la réponse de
+        l'adversaire que la dernière recherche a prévue.
+
+        Args:
+            planche: La planche (PlancheBitboard), qui n'est pas modifiée.
+            couleur: La couleur qui doit jouer.
+
+        Returns:
+            Le coup, un couple (ligne, colonne), ou None si la position n'est pas dans la table.
+        """
+        cle = planche.hachage ^ CLE_TRAIT_BLANC if couleur == "blanc" else planche.hachage
+        entree = self.table.sonder(cle)
+        if entree is None or entree[3] == AUCUN_COUP:
+            return None
+        return divmod(entree[3], 8)
+
+    def statistiques(self):
+        """
+        Retourne les statistiques de la dernière recherche.
+
+        Returns:
+            Un dictionnaire contenant la profondeur atteinte, le nombre de noeuds, la durée (secondes), le débit en
+            noeuds par seconde et le score du meilleur coup.
+        """
+        return {
+            "profondeur": self.profondeur_atteinte,
+            "noeuds": self.noeuds,
+            "duree": self.duree,
+            "noeuds_par_seconde": self.noeuds / self.duree if self.duree > 0 else 0.0,
+            "score": self.meilleur_score,
+        }
+
+    def statistiques_table(self):
+        """
+        Retourne les statistiques de la table de transposition (taux de succès, collisions, remplissage...), voir
+        TableTransposition.statistiques.
+        """
+        return self.table.statistiques()
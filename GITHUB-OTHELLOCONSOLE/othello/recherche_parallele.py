@@ -0,0 +1,304 @@
+"""
+Recherche alpha-bêta parallèle à la manière du "Lazy SMP": des processus auxiliaires cherchent la même position que le
+processus principal, sans se partager le travail autrement que par une table de transposition en mémoire partagée.
+Les positions qu'un processus a déjà cherchées sont retrouvées dans la table par les autres, ce qui accélère la
+recherche du processus principal, seul à décider du coup.
+
+Pour que les processus ne cherchent pas tous la même itération au même moment, les auxiliaires de numéro impair
+commencent leur approfondissement itératif une profondeur plus loin (et vont une profondeur plus loin). Les
+auxiliaires n'ont pas de budget propre: ils s'arrêtent dès que le processus principal a fini.
+
+La table n'a pas de verrou: voir le module transposition pour la détection des entrées écrites à moitié.
+"""
+import multiprocessing
+import random
+import signal
+import time
+import weakref
+from multiprocessing import shared_memory
+
+from othello.planche_bitboard import PlancheBitboard
+from othello.recherche import RechercheAlphaBeta, copier_en_bitboard, autre_couleur
+from othello.transposition import TableTransposition, OCTETS_PAR_SEAU
+
+# Nombres de processus comparés par défaut par mesurer_acceleration.
+PROCESSUS = (1, 2, 4)
+
+# Recherche de chaque processus auxiliaire (voir initialiser_processus).
+_auxiliaire = {}
+
+
+def octets_table(taille_mo):
+    """
+    Calcule la taille du tampon d'une table de transposition, comme TableTransposition le fait pour la sienne.
+
+    Args:
+        taille_mo: La taille maximale de la table, en mégaoctets.
+
+    Returns:
+        Le nombre d'octets: un nombre de seaux qui est la plus grande puissance de 2 respectant la limite.
+    """
+    nb_seaux = 1
+    while nb_seaux * 2 * OCTETS_PAR_SEAU <= taille_mo * 1024 * 1024:
+        nb_seaux *= 2
+    return nb_seaux * OCTETS_PAR_SEAU
+
+
+def liberer_memoire(memoire, table):
+    """
+    Ferme et supprime le segment de mémoire partagée d'une recherche. Appelée une seule fois, par fermer() ou par le
+    finaliseur de la recherche (à sa destruction ou à la sortie de l'interpréteur).
+
+    Args:
+        memoire: Le SharedMemory de la table.
+        table: La TableTransposition dans le segment, qui ne peut plus servir ensuite.
+    """
+    # Le segment ne se ferme qu'une fois toutes ses vues libérées
+    table.mots = None
+    table.memoire = None
+    try:
+        memoire.close()
+    except BufferError:
+        # Une vue de la table est encore vivante (sortie de l'interpréteur): le segment est supprimé quand même
+        pass
+    memoire.unlink()
+
+
+def initialiser_processus(nom_memoire, arret, evaluation):
+    """
+    Initialise un processus auxiliaire: sa recherche utilise la table de transposition en mémoire partagée et
+    s'arrête lorsque l'événement d'arrêt est signalé.
+
+    Args:
+        nom_memoire: Le nom du segment de mémoire partagée de la table.
+        arret: L'événement (multiprocessing.Event) signalé lorsque le processus principal a fini de chercher.
+        evaluation: L'évaluation par motifs de la recherche, ou None.
+    """
+    # Un Ctrl-C n'interrompt que le processus principal, qui arrête les auxiliaires: un auxiliaire interrompu ne
+    # rendrait jamais le résultat de sa tâche
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Le segment doit rester ouvert aussi longtemps que la table s'en sert
+    memoire = shared_memory.SharedMemory(name=nom_memoire)
+    _auxiliaire["memoire"] = memoire
+    recherche = RechercheAlphaBeta(table=TableTransposition(memoire=memoire.buf), evaluation=evaluation)
+    recherche.arret = arret
+    _auxiliaire["recherche"] = recherche
+
+
+def chercher_auxiliaire(noir, blanc, couleur, profondeur_depart, profondeur_max):
+    """
+    Cherche une position dans un processus auxiliaire jusqu'à la profondeur maximale ou jusqu'à l'arrêt.
+
+    Args:
+        noir: Le bitboard des pièces noires.
+        blanc: Le bitboard des pièces blanches.
+        couleur: La couleur qui doit jouer.
+        profondeur_depart: La première profondeur de l'approfondissement itératif.
+        profondeur_max: La dernière profondeur.
+
+    Returns:
+        Un couple (noeuds visités, profondeur atteinte).
+    """
+    recherche = _auxiliaire["recherche"]
+    planche = PlancheBitboard()
+    planche.charger_bitboards(noir, blanc)
+    recherche.profondeur_depart = profondeur_depart
+    recherche.profondeur_max = profondeur_max
+    recherche.chercher(planche, couleur)
+    return recherche.noeuds, recherche.profondeur_atteinte
+
+
+class RechercheParallele(RechercheAlphaBeta):
+    """
+    Recherche alpha-bêta dont la table de transposition est partagée avec processus - 1 processus auxiliaires (voir
+    le module recherche_parallele). Avec un seul processus, c'est une RechercheAlphaBeta dont la table est en mémoire
+    partagée.
+
+    La recherche se ferme par fermer(), ou en l'utilisant dans un bloc with. Une recherche oubliée ou interrompue
+    (Ctrl-C) supprime quand même son segment de mémoire partagée à sa destruction ou à la sortie de l'interpréteur.
+    """
+
+    def __init__(self, profondeur_max=4, temps_max=None, noeuds_max=None, taille_table_mo=16, evaluation=None,
+                 processus=2):
+        """
+        Initialise une recherche. Les processus auxiliaires ne sont démarrés qu'à la première recherche.
+
+        Args:
+            profondeur_max: La profondeur maximale de l'approfondissement itératif, en demi-coups.
+            temps_max: Le temps maximal alloué à un coup, en secondes (None pour aucune limite).
+            noeuds_max: Le nombre maximal de noeuds visités pour un coup par le processus principal (None pour aucune
+                limite).
+            taille_table_mo: La taille de la table partagée, en mégaoctets.
+            evaluation: L'évaluation par motifs des feuilles, ou None pour evaluer_position.
+            processus: Le nombre total de processus, principal compris.
+        """
+        assert isinstance(processus, int) and processus >= 1, "RechercheParallele: nombre de processus invalide."
+        self.memoire = shared_memory.SharedMemory(create=True, size=octets_table(taille_table_mo))
+        super().__init__(profondeur_max, temps_max, noeuds_max, TableTransposition(memoire=self.memoire.buf),
+                         evaluation=evaluation)
+        self.finaliseur = weakref.finalize(self, liberer_memoire, self.memoire, self.table)
+        self.processus = processus
+        self.pool = None
+
+        # Signal d'arrêt des auxiliaires, distinct de self.arret qui arrête le processus principal.
+        self.arret_auxiliaires = multiprocessing.Event()
+
+        # Statistiques de la dernière recherche: un couple (noeuds, profondeur atteinte) par auxiliaire.
+        self.resultats_auxiliaires = []
+
+    def chercher(self, planche, couleur):
+        """
+        Cherche le meilleur coup de la couleur donnée sur la planche, avec l'aide des processus auxiliaires.
+
+        Args:
+            planche: La planche de la partie, qui n'est pas modifiée.
+            couleur: La couleur qui doit jouer.
+
+        Returns:
+            Le meilleur coup trouvé par le processus principal, ou None si la couleur n'a aucun coup possible.
+        """
+        self.resultats_auxiliaires = []
+        if self.processus == 1 or len(planche.lister_coups_possibles_de_couleur(couleur)) <= 1:
+            return super().chercher(planche, couleur)
+
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.processus - 1, initializer=initialiser_processus,
+                                             initargs=(self.memoire.name, self.arret_auxiliaires, self.evaluation))
+        copie = copier_en_bitboard(planche)
+        taches = []
+        for numero in range(1, self.processus):
+            decalage = numero % 2
+            taches.append(self.pool.apply_async(chercher_auxiliaire, (copie.noir, copie.blanc, couleur,
+                                                                      1 + decalage, self.profondeur_max + decalage)))
+        try:
+            coup = super().chercher(planche, couleur)
+        finally:
+            # Toutes les tâches sont terminées avant que le signal soit effacé pour la recherche suivante
+            self.arret_auxiliaires.set()
+            self.resultats_auxiliaires = [tache.get() for tache in taches]
+            self.arret_auxiliaires.clear()
+        return coup
+
+    def statistiques(self):
+        """
+        Retourne les statistiques de la dernière recherche (voir RechercheAlphaBeta.statistiques), avec le nombre de
+        processus et les noeuds de tous les processus.
+
+        Returns:
+            Le dictionnaire de RechercheAlphaBeta.statistiques, plus "processus", "noeuds_total" et
+            "profondeurs_auxiliaires" (profondeur atteinte par chaque auxiliaire).
+        """
+        statistiques = super().statistiques()
+        statistiques["processus"] = self.processus
+        statistiques["noeuds_total"] = self.noeuds + sum(noeuds for noeuds, _ in self.resultats_auxiliaires)
+        statistiques["profondeurs_auxiliaires"] = [profondeur for _, profondeur in self.resultats_auxiliaires]
+        return statistiques
+
+    def fermer(self):
+        """
+        Termine les processus auxiliaires et libère la mémoire partagée. La recherche ne peut plus servir ensuite. Un
+        deuxième appel ne fait rien.
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        self.table = None
+        self.finaliseur()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.fermer()
+
+
+def positions_de_mesure(nb_positions, demi_coups=16, graine=0):
+    """
+    Tire des positions de milieu de partie en jouant des coups au hasard depuis la position initiale.
+
+    Args:
+        nb_positions: Le nombre de positions.
+        demi_coups: Le nombre de demi-coups joués au hasard.
+        graine: La graine du tirage.
+
+    Returns:
+        La liste des couples (PlancheBitboard, couleur qui doit jouer). Une partie terminée avant le dernier
+        demi-coup est rejouée.
+    """
+    generateur = random.Random(graine)
+    positions = []
+    while len(positions) < nb_positions:
+        planche = PlancheBitboard()
+        couleur = "noir"
+        for _ in range(demi_coups):
+            coups = planche.lister_coups_possibles_de_couleur(couleur)
+            if not coups:
+                couleur = autre_couleur(couleur)
+                coups = planche.lister_coups_possibles_de_couleur(couleur)
+                if not coups:
+                    break
+            planche.faire_coup(generateur.choice(coups), couleur)
+            couleur = autre_couleur(couleur)
+        if len(planche.lister_coups_possibles_de_couleur(couleur)) >= 2:
+            positions.append((planche, couleur))
+    return positions
+
+
+def mesurer_acceleration(profondeur, liste_processus=PROCESSUS, nb_positions=8, taille_table_mo=16, graine=0,
+                         afficher=print):
+    """
+    Mesure le temps que met la recherche parallèle pour atteindre une profondeur (time-to-depth) sur des positions de
+    milieu de partie, pour chaque nombre de processus, et l'accélération par rapport à un seul processus. La table
+    est vidée avant chaque position, pour que chaque recherche parte de zéro.
+
+    Args:
+        profondeur: La profondeur à atteindre.
+        liste_processus: Les nombres de processus à comparer (le premier sert de référence).
+        nb_positions: Le nombre de positions cherchées (voir positions_de_mesure).
+        taille_table_mo: La taille de la table partagée, en mégaoctets.
+        graine: La graine du tirage des positions.
+        afficher: La fonction utilisée pour afficher les résultats (None pour ne rien afficher).
+
+    Returns:
+        La liste des dictionnaires de résultats de chaque nombre de processus: "processus", "duree" (secondes, pour
+        toutes les positions), "noeuds" (du processus principal), "noeuds_total" (de tous les processus),
+        "acceleration" (durée de référence / durée) et "memes_coups" (nombre de coups identiques à ceux de la
+        référence).
+    """
+    positions = positions_de_mesure(nb_positions, graine=graine)
+    resultats = []
+    coups_reference = None
+    for processus in liste_processus:
+        duree = 0.0
+        noeuds = 0
+        noeuds_total = 0
+        coups = []
+        with RechercheParallele(profondeur, taille_table_mo=taille_table_mo, processus=processus) as recherche:
+            for planche, couleur in positions:
+                recherche.table.vider()
+                debut = time.perf_counter()
+                coups.append(recherche.chercher(planche, couleur))
+                duree += time.perf_counter() - debut
+                statistiques = recherche.statistiques()
+                noeuds += statistiques["noeuds"]
+                noeuds_total += statistiques["noeuds_total"]
+
+        if coups_reference is None:
+            coups_reference = coups
+        resultat = {
+            "processus": processus,
+            "duree": duree,
+            "noeuds": noeuds,
+            "noeuds_total": noeuds_total,
+            "acceleration": resultats[0]["duree"] / duree if resultats and duree > 0 else 1.0,
+            "memes_coups": sum(1 for coup, reference in zip(coups, coups_reference) if coup == reference),
+        }
+        resultats.append(resultat)
+        if afficher is not None:
+            afficher("{processus:>2} processus: profondeur {profondeur} en {duree:7.3f} s, accélération "
+                     "{acceleration:5.2f}, {noeuds:>9} noeuds principaux, {noeuds_total:>9} au total, "
+                     "{memes_coups}/{positions} coups identiques".format(profondeur=profondeur,
+                                                                        positions=len(positions), **resultat))
+    return resultats
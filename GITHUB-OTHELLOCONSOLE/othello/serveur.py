@@ -0,0 +1,620 @@
+"""
+Serveur de parties asyncio: un seul processus héberge de nombreuses parties à la fois, jouées par des clients qui
+s'y connectent en TCP ou par un socket Unix.
+
+Le protocole échange des objets JSON, un par ligne. Chaque requête a une "commande" et peut avoir un "id", qui est
+renvoyé tel quel dans la réponse. Les réponses ont "ok": true, ou "ok": false et un message d'"erreur".
+    - {"commande": "nouvelle", "noir": "Humain", "blanc": "AlphaBeta", "profondeur": 2, "planche": "bitboard"}
+      crée une partie et joue les coups ordinateur jusqu'au premier tour d'un joueur humain;
+    - {"commande": "jouer", "session": 1, "coup": [2, 3]} joue le coup du joueur humain, puis les coups ordinateur
+      qui suivent;
+    - {"commande": "annuler", "session": 1} annule le dernier coup du joueur humain (voir Partie.annuler_tour);
+    - {"commande": "etat", "session": 1} et {"commande": "fermer", "session": 1};
+    - {"commande": "statistiques"} retourne les statistiques du serveur (voir Serveur.statistiques).
+L'état d'une partie (voir Session.etat) contient la planche, la couleur qui doit jouer, ses coups possibles et les
+coups ordinateur joués depuis la dernière requête.
+
+Les coups ordinateur sont cherchés dans un ThreadPoolExecutor: la boucle d'événements continue de servir les autres
+parties pendant une recherche. Les recherches d'une même partie ne se chevauchent pas (un verrou par session).
+"""
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import random
+import time
+
+from othello.partie import Partie, TYPES_PLANCHE
+from othello.joueur import JoueurHumain, JoueurOrdinateur, JoueurAlphaBeta, JoueurMCTS
+from othello.instrumentation import MesureFonction
+
+# Types de joueurs qu'un client peut demander.
+TYPES_JOUEUR = ("Humain", "Ordinateur", "AlphaBeta", "MCTS")
+
+HOTE = "127.0.0.1"
+PORT = 8765
+
+
+class ErreurRequete(Exception):
+    """
+    Requête invalide d'un client: le message est renvoyé au client, la connexion reste ouverte.
+    """
+
+
+def creer_joueur_session(type_joueur, couleur, profondeur=2, playouts=200):
+    """
+    Crée un joueur d'une partie du serveur. Les joueurs à recherche reçoivent une petite table de transposition, pour
+    que de nombreuses parties tiennent en mémoire.
+
+    Args:
+        type_joueur: Le type du joueur (voir TYPES_JOUEUR).
+        couleur: La couleur du joueur.
+        profondeur: La profondeur de recherche d'un joueur "AlphaBeta".
+        playouts: Le nombre de playouts par coup d'un joueur "MCTS".
+
+    Returns:
+        Le joueur.
+    """
+    if type_joueur == "Humain":
+        return JoueurHumain(couleur)
+    if type_joueur == "Ordinateur":
+        return JoueurOrdinateur(couleur)
+    if type_joueur == "AlphaBeta":
+        return JoueurAlphaBeta(couleur, profondeur, memoire_mo=1)
+    if type_joueur == "MCTS":
+        return JoueurMCTS(couleur, playouts)
+    raise ErreurRequete("Type de joueur invalide: {}".format(type_joueur))
+
+
+def entier_positif(requete, cle, defaut):
+    """
+    Lit un paramètre entier positif d'une requête.
+
+    Args:
+        requete: Le dictionnaire de la requête.
+        cle: Le nom du paramètre.
+        defaut: La valeur du paramètre s'il est absent.
+
+    Returns:
+        La valeur du paramètre.
+
+    Raises:
+        ErreurRequete: Si la valeur n'est pas un entier positif.
+    """
+    valeur = requete.get(cle, defaut)
+    if not isinstance(valeur, int) or isinstance(valeur, bool) or valeur < 1:
+        raise ErreurRequete("Le paramètre {} doit être un entier positif: {}".format(cle, valeur))
+    return valeur
+
+
+def enregistrer_duree(mesure, debut):
+    """
+    Compte dans une MesureFonction la durée écoulée depuis debut (time.perf_counter_ns()).
+    """
+    duree = time.perf_counter_ns() - debut
+    mesure.ajouter(duree, duree, None, True)
+
+
+def resume_latences(mesure):
+    """
+    Résume les latences d'une MesureFonction en millisecondes.
+
+    Returns:
+        Un dictionnaire contenant le nombre de mesures, la moyenne, les percentiles 50, 90 et 99 et le maximum.
+    """
+    resume = mesure.resume()
+    return {
+        "nombre": resume["appels"],
+        "moyenne_ms": resume["moyenne"] * 1e3,
+        "p50_ms": resume["p50"] * 1e3,
+        "p90_ms": resume["p90"] * 1e3,
+        "p99_ms": resume["p99"] * 1e3,
+        "maximum_ms": resume["maximum"] * 1e3,
+    }
+
+
+class Session:
+    """
+    Une partie hébergée par le serveur, jouée tour par tour plutôt que par Partie.jouer.
+    """
+
+    def __init__(self, numero, partie):
+        """
+        Initialise une session.
+
+        Args:
+            numero: Le numéro de la session.
+            partie: La Partie, créée sans console (voir Serveur.creer_session).
+        """
+        self.numero = numero
+        self.partie = partie
+        self.verrou = asyncio.Lock()
+
+        # Coups ordinateur joués depuis la dernière réponse au client
+        self.coups_ordinateur = []
+
+    def terminee(self):
+        return self.partie.partie_terminee()
+
+    async def avancer(self, serveur):
+        """
+        Joue les tours passés et les coups ordinateur jusqu'au tour d'un joueur humain ou à la fin de la partie. Les
+        coups ordinateur sont cherchés dans l'exécuteur du serveur.
+
+        Args:
+            serveur: Le Serveur, pour son exécuteur et ses statistiques.
+        """
+        partie = self.partie
+        boucle = asyncio.get_running_loop()
+        while not partie.partie_terminee():
+            partie.coups_possibles = partie.planche.lister_coups_possibles_de_couleur(partie.couleur_joueur_courant)
+            if not partie.coups_possibles:
+                partie.rejouer([None])
+                self.coups_ordinateur.append(None)
+                continue
+            joueur = partie.joueur_courant
+            if joueur.obtenir_type_joueur() == "Humain":
+                return
+            debut = time.perf_counter_ns()
+            coup = await boucle.run_in_executor(serveur.executeur, joueur.choisir_coup, partie.coups_possibles,
+                                                partie.planche)
+            enregistrer_duree(serveur.latences_ordinateur, debut)
+            partie.rejouer([coup])
+            serveur.coups += 1
+            self.coups_ordinateur.append(coup)
+
+    def jouer(self, coup):
+        """
+        Joue le coup du joueur humain qui doit jouer.
+
+        Args:
+            coup: La position du coup, un couple (ligne, colonne).
+
+        Raises:
+            ErreurRequete: Si ce n'est pas le tour d'un joueur humain ou si le coup est invalide.
+        """
+        partie = self.partie
+        if partie.partie_terminee():
+            raise ErreurRequete("La partie est terminée.")
+        if partie.joueur_courant.obtenir_type_joueur() != "Humain":
+            raise ErreurRequete("Ce n'est pas le tour d'un joueur humain.")
+        for valeur in coup:
+            if not isinstance(valeur, int) or isinstance(valeur, bool) or not 0 <= valeur < partie.planche.nb_cases:
+                raise ErreurRequete("Coordonnée de coup invalide: {}".format(valeur))
+        coup_valide, message_erreur = partie.valider_position_coup(coup)
+        if not coup_valide:
+            raise ErreurRequete(message_erreur.strip())
+        partie.rejouer([coup])
+
+    def etat(self):
+        """
+        Retourne l'état de la partie envoyé au client. Les coups ordinateur sont oubliés une fois envoyés.
+
+        Returns:
+            Un dictionnaire contenant le numéro de la session, la planche (voir Planche.convertir_en_chaine), la
+            couleur qui doit jouer, ses coups possibles, les coups ordinateur joués depuis la dernière requête (None
+            pour un tour passé), le nombre de pièces de chaque couleur, si la partie est terminée et le gagnant.
+        """
+        partie = self.partie
+        terminee = partie.partie_terminee()
+        etat = {
+            "session": self.numero,
+            "planche": partie.planche.convertir_en_chaine(),
+            "couleur": partie.couleur_joueur_courant,
+            "coups_possibles": [] if terminee else [list(coup) for coup in partie.coups_possibles],
+            "coups_ordinateur": [None if coup is None else list(coup) for coup in self.coups_ordinateur],
+            "noir": partie.planche.nb_noir,
+            "blanc": partie.planche.nb_blanc,
+            "terminee": terminee,
+            "gagnant": partie.gagnant if terminee else None,
+        }
+        self.coups_ordinateur = []
+        return etat
+
+    def fermer(self):
+        """
+        Libère les ressources des joueurs de la partie (voir Joueur.fermer).
+        """
+        self.partie.joueur_noir.fermer()
+        self.partie.joueur_blanc.fermer()
+
+
+class Serveur:
+    """
+    Serveur asyncio de parties (voir le protocole au début du module).
+    """
+
+    def __init__(self, nb_fils=4):
+        """
+        Initialise le serveur.
+
+        Args:
+            nb_fils: Le nombre de fils d'exécution qui cherchent les coups ordinateur.
+        """
+        self.executeur = concurrent.futures.ThreadPoolExecutor(nb_fils, thread_name_prefix="othello")
+        self.sessions = {}
+        self.numeros = itertools.count(1)
+
+        # Statistiques
+        self.debut = time.perf_counter()
+        self.sessions_creees = 0
+        self.connexions = 0
+        self.requetes = 0
+        self.coups = 0
+        self.latences = MesureFonction("requetes")
+        self.latences_ordinateur = MesureFonction("coups_ordinateur")
+
+        self.serveur = None
+
+    async def demarrer(self, hote=HOTE, port=PORT, chemin=None):
+        """
+        Commence à accepter les connexions.
+
+        Args:
+            hote: L'adresse TCP d'écoute.
+            port: Le port TCP (0 pour un port libre au hasard, voir adresse).
+            chemin: Le chemin d'un socket Unix, utilisé plutôt que TCP s'il est donné.
+        """
+        if chemin is not None:
+            self.serveur = await asyncio.start_unix_server(self.servir_client, chemin)
+        else:
+            self.serveur = await asyncio.start_server(self.servir_client, hote, port)
+
+    def adresse(self):
+        """
+        Retourne l'adresse d'écoute: un couple (hôte, port), ou le chemin du socket Unix.
+        """
+        return self.serveur.sockets[0].getsockname()
+
+    async def arreter(self):
+        """
+        Ferme le serveur, les sessions ouvertes et l'exécuteur.
+        """
+        if self.serveur is not None:
+            self.serveur.close()
+            await self.serveur.wait_closed()
+        for session in list(self.sessions.values()):
+            self.fermer_session(session)
+        self.executeur.shutdown(wait=False, cancel_futures=True)
+
+    async def servir_client(self, lecteur, ecrivain):
+        """
+        Lit les requêtes d'une connexion et y répond, une ligne JSON par requête, jusqu'à la fin de la connexion.
+        """
+        self.connexions += 1
+        try:
+            while True:
+                ligne = await lecteur.readline()
+                if not ligne:
+                    break
+                debut = time.perf_counter_ns()
+                reponse = await self.traiter_ligne(ligne)
+                ecrivain.write(json.dumps(reponse).encode() + b"\n")
+                await ecrivain.drain()
+                self.requetes += 1
+                enregistrer_duree(self.latences, debut)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connexions -= 1
+            ecrivain.close()
+
+    async def traiter_ligne(self, ligne):
+        """
+        Traite une requête. Toute erreur est renvoyée au client dans la réponse: une erreur imprévue pendant le
+        traitement d'une session ferme aussi cette session (voir traiter).
+
+        Args:
+            ligne: La ligne JSON de la requête, en octets.
+
+        Returns:
+            Le dictionnaire de la réponse.
+        """
+        requete = {}
+        try:
+            requete = json.loads(ligne)
+            if not isinstance(requete, dict):
+                raise ErreurRequete("La requête doit être un objet JSON.")
+            reponse = await self.traiter(requete)
+            reponse["ok"] = True
+        except ErreurRequete as erreur:
+            reponse = {"ok": False, "erreur": str(erreur)}
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            reponse = {"ok": False, "erreur": "Requête JSON invalide."}
+        except Exception as erreur:
+            reponse = {"ok": False, "erreur": "Erreur interne: {!r}".format(erreur)}
+        if "id" in requete:
+            reponse["id"] = requete["id"]
+        return reponse
+
+    async def traiter(self, requete):
+        """
+        Exécute la commande d'une requête.
+
+        Args:
+            requete: Le dictionnaire de la requête.
+
+        Returns:
+            Le dictionnaire de la réponse, sans "ok".
+
+        Raises:
+            ErreurRequete: Si la requête est invalide.
+        """
+        commande = requete.get("commande")
+        if commande == "statistiques":
+            return self.statistiques()
+        if commande == "nouvelle":
+            session = self.creer_session(requete)
+        else:
+            session = self.sessions.get(requete.get("session"))
+            if session is None:
+                raise ErreurRequete("Session inconnue: {}".format(requete.get("session")))
+
+        async with session.verrou:
+            try:
+                return await self.traiter_session(session, commande, requete)
+            except ErreurRequete:
+                raise
+            except Exception:
+                # La partie est dans un état inconnu: elle ne peut plus servir
+                self.fermer_session(session)
+                raise
+
+    async def traiter_session(self, session, commande, requete):
+        """
+        Exécute la commande d'une requête sur une session, dont le verrou est pris.
+
+        Args:
+            session: La Session de la requête.
+            commande: La commande.
+            requete: Le dictionnaire de la requête.
+
+        Returns:
+            Le dictionnaire de la réponse, sans "ok".
+
+        Raises:
+            ErreurRequete: Si la requête est invalide.
+        """
+        if commande == "nouvelle":
+            await session.avancer(self)
+            return session.etat()
+        if commande == "jouer":
+            coup = requete.get("coup")
+            if not isinstance(coup, list) or len(coup) != 2:
+                raise ErreurRequete("Le coup doit être une liste [ligne, colonne].")
+            session.jouer(tuple(coup))
+            self.coups += 1
+            await session.avancer(self)
+            return session.etat()
+        if commande == "annuler":
+            if not session.partie.annuler_tour():
+                raise ErreurRequete("Aucun coup à annuler.")
+            await session.avancer(self)
+            return session.etat()
+        if commande == "etat":
+            return session.etat()
+        if commande == "fermer":
+            self.fermer_session(session)
+            return {"session": session.numero}
+        raise ErreurRequete("Commande inconnue: {}".format(commande))
+
+    def fermer_session(self, session):
+        """
+        Retire une session du serveur et libère les ressources de ses joueurs.
+
+        Args:
+            session: La Session.
+        """
+        if self.sessions.pop(session.numero, None) is not None:
+            session.fermer()
+
+    def creer_session(self, requete):
+        """
+        Crée une partie et sa session.
+
+        Args:
+            requete: La requête "nouvelle": les types des joueurs "noir" et "blanc" (voir TYPES_JOUEUR, "Humain" par
+                défaut), la "profondeur" des joueurs AlphaBeta, les "playouts" des joueurs MCTS et la représentation
+                de la "planche" (voir Partie).
+
+        Returns:
+            La Session.
+
+        Raises:
+            ErreurRequete: Si un paramètre est invalide.
+        """
+        type_planche = requete.get("planche", "bitboard")
+        if type_planche not in TYPES_PLANCHE:
+            raise ErreurRequete("Type de planche invalide: {}".format(type_planche))
+        profondeur = entier_positif(requete, "profondeur", 2)
+        playouts = entier_positif(requete, "playouts", 200)
+        # Les deux types sont vérifiés avant de créer un joueur, qui peut avoir des processus à libérer
+        for couleur in ("noir", "blanc"):
+            if requete.get(couleur, "Humain") not in TYPES_JOUEUR:
+                raise ErreurRequete("Type de joueur invalide: {}".format(requete.get(couleur)))
+        partie = Partie(type_planche=type_planche,
+                        joueur_noir=creer_joueur_session(requete.get("noir", "Humain"), "noir", profondeur, playouts),
+                        joueur_blanc=creer_joueur_session(requete.get("blanc", "Humain"), "blanc", profondeur,
+                                                          playouts),
+                        verbeux=False)
+        session = Session(next(self.numeros), partie)
+        self.sessions[session.numero] = session
+        self.sessions_creees += 1
+        return session
+
+    def statistiques(self):
+        """
+        Retourne les statistiques du serveur depuis son démarrage.
+
+        Returns:
+            Un dictionnaire contenant le nombre de sessions ouvertes et créées, de connexions ouvertes, de requêtes et
+            de coups joués, le débit en coups par seconde et les latences des requêtes et des coups ordinateur (voir
+            resume_latences).
+        """
+        duree = time.perf_counter() - self.debut
+        return {
+            "sessions": len(self.sessions),
+            "sessions_creees": self.sessions_creees,
+            "connexions": self.connexions,
+            "requetes": self.requetes,
+            "coups": self.coups,
+            "duree": duree,
+            "coups_par_seconde": self.coups / duree if duree > 0 else 0.0,
+            "latences_requetes": resume_latences(self.latences),
+            "latences_ordinateur": resume_latences(self.latences_ordinateur),
+        }
+
+
+def formater_statistiques(statistiques):
+    """
+    Met les statistiques du serveur (voir Serveur.statistiques) sur une ligne.
+    """
+    latences = statistiques["latences_requetes"]
+    return ("{sessions} sessions ({sessions_creees} créées) | {coups} coups, {coups_par_seconde:.1f} coups/s | "
+            "latence p50 {p50:.2f} ms p90 {p90:.2f} ms p99 {p99:.2f} ms").format(
+        p50=latences["p50_ms"], p90=latences["p90_ms"], p99=latences["p99_ms"], **statistiques)
+
+
+async def servir(hote=HOTE, port=PORT, chemin=None, nb_fils=4, rapport_chaque=10, afficher=print):
+    """
+    Démarre un serveur et le fait tourner jusqu'à ce que la tâche soit annulée (Ctrl-C avec asyncio.run).
+
+    Args:
+        hote: L'adresse TCP d'écoute.
+        port: Le port TCP.
+        chemin: Le chemin d'un socket Unix, utilisé plutôt que TCP s'il est donné.
+        nb_fils: Le nombre de fils d'exécution qui cherchent les coups ordinateur.
+        rapport_chaque: Le nombre de secondes entre deux affichages des statistiques.
+        afficher: La fonction utilisée pour afficher les statistiques (None pour ne rien afficher).
+    """
+    serveur = Serveur(nb_fils)
+    await serveur.demarrer(hote, port, chemin)
+    if afficher is not None:
+        afficher("Serveur à l'écoute sur {}".format(serveur.adresse()))
+    try:
+        while True:
+            await asyncio.sleep(rapport_chaque)
+            if afficher is not None:
+                afficher(formater_statistiques(serveur.statistiques()))
+    finally:
+        await serveur.arreter()
+
+
+class ClientPartie:
+    """
+    Client du serveur: envoie une requête et attend sa réponse.
+    """
+
+    def __init__(self, lecteur, ecrivain):
+        self.lecteur = lecteur
+        self.ecrivain = ecrivain
+
+    @classmethod
+    async def connecter(cls, hote=HOTE, port=PORT, chemin=None):
+        """
+        Ouvre une connexion au serveur.
+
+        Args:
+            hote: L'adresse TCP du serveur.
+            port: Le port TCP.
+            chemin: Le chemin d'un socket Unix, utilisé plutôt que TCP s'il est donné.
+
+        Returns:
+            Le ClientPartie.
+        """
+        if chemin is not None:
+            lecteur, ecrivain = await asyncio.open_unix_connection(chemin)
+        else:
+            lecteur, ecrivain = await asyncio.open_connection(hote, port)
+        return cls(lecteur, ecrivain)
+
+    async def requete(self, commande, **parametres):
+        """
+        Envoie une requête et attend la réponse.
+
+        Args:
+            commande: La commande (voir le protocole au début du module).
+            parametres: Les autres champs de la requête.
+
+        Returns:
+            Le dictionnaire de la réponse.
+
+        Raises:
+            ErreurRequete: Si le serveur répond par une erreur.
+        """
+        parametres["commande"] = commande
+        self.ecrivain.write(json.dumps(parametres).encode() + b"\n")
+        await self.ecrivain.drain()
+        ligne = await self.lecteur.readline()
+        if not ligne:
+            raise ConnectionError("Connexion fermée par le serveur.")
+        reponse = json.loads(ligne)
+        if not reponse["ok"]:
+            raise ErreurRequete(reponse["erreur"])
+        return reponse
+
+    async def fermer(self):
+        self.ecrivain.close()
+        await self.ecrivain.wait_closed()
+
+
+async def tester_charge(hote=HOTE, port=PORT, chemin=None, nb_clients=10, nb_parties=5, adversaire="Ordinateur",
+                        profondeur=2, graine=0):
+    """
+    Test de charge: nb_clients clients jouent chacun nb_parties parties en même temps contre le serveur, comme
+    joueurs humains noirs qui jouent des coups au hasard.
+
+    Args:
+        hote: L'adresse TCP du serveur.
+        port: Le port TCP.
+        chemin: Le chemin d'un socket Unix, utilisé plutôt que TCP s'il est donné.
+        nb_clients: Le nombre de clients simultanés, chacun avec sa connexion.
+        nb_parties: Le nombre de parties jouées par chaque client, l'une après l'autre.
+        adversaire: Le type du joueur blanc (voir TYPES_JOUEUR).
+        profondeur: La profondeur de recherche d'un adversaire "AlphaBeta".
+        graine: La graine des coups au hasard.
+
+    Returns:
+        Un dictionnaire contenant le nombre de parties et de coups joués par les clients, la durée du test, le débit
+        en coups par seconde, les latences des requêtes vues par les clients (voir resume_latences) et les
+        statistiques du serveur à la fin du test.
+    """
+    latences = MesureFonction("requetes")
+    totaux = {"parties": 0, "coups": 0}
+
+    async def jouer_client(numero):
+        generateur = random.Random(graine * 1000003 + numero)
+        client = await ClientPartie.connecter(hote, port, chemin)
+        try:
+            for _ in range(nb_parties):
+                debut = time.perf_counter_ns()
+                etat = await client.requete("nouvelle", noir="Humain", blanc=adversaire, profondeur=profondeur)
+                enregistrer_duree(latences, debut)
+                while not etat["terminee"]:
+                    debut = time.perf_counter_ns()
+                    etat = await client.requete("jouer", session=etat["session"],
+                                                coup=generateur.choice(etat["coups_possibles"]))
+                    enregistrer_duree(latences, debut)
+                    totaux["coups"] += 1
+                await client.requete("fermer", session=etat["session"])
+                totaux["parties"] += 1
+        finally:
+            await client.fermer()
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(jouer_client(numero) for numero in range(nb_clients)))
+    duree = time.perf_counter() - debut
+
+    client = await ClientPartie.connecter(hote, port, chemin)
+    statistiques_serveur = await client.requete("statistiques")
+    await client.fermer()
+    del statistiques_serveur["ok"]
+
+    return {
+        "parties": totaux["parties"],
+        "coups": totaux["coups"],
+        "duree": duree,
+        "coups_par_seconde": totaux["coups"] / duree if duree > 0 else 0.0,
+        "latences": resume_latences(latences),
+        "serveur": statistiques_serveur,
+    }
@@ -0,0 +1,241 @@
+"""
+Simulation de parties ordinateur contre ordinateur sans console, réparties sur plusieurs processus.
+"""
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from othello.partie import Partie
+from othello.joueur import JoueurOrdinateur, JoueurAlphaBeta
+from othello.bibliotheque import ouvrir_bibliotheque
+from othello.enregistrement import enregistrer_partie, ecrire_parties
+from othello.instrumentation import Instrumentation
+from othello.evaluation import charger_evaluation
+
+
+def creer_joueur_simule(type_joueur, couleur, generateur, profondeur=2, evaluation=None):
+    """
+    Crée un joueur ordinateur pour une partie simulée.
+
+    Args:
+        type_joueur: "Ordinateur" (coups au hasard) ou "AlphaBeta".
+        couleur: La couleur du joueur.
+        generateur: Le générateur aléatoire du joueur (random.Random), pour des parties reproductibles.
+        profondeur: La profondeur de recherche d'un joueur "AlphaBeta".
+        evaluation: L'évaluation par motifs d'un joueur "AlphaBeta" (None pour l'évaluation positionnelle).
+
+    Returns:
+        Le joueur.
+    """
+    if type_joueur == "AlphaBeta":
+        return JoueurAlphaBeta(couleur, profondeur, memoire_mo=1, evaluation=evaluation)
+    if type_joueur == "Ordinateur":
+        return JoueurOrdinateur(couleur, generateur)
+    raise ValueError("Type de joueur simulé invalide: {}".format(type_joueur))
+
+
+def jouer_partie_simulee(tache):
+    """
+    Joue une partie complète sans console et en retourne le résultat. Cette fonction est exécutée par les processus
+    de la simulation.
+
+    Args:
+        tache: Un tuple (graine, type du joueur noir, type du joueur blanc, profondeur, type de planche, fichier de
+            la bibliothèque d'ouvertures ou None, True pour instrumenter la partie, fichier des poids de l'évaluation
+            par motifs des joueurs AlphaBeta ou None).
+
+    Returns:
+        Un dictionnaire contenant le gagnant ("noir", "blanc" ou None), le nombre de pièces de chaque couleur, le
+        nombre de coups joués, le nombre de tours passés, la durée de la partie, son enregistrement (voir le module
+        enregistrement) et, si la partie est instrumentée, ses mesures brutes (voir Instrumentation.exporter).
+    """
+    graine, type_noir, type_blanc, profondeur, type_planche, nom_bibliotheque, instrumenter, nom_poids = tache
+    generateur = random.Random(graine)
+    debut = time.perf_counter()
+
+    evaluation = charger_evaluation(nom_poids) if nom_poids is not None else None
+    partie = Partie(type_planche=type_planche,
+                    joueur_noir=creer_joueur_simule(type_noir, "noir", generateur, profondeur, evaluation),
+                    joueur_blanc=creer_joueur_simule(type_blanc, "blanc", generateur, profondeur, evaluation),
+                    verbeux=False,
+                    bibliotheque=ouvrir_bibliotheque(nom_bibliotheque) if nom_bibliotheque is not None else None)
+    instrumentation = Instrumentation() if instrumenter else None
+    if instrumentation is not None:
+        with instrumentation:
+            partie.jouer()
+    else:
+        partie.jouer()
+
+    resultat = {
+        "gagnant": partie.gagnant,
+        "noir": partie.planche.nb_noir,
+        "blanc": partie.planche.nb_blanc,
+        "coups": partie.nb_coups,
+        "passes": partie.nb_passes,
+        "duree": time.perf_counter() - debut,
+        "enregistrement": enregistrer_partie(partie),
+    }
+    if instrumentation is not None:
+        resultat["instrumentation"] = instrumentation.exporter()
+    return resultat
+
+
+def initialiser_processus(graine):
+    """
+    Initialise un processus de la simulation: le module random global reçoit une graine propre au processus.
+
+    Args:
+        graine: La graine de la simulation.
+    """
+    random.seed(graine * 1000003 + os.getpid())
+
+
+class StatistiquesSimulation:
+    """
+    Agrège les résultats des parties au fur et à mesure qu'ils arrivent.
+    """
+
+    def __init__(self):
+        """
+        Initialise des statistiques vides; le débit est mesuré à partir de leur création.
+        """
+        self.parties = 0
+        self.victoires_noir = 0
+        self.victoires_blanc = 0
+        self.nulles = 0
+        self.coups = 0
+        self.passes = 0
+        self.debut = time.perf_counter()
+
+    def ajouter(self, resultat):
+        """
+        Ajoute le résultat d'une partie (voir jouer_partie_simulee).
+
+        Args:
+            resultat: Le dictionnaire de résultat de la partie.
+        """
+        self.parties += 1
+        if resultat["gagnant"] == "noir":
+            self.victoires_noir += 1
+        elif resultat["gagnant"] == "blanc":
+            self.victoires_blanc += 1
+        else:
+            self.nulles += 1
+        self.coups += resultat["coups"]
+        self.passes += resultat["passes"]
+
+    def resume(self):
+        """
+        Retourne le résumé des parties reçues jusqu'ici.
+
+        Returns:
+            Un dictionnaire contenant le nombre de parties, les taux de victoire de chaque couleur et de nulles, la
+            longueur moyenne d'une partie (en coups), le nombre moyen de tours passés et le débit en parties par
+            seconde.
+        """
+        parties = max(self.parties, 1)
+        duree = time.perf_counter() - self.debut
+        return {
+            "parties": self.parties,
+            "taux_noir": self.victoires_noir / parties,
+            "taux_blanc": self.victoires_blanc / parties,
+            "taux_nulles": self.nulles / parties,
+            "longueur_moyenne": self.coups / parties,
+            "passes_moyennes": self.passes / parties,
+            "parties_par_seconde": self.parties / duree if duree > 0 else 0.0,
+        }
+
+    def __repr__(self):
+        """
+        Affiche le résumé sur une ligne.
+        """
+        resume = self.resume()
+        return ("{parties} parties | noir {taux_noir:.1%} blanc {taux_blanc:.1%} nulles {taux_nulles:.1%} | "
+                "{longueur_moyenne:.1f} coups, {passes_moyennes:.2f} passes en moyenne | "
+                "{parties_par_seconde:.1f} parties/s").format(**resume)
+
+
+def simuler(nb_parties, nb_processus=1, graine=0, type_noir="Ordinateur", type_blanc="Ordinateur", profondeur=2,
+            type_planche="bitboard", rapport_chaque=100, afficher=print, bibliotheque=None, archive=None,
+            instrumentation=None, mesures_parties=None, poids=None):
+    """
+    Joue nb_parties parties sans console, réparties sur nb_processus processus, et affiche les statistiques agrégées
+    au fur et à mesure que les résultats arrivent.
+
+    Chaque partie reçoit sa propre graine (graine de la simulation et numéro de la partie): les résultats ne
+    dépendent donc pas du nombre de processus.
+
+    Args:
+        nb_parties: Le nombre de parties à jouer.
+        nb_processus: Le nombre de processus (1 pour tout jouer dans le processus courant).
+        graine: La graine de la simulation.
+        type_noir: Le type du joueur noir, "Ordinateur" ou "AlphaBeta".
+        type_blanc: Le type du joueur blanc, "Ordinateur" ou "AlphaBeta".
+        profondeur: La profondeur de recherche des joueurs "AlphaBeta".
+        type_planche: La représentation de la planche (voir Partie).
+        rapport_chaque: Le nombre de parties entre deux affichages des statistiques.
+        afficher: La fonction utilisée pour afficher les statistiques (None pour ne rien afficher).
+        bibliotheque: Le fichier de la bibliothèque d'ouvertures des joueurs (None pour aucune). Chaque processus le
+            projette en mémoire une seule fois.
+        archive: Le fichier où enregistrer les parties au fur et à mesure (None pour ne pas les garder).
+        instrumentation: Une Instrumentation où fusionner les mesures de toutes les parties (None pour ne pas
+            instrumenter les parties). Chaque partie est instrumentée dans son processus.
+        mesures_parties: Le fichier JSON où écrire le résumé des mesures de chaque partie, une partie par ligne (None
+            pour aucun). Les parties sont alors instrumentées même sans instrumentation.
+        poids: Le fichier des poids de l'évaluation par motifs des joueurs "AlphaBeta" (None pour l'évaluation
+            positionnelle). Chaque processus le charge une seule fois.
+
+    Returns:
+        Les StatistiquesSimulation finales.
+    """
+    instrumenter = instrumentation is not None or mesures_parties is not None
+    taches = ((graine * 1000003 + indice, type_noir, type_blanc, profondeur, type_planche, bibliotheque, instrumenter,
+               poids)
+              for indice in range(nb_parties))
+    statistiques = StatistiquesSimulation()
+
+    if nb_processus <= 1:
+        initialiser_processus(graine)
+        resultats = map(jouer_partie_simulee, taches)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(nb_processus, initializer=initialiser_processus, initargs=(graine,))
+        taille_lot = max(1, min(16, nb_parties // (nb_processus * 8)))
+        resultats = pool.imap_unordered(jouer_partie_simulee, taches, chunksize=taille_lot)
+
+    fichier_mesures = open(mesures_parties, "w") if mesures_parties is not None else None
+
+    def parcourir_resultats():
+        for resultat in resultats:
+            statistiques.ajouter(resultat)
+            if instrumenter:
+                mesures = resultat["instrumentation"]
+                if instrumentation is not None:
+                    instrumentation.fusionner(mesures)
+                if fichier_mesures is not None:
+                    partie = Instrumentation()
+                    partie.fusionner(mesures)
+                    fichier_mesures.write(json.dumps({"partie": statistiques.parties, "coups": resultat["coups"],
+                                                      "mesures": partie.resume()}) + "\n")
+            if afficher is not None and statistiques.parties % rapport_chaque == 0:
+                afficher(statistiques)
+            yield resultat["enregistrement"]
+
+    try:
+        if archive is not None:
+            ecrire_parties(archive, parcourir_resultats())
+        else:
+            for _ in parcourir_resultats():
+                pass
+    finally:
+        if fichier_mesures is not None:
+            fichier_mesures.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    if afficher is not None and statistiques.parties % rapport_chaque != 0:
+        afficher(statistiques)
+    return statistiques
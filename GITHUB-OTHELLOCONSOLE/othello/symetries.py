@@ -0,0 +1,140 @@
+"""
+Les 8 symétries de la planche (rotations et réflexions), appliquées aux bitboards et aux indices de cases.
+
+Une symétrie est un entier de 0 à 7: le bit 1 transpose la planche (échange lignes et colonnes), le bit 2 la
+retourne verticalement (ligne -> 7 - ligne) et le bit 4 horizontalement (colonne -> 7 - colonne), dans cet ordre.
+"""
+
+TRANSPOSITION = 1
+VERTICALE = 2
+HORIZONTALE = 4
+
+SYMETRIES = range(8)
+
+
+def transposer(bitboard):
+    """
+    Échange les lignes et les colonnes d'un bitboard: la case (ligne, colonne) passe en (colonne, ligne).
+    """
+    t = 0x0F0F0F0F00000000 & (bitboard ^ (bitboard << 28))
+    bitboard ^= t ^ (t >> 28)
+    t = 0x3333000033330000 & (bitboard ^ (bitboard << 14))
+    bitboard ^= t ^ (t >> 14)
+    t = 0x5500550055005500 & (bitboard ^ (bitboard << 7))
+    bitboard ^= t ^ (t >> 7)
+    return bitboard
+
+
+def retourner_verticalement(bitboard):
+    """
+    Inverse l'ordre des lignes d'un bitboard: la case (ligne, colonne) passe en (7 - ligne, colonne).
+    """
+    return int.from_bytes(bitboard.to_bytes(8, "little"), "big")
+
+
+def retourner_horizontalement(bitboard):
+    """
+    Inverse l'ordre des colonnes d'un bitboard: la case (ligne, colonne) passe en (ligne, 7 - colonne).
+    """
+    bitboard = ((bitboard >> 1) & 0x5555555555555555) | ((bitboard & 0x5555555555555555) << 1)
+    bitboard = ((bitboard >> 2) & 0x3333333333333333) | ((bitboard & 0x3333333333333333) << 2)
+    return ((bitboard >> 4) & 0x0F0F0F0F0F0F0F0F) | ((bitboard & 0x0F0F0F0F0F0F0F0F) << 4)
+
+
+def appliquer(bitboard, symetrie):
+    """
+    Applique une symétrie à un bitboard.
+
+    Args:
+        bitboard: Le bitboard.
+        symetrie: La symétrie, de 0 à 7.
+
+    Returns:
+        Le bitboard transformé.
+    """
+    if symetrie & TRANSPOSITION:
+        bitboard = transposer(bitboard)
+    if symetrie & VERTICALE:
+        bitboard = retourner_verticalement(bitboard)
+    if symetrie & HORIZONTALE:
+        bitboard = retourner_horizontalement(bitboard)
+    return bitboard
+
+
+def appliquer_indice(indice, symetrie):
+    """
+    Applique une symétrie à l'indice (ligne * 8 + colonne) d'une case.
+
+    Args:
+        indice: L'indice de la case.
+        symetrie: La symétrie, de 0 à 7.
+
+    Returns:
+        L'indice de la case transformée.
+    """
+    ligne, colonne = divmod(indice, 8)
+    if symetrie & TRANSPOSITION:
+        ligne, colonne = colonne, ligne
+    if symetrie & VERTICALE:
+        ligne = 7 - ligne
+    if symetrie & HORIZONTALE:
+        colonne = 7 - colonne
+    return ligne * 8 + colonne
+
+
+def inverser_indice(indice, symetrie):
+    """
+    Inverse de appliquer_indice(): retrouve la case d'origine d'une case transformée.
+
+    Args:
+        indice: L'indice de la case transformée.
+        symetrie: La symétrie, de 0 à 7.
+
+    Returns:
+        L'indice de la case d'origine.
+    """
+    ligne, colonne = divmod(indice, 8)
+    if symetrie & HORIZONTALE:
+        colonne = 7 - colonne
+    if symetrie & VERTICALE:
+        ligne = 7 - ligne
+    if symetrie & TRANSPOSITION:
+        ligne, colonne = colonne, ligne
+    return ligne * 8 + colonne
+
+
+def forme_canonique(joueur, adversaire):
+    """
+    Trouve le représentant d'une position parmi ses 8 images: celle dont le couple (joueur, adversaire) est le plus
+    petit. Deux positions équivalentes par symétrie ont donc la même forme canonique.
+
+    Args:
+        joueur: Le bitboard du joueur qui doit jouer.
+        adversaire: Le bitboard de l'adversaire.
+
+    Returns:
+        Un tuple (joueur, adversaire, symétrie) de la forme canonique et de la symétrie qui y mène.
+    """
+    meilleure = None
+    for symetrie in SYMETRIES:
+        image = (appliquer(joueur, symetrie), appliquer(adversaire, symetrie), symetrie)
+        if meilleure is None or image < meilleure:
+            meilleure = image
+    return meilleure
+
+
+def symetries_canoniques(joueur, adversaire):
+    """
+    Liste toutes les symétries qui mènent à la forme canonique d'une position (plusieurs lorsque la position est
+    elle-même symétrique, comme la position initiale).
+
+    Args:
+        joueur: Le bitboard du joueur qui doit jouer.
+        adversaire: Le bitboard de l'adversaire.
+
+    Returns:
+        Un tuple (joueur, adversaire, liste des symétries).
+    """
+    images = [(appliquer(joueur, symetrie), appliquer(adversaire, symetrie)) for symetrie in SYMETRIES]
+    canonique = min(images)
+    return canonique[0], canonique[1], [symetrie for symetrie in SYMETRIES if images[symetrie] == canonique]
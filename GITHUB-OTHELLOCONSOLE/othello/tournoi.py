@@ -0,0 +1,419 @@
+"""
+Tournoi toutes rondes entre joueurs ordinateur, avec classement Elo et arrêt anticipé des matchs par test séquentiel du
+rapport de vraisemblance (SPRT).
+
+Un match se joue par paires de parties: les deux joueurs jouent la même ouverture équilibrée une fois avec chaque
+couleur, ce qui annule l'avantage de l'ouverture et de la couleur. Les statistiques sont calculées sur les paires
+(pentanomiales: une paire rapporte 0, 1/2, 1, 3/2 ou 2 points), car les deux parties d'une paire ne sont pas
+indépendantes.
+
+Les joueurs sont décrits par une chaîne:
+- "Ordinateur": coups au hasard (JoueurOrdinateur);
+- "AlphaBeta:profondeur" ou "AlphaBeta:profondeur:fichier des poids" (JoueurAlphaBeta, profondeur 4 par défaut);
+- "MCTS:playouts" (JoueurMCTS, 1000 playouts par défaut).
+"""
+import collections
+import math
+import multiprocessing
+import random
+import time
+
+from othello.base_positions import cle_position
+from othello.evaluation import charger_evaluation
+from othello.joueur import JoueurOrdinateur, JoueurAlphaBeta, JoueurMCTS
+from othello.partie import Partie
+from othello.planche_bitboard import PlancheBitboard
+from othello.recherche import RechercheAlphaBeta, autre_couleur
+
+# Nombre maximal de paires en cours par processus: un match arrêté par le SPRT n'en gaspille que quelques-unes.
+PAIRES_PAR_PROCESSUS = 2
+
+# Quantile de la loi normale des intervalles de confiance à 95 %.
+QUANTILE_95 = 1.959964
+
+# Nombre de paires fictives, réparties également entre les 5 résultats possibles, ajoutées aux paires jouées pour le
+# SPRT: sans elles, un match dont toutes les paires ont le même résultat n'aurait aucune variance et ne serait jamais
+# décidé, et les tout premiers résultats suffiraient à le décider.
+PAIRES_FICTIVES = 1.0
+
+
+def elo_de_score(score):
+    """
+    Convertit un score moyen par partie (entre 0 et 1) en différence Elo, selon le modèle logistique.
+
+    Args:
+        score: Le score moyen.
+
+    Returns:
+        La différence Elo (infinie pour un score de 0 ou de 1).
+    """
+    if score <= 0.0:
+        return -math.inf
+    if score >= 1.0:
+        return math.inf
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def score_de_elo(elo):
+    """
+    Inverse de elo_de_score: le score moyen attendu pour une différence Elo.
+
+    Args:
+        elo: La différence Elo.
+
+    Returns:
+        Le score moyen attendu, entre 0 et 1.
+    """
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+def creer_moteur(description, couleur, generateur):
+    """
+    Crée un joueur ordinateur à partir de sa description (voir la documentation du module).
+
+    Args:
+        description: La description du joueur.
+        couleur: La couleur du joueur.
+        generateur: Le générateur aléatoire de la partie (random.Random).
+
+    Returns:
+        Le joueur.
+    """
+    morceaux = description.split(":")
+    if morceaux[0] == "Ordinateur" and len(morceaux) == 1:
+        return JoueurOrdinateur(couleur, generateur)
+    if morceaux[0] == "AlphaBeta" and len(morceaux) <= 3:
+        profondeur = int(morceaux[1]) if len(morceaux) > 1 else 4
+        evaluation = charger_evaluation(morceaux[2]) if len(morceaux) > 2 else None
+        return JoueurAlphaBeta(couleur, profondeur, memoire_mo=1, evaluation=evaluation, reflexion=False)
+    if morceaux[0] == "MCTS" and len(morceaux) <= 2:
+        playouts = int(morceaux[1]) if len(morceaux) > 1 else 1000
+        return JoueurMCTS(couleur, playouts, graine=generateur.getrandbits(32))
+    raise ValueError("Description de joueur invalide: {}".format(description))
+
+
+def ouvertures_equilibrees(nombre, demi_coups=6, profondeur=4, seuil=20, graine=0, essais_max=None):
+    """
+    Tire des ouvertures au hasard et garde celles que la recherche juge équilibrées. Deux ouvertures qui mènent à la
+    même position, à une symétrie près, ne sont gardées qu'une fois.
+
+    Args:
+        nombre: Le nombre d'ouvertures voulues.
+        demi_coups: Le nombre de coups au hasard de chaque ouverture.
+        profondeur: La profondeur de la recherche qui évalue la position finale de l'ouverture.
+        seuil: L'écart maximal de cette évaluation (en valeur absolue) pour que l'ouverture soit gardée.
+        graine: La graine du tirage.
+        essais_max: Le nombre maximal d'ouvertures tirées (None pour 50 par ouverture voulue).
+
+    Returns:
+        La liste des ouvertures, chacune un tuple de coups (ligne, colonne). Elle peut en compter moins que nombre si
+        les essais sont épuisés.
+    """
+    generateur = random.Random(graine)
+    if essais_max is None:
+        essais_max = 50 * nombre
+    ouvertures = []
+    vues = set()
+    for _ in range(essais_max):
+        if len(ouvertures) >= nombre:
+            break
+        planche = PlancheBitboard()
+        couleur = "noir"
+        coups = []
+        for _ in range(demi_coups):
+            possibles = planche.lister_coups_possibles_de_couleur(couleur)
+            if not possibles:
+                break
+            coups.append(generateur.choice(possibles))
+            planche.jouer_coup(coups[-1], couleur)
+            couleur = autre_couleur(couleur)
+        if len(coups) < demi_coups:
+            continue
+
+        cle = cle_position(*planche.bitboards(couleur))
+        if cle in vues:
+            continue
+        vues.add(cle)
+        if len(planche.lister_coups_possibles_de_couleur(couleur)) < 2:
+            continue
+        recherche = RechercheAlphaBeta(profondeur, taille_table_mo=1)
+        recherche.chercher(planche, couleur)
+        if abs(recherche.meilleur_score) <= seuil:
+            ouvertures.append(tuple(coups))
+    return ouvertures
+
+
+def jouer_paire(tache):
+    """
+    Joue une paire de parties à partir d'une ouverture: le premier joueur a les noirs dans la première partie et les
+    blancs dans la seconde. Cette fonction est exécutée par les processus du tournoi.
+
+    Args:
+        tache: Un tuple (numéro de la paire, ouverture, description du premier joueur, description du second,
+            graine).
+
+    Returns:
+        Un couple (numéro de la paire, points du premier joueur dans chaque partie): un tuple de deux valeurs parmi
+        1, 0.5 et 0.
+    """
+    numero, ouverture, description_a, description_b, graine = tache
+    generateur = random.Random(graine)
+    points = []
+    for couleur_a in ["noir", "blanc"]:
+        joueur_a = creer_moteur(description_a, couleur_a, generateur)
+        joueur_b = creer_moteur(description_b, autre_couleur(couleur_a), generateur)
+        joueurs = (joueur_a, joueur_b) if couleur_a == "noir" else (joueur_b, joueur_a)
+        partie = Partie(type_planche="bitboard", joueur_noir=joueurs[0], joueur_blanc=joueurs[1], verbeux=False)
+        partie.rejouer(ouverture)
+        partie.jouer()
+        if partie.gagnant is None:
+            points.append(0.5)
+        else:
+            points.append(1.0 if partie.gagnant == couleur_a else 0.0)
+    return numero, tuple(points)
+
+
+class ResultatsMatch:
+    """
+    Résultats d'un match entre deux joueurs, du point de vue du premier.
+    """
+
+    def __init__(self, joueur_a, joueur_b):
+        """
+        Initialise un match sans aucune partie jouée.
+
+        Args:
+            joueur_a: La description du premier joueur.
+            joueur_b: La description du second joueur.
+        """
+        self.joueur_a = joueur_a
+        self.joueur_b = joueur_b
+
+        # Nombre de paires selon les points du premier joueur: 0, 1/2, 1, 3/2 et 2 points.
+        self.paires = [0] * 5
+        self.victoires = 0
+        self.nulles = 0
+        self.defaites = 0
+
+        # Décision du SPRT: "H1" (le premier joueur est plus fort), "H0", ou None tant qu'aucune n'est prise.
+        self.decision = None
+        self.duree = 0.0
+
+    @property
+    def nb_paires(self):
+        """
+        Le nombre de paires jouées.
+        """
+        return sum(self.paires)
+
+    def ajouter(self, points):
+        """
+        Ajoute le résultat d'une paire (voir jouer_paire).
+
+        Args:
+            points: Les points du premier joueur dans chacune des deux parties.
+        """
+        self.paires[int(sum(points) * 2)] += 1
+        for point in points:
+            if point == 1.0:
+                self.victoires += 1
+            elif point == 0.5:
+                self.nulles += 1
+            else:
+                self.defaites += 1
+
+    def moyenne_variance(self, paires_fictives=0.0):
+        """
+        Calcule la moyenne et la variance du score par partie d'une paire.
+
+        Args:
+            paires_fictives: Le nombre de paires fictives, réparties également entre les 5 résultats, ajoutées aux
+                paires jouées.
+
+        Returns:
+            Un tuple (nombre de paires, moyenne, variance), la moyenne valant 0.5 si aucune paire n'est jouée.
+        """
+        nombres = [nombre + paires_fictives / 5.0 for nombre in self.paires]
+        total = sum(nombres)
+        if total == 0:
+            return 0, 0.5, 0.0
+        moyenne = sum(nombre * indice / 4.0 for indice, nombre in enumerate(nombres)) / total
+        variance = sum(nombre * (indice / 4.0 - moyenne) ** 2 for indice, nombre in enumerate(nombres)) / total
+        return total, moyenne, variance
+
+    def score(self):
+        """
+        Returns:
+            Le score moyen par partie du premier joueur, entre 0 et 1 (0.5 si aucune paire n'est jouée).
+        """
+        return self.moyenne_variance()[1]
+
+    def elo(self):
+        """
+        Estime la différence Elo entre les deux joueurs et son intervalle de confiance à 95 %, obtenu en convertissant
+        les bornes de l'intervalle du score.
+
+        Returns:
+            Un tuple (Elo, borne inférieure, borne supérieure).
+        """
+        nb_paires, score, variance = self.moyenne_variance()
+        marge = QUANTILE_95 * math.sqrt(variance / nb_paires) if nb_paires else 0.0
+        return elo_de_score(score), elo_de_score(score - marge), elo_de_score(score + marge)
+
+    def llr(self, elo0, elo1):
+        """
+        Calcule le logarithme du rapport de vraisemblance entre les hypothèses "la différence Elo vaut elo1" (H1) et
+        "elle vaut elo0" (H0), par l'approximation normale du SPRT généralisé sur les scores des paires (auxquelles
+        s'ajoutent PAIRES_FICTIVES).
+
+        Args:
+            elo0: La différence Elo de l'hypothèse nulle.
+            elo1: La différence Elo de l'hypothèse alternative.
+
+        Returns:
+            Le logarithme du rapport de vraisemblance.
+        """
+        nb_paires, score, variance = self.moyenne_variance(PAIRES_FICTIVES)
+        score0 = score_de_elo(elo0)
+        score1 = score_de_elo(elo1)
+        return nb_paires * (score1 - score0) * (2.0 * score - score0 - score1) / (2.0 * variance)
+
+    def __repr__(self):
+        """
+        Résume le match sur une ligne.
+        """
+        elo, bas, haut = self.elo()
+        return "{} contre {}: +{} ={} -{} en {} paires, score {:.1%}, Elo {:+.0f} [{:+.0f}, {:+.0f}]{}".format(
+            self.joueur_a, self.joueur_b, self.victoires, self.nulles, self.defaites, self.nb_paires, self.score(),
+            elo, bas, haut, "" if self.decision is None else ", SPRT: " + self.decision)
+
+
+def bornes_sprt(alpha, beta):
+    """
+    Calcule les bornes de décision du SPRT.
+
+    Args:
+        alpha: Le risque de première espèce (accepter H1 alors que H0 est vraie).
+        beta: Le risque de seconde espèce (accepter H0 alors que H1 est vraie).
+
+    Returns:
+        Un couple (borne inférieure, borne supérieure) du logarithme du rapport de vraisemblance: H0 est acceptée
+        sous la première, H1 au-dessus de la seconde.
+    """
+    return math.log(beta / (1.0 - alpha)), math.log((1.0 - beta) / alpha)
+
+
+def jouer_match(joueur_a, joueur_b, ouvertures, paires_max=100, sprt=None, pool=None, nb_processus=1, graine=0,
+                afficher=print):
+    """
+    Joue un match entre deux joueurs, jusqu'à paires_max paires ou jusqu'à la décision du SPRT. Les paires sont
+    comptées dans l'ordre où elles ont été lancées, de sorte que le résultat ne dépend pas du nombre de processus.
+
+    Args:
+        joueur_a: La description du premier joueur.
+        joueur_b: La description du second joueur.
+        ouvertures: Les ouvertures (voir ouvertures_equilibrees), jouées à tour de rôle.
+        paires_max: Le nombre maximal de paires.
+        sprt: None pour jouer toutes les paires, ou un tuple (elo0, elo1, alpha, beta) pour arrêter le match dès que
+            le SPRT accepte une des deux hypothèses.
+        pool: Le groupe de processus qui joue les paires (None pour les jouer dans le processus courant).
+        nb_processus: Le nombre de processus du groupe.
+        graine: La graine du match: chaque paire reçoit une graine qui en dérive.
+        afficher: La fonction utilisée pour afficher la progression (None pour ne rien afficher).
+
+    Returns:
+        Le ResultatsMatch.
+    """
+    debut = time.perf_counter()
+    resultats = ResultatsMatch(joueur_a, joueur_b)
+    bornes = bornes_sprt(sprt[2], sprt[3]) if sprt is not None else None
+    taches = ((numero, ouvertures[numero % len(ouvertures)], joueur_a, joueur_b, graine * 1000003 + numero)
+              for numero in range(paires_max))
+
+    def decider():
+        if bornes is None:
+            return False
+        llr = resultats.llr(sprt[0], sprt[1])
+        if llr <= bornes[0]:
+            resultats.decision = "H0"
+        elif llr >= bornes[1]:
+            resultats.decision = "H1"
+        return resultats.decision is not None
+
+    if pool is None:
+        for tache in taches:
+            resultats.ajouter(jouer_paire(tache)[1])
+            if decider():
+                break
+    else:
+        en_cours = collections.deque()
+        for tache in taches:
+            en_cours.append(pool.apply_async(jouer_paire, (tache,)))
+            if len(en_cours) < PAIRES_PAR_PROCESSUS * nb_processus:
+                continue
+            resultats.ajouter(en_cours.popleft().get()[1])
+            if decider():
+                break
+        # Les paires encore en cours après une décision sont abandonnées
+        while en_cours and resultats.decision is None:
+            resultats.ajouter(en_cours.popleft().get()[1])
+            decider()
+
+    resultats.duree = time.perf_counter() - debut
+    if afficher is not None:
+        afficher("{} ({:.1f} s)".format(resultats, resultats.duree))
+    return resultats
+
+
+def tournoi(joueurs, nb_ouvertures=20, paires_max=100, sprt=None, nb_processus=1, graine=0, afficher=print):
+    """
+    Joue un tournoi toutes rondes: un match (voir jouer_match) entre chaque couple de joueurs, tous sur les mêmes
+    ouvertures équilibrées, puis affiche le classement par points.
+
+    Args:
+        joueurs: Les descriptions des joueurs (voir la documentation du module).
+        nb_ouvertures: Le nombre d'ouvertures équilibrées.
+        paires_max: Le nombre maximal de paires de chaque match.
+        sprt: None, ou un tuple (elo0, elo1, alpha, beta) pour arrêter chaque match à la décision du SPRT.
+        nb_processus: Le nombre de processus (1 pour tout jouer dans le processus courant).
+        graine: La graine des ouvertures et des parties.
+        afficher: La fonction utilisée pour afficher les résultats (None pour ne rien afficher).
+
+    Returns:
+        La liste des ResultatsMatch, un par couple de joueurs.
+    """
+    # Une description invalide est signalée avant de jouer la moindre partie
+    for joueur in joueurs:
+        creer_moteur(joueur, "noir", random.Random(0))
+    ouvertures = ouvertures_equilibrees(nb_ouvertures, graine=graine)
+    if not ouvertures:
+        raise ValueError("Aucune ouverture équilibrée trouvée.")
+    if afficher is not None:
+        afficher("{} ouvertures équilibrées".format(len(ouvertures)))
+
+    pool = multiprocessing.Pool(nb_processus) if nb_processus > 1 else None
+    matchs = []
+    try:
+        for i in range(len(joueurs)):
+            for j in range(i + 1, len(joueurs)):
+                matchs.append(jouer_match(joueurs[i], joueurs[j], ouvertures, paires_max, sprt, pool, nb_processus,
+                                          graine * 1009 + len(matchs), afficher))
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    if afficher is not None:
+        points = {joueur: 0.0 for joueur in joueurs}
+        parties = {joueur: 0 for joueur in joueurs}
+        for match in matchs:
+            nb_parties = 2 * match.nb_paires
+            points[match.joueur_a] += match.score() * nb_parties
+            points[match.joueur_b] += (1.0 - match.score()) * nb_parties
+            parties[match.joueur_a] += nb_parties
+            parties[match.joueur_b] += nb_parties
+        afficher("Classement:")
+        for rang, joueur in enumerate(sorted(joueurs, key=lambda nom: -points[nom] / max(1, parties[nom])), 1):
+            afficher("{:>3}. {:<30} {:7.1f} / {:<5} ({:.1%})".format(
+                rang, joueur, points[joueur], parties[joueur], points[joueur] / max(1, parties[joueur])))
+    return matchs
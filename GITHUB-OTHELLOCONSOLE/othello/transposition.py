@@ -0,0 +1,178 @@
+"""
+Table de transposition de taille fixe pour la recherche alpha-bêta.
+
+Chaque entrée occupe deux mots de 64 bits: le hachage complet de la position (pour détecter les collisions d'indice),
+combiné par ou exclusif aux données, et les données compactées (score, profondeur, type de borne et meilleur coup).
+Les entrées sont groupées par seaux de deux: la première place garde l'entrée la plus profonde, la deuxième est
+toujours remplacée.
+
+Le ou exclusif permet à plusieurs processus de partager la table sans verrou (voir le module recherche_parallele):
+une entrée dont les deux mots ont été écrits par deux processus différents ne redonne plus le hachage, et est donc
+ignorée comme une entrée d'une autre position.
+"""
+
+# Types de bornes du score enregistré.
+EXACTE = 0
+INFERIEURE = 1
+SUPERIEURE = 2
+
+# Valeur du champ "coup" lorsque l'entrée n'a pas de meilleur coup.
+AUCUN_COUP = 64
+
+# Taille d'un seau: deux entrées de deux mots de 8 octets.
+OCTETS_PAR_SEAU = 32
+
+_DECALAGE_SCORE = 1 << 31
+
+
+def compacter(profondeur, borne, score, coup):
+    """
+    Compacte les données d'une entrée dans un entier de 64 bits: score (32 bits, décalé pour être positif),
+    profondeur (8 bits), borne (2 bits) et coup (7 bits). Un mot de données nul signifie une entrée vide.
+    """
+    return (score + _DECALAGE_SCORE) | (profondeur << 32) | (borne << 40) | (coup << 42)
+
+
+def decompacter(donnees):
+    """
+    Inverse de compacter().
+
+    Returns:
+        Un tuple (profondeur, borne, score, coup).
+    """
+    return ((donnees >> 32) & 0xFF, (donnees >> 40) & 0x3, (donnees & 0xFFFFFFFF) - _DECALAGE_SCORE,
+            (donnees >> 42) & 0x7F)
+
+
+class TableTransposition:
+    """
+    Table de transposition dont la mémoire est bornée à un nombre de mégaoctets choisi à la création.
+    """
+
+    def __init__(self, taille_mo=16, memoire=None):
+        """
+        Alloue la table.
+
+        Args:
+            taille_mo: La taille maximale de la table, en mégaoctets. Le nombre de seaux est la plus grande puissance
+                de 2 qui respecte cette limite.
+            memoire: Un tampon existant (bytearray, mémoire partagée...) à utiliser plutôt que d'en allouer un. Sa
+                taille détermine alors celle de la table.
+        """
+        if memoire is None:
+            nb_seaux = 1
+            while nb_seaux * 2 * OCTETS_PAR_SEAU <= taille_mo * 1024 * 1024:
+                nb_seaux *= 2
+            memoire = bytearray(nb_seaux * OCTETS_PAR_SEAU)
+        else:
+            nb_seaux = 1
+            while nb_seaux * 2 * OCTETS_PAR_SEAU <= len(memoire):
+                nb_seaux *= 2
+
+        self.memoire = memoire
+        self.nb_seaux = nb_seaux
+        self.masque = nb_seaux - 1
+
+        # Vue en mots de 64 bits: le seau i occupe les mots 4i à 4i + 3 (hachage ^ données, données, hachage ^ données,
+        # données).
+        self.mots = memoryview(memoire).cast("B").cast("Q")[:nb_seaux * 4]
+
+        self.sondages = 0
+        self.succes = 0
+        self.collisions = 0
+        self.ecritures = 0
+        self.remplacements = 0
+
+    def sonder(self, hachage):
+        """
+        Cherche l'entrée d'une position.
+
+        Args:
+            hachage: Le hachage de 64 bits de la position (côté au trait compris).
+
+        Returns:
+            Un tuple (profondeur, borne, score, coup) si la position est dans la table, None autrement. Le coup est un
+            indice de case, ou AUCUN_COUP.
+        """
+        self.sondages += 1
+        mots = self.mots
+        i = (hachage & self.masque) << 2
+        donnees = mots[i + 1]
+        if donnees and mots[i] ^ donnees == hachage:
+            self.succes += 1
+            return decompacter(donnees)
+        donnees = mots[i + 3]
+        if donnees and mots[i + 2] ^ donnees == hachage:
+            self.succes += 1
+            return decompacter(donnees)
+        if mots[i + 1] or mots[i + 3]:
+            # Le seau est occupé par d'autres positions qui partagent le même indice
+            self.collisions += 1
+        return None
+
+    def enregistrer(self, hachage, profondeur, borne, score, coup=AUCUN_COUP):
+        """
+        Enregistre le résultat de la recherche d'une position.
+
+        La première place du seau est gardée pour l'entrée la plus profonde: elle n'est remplacée que par la même
+        position ou par une recherche au moins aussi profonde. Sinon, l'entrée va dans la deuxième place, qui est
+        toujours remplacée.
+
+        Args:
+            hachage: Le hachage de 64 bits de la position.
+            profondeur: La profondeur de la recherche (0 à 255).
+            borne: EXACTE, INFERIEURE ou SUPERIEURE.
+            score: Le score trouvé.
+            coup: L'indice de la case du meilleur coup, ou AUCUN_COUP.
+        """
+        self.ecritures += 1
+        mots = self.mots
+        i = (hachage & self.masque) << 2
+        donnees = compacter(min(profondeur, 255), borne, score, coup)
+        ancien = mots[i + 1]
+        meme_position = mots[i] ^ ancien == hachage
+        if not ancien or meme_position or profondeur >= (ancien >> 32) & 0xFF:
+            if ancien and not meme_position:
+                self.remplacements += 1
+            mots[i] = hachage ^ donnees
+            mots[i + 1] = donnees
+        else:
+            ancien = mots[i + 3]
+            if ancien and mots[i + 2] ^ ancien != hachage:
+                self.remplacements += 1
+            mots[i + 2] = hachage ^ donnees
+            mots[i + 3] = donnees
+
+    def vider(self):
+        """
+        Efface toutes les entrées et remet les statistiques à zéro.
+        """
+        self.mots.cast("B")[:] = bytes(self.mots.nbytes)
+        self.sondages = 0
+        self.succes = 0
+        self.collisions = 0
+        self.ecritures = 0
+        self.remplacements = 0
+
+    def statistiques(self):
+        """
+        Retourne les statistiques d'utilisation de la table, pour en choisir la taille.
+
+        Returns:
+            Un dictionnaire contenant la taille (octets et entrées), le nombre de sondages, le taux de succès, les
+            collisions d'indice (sondages ratés dans un seau occupé), les remplacements d'une autre position et le
+            taux de remplissage.
+        """
+        entrees = self.nb_seaux * 2
+        occupees = sum(1 for i in range(1, len(self.mots), 2) if self.mots[i])
+        return {
+            "octets": self.nb_seaux * OCTETS_PAR_SEAU,
+            "entrees": entrees,
+            "sondages": self.sondages,
+            "succes": self.succes,
+            "taux_succes": self.succes / self.sondages if self.sondages else 0.0,
+            "collisions": self.collisions,
+            "ecritures": self.ecritures,
+            "remplacements": self.remplacements,
+            "remplissage": occupees / entrees,
+        }
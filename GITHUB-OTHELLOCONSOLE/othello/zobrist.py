@@ -0,0 +1,71 @@
+import random
+
+from othello.piece import NOIR, BLANC
+
+# Graine fixe: les clés doivent être les mêmes d'une exécution (et d'un processus) à l'autre.
+GRAINE_ZOBRIST = 20190122
+
+_generateur = random.Random(GRAINE_ZOBRIST)
+
+# Une clé aléatoire de 64 bits par case et par couleur, indicée par code de couleur (voir piece.py) puis par case.
+CLES_ZOBRIST = [None, None, None]
+CLES_ZOBRIST[NOIR] = tuple(_generateur.getrandbits(64) for _ in range(64))
+CLES_ZOBRIST[BLANC] = tuple(_generateur.getrandbits(64) for _ in range(64))
+CLES_ZOBRIST = tuple(CLES_ZOBRIST)
+
+# Clé à combiner lorsqu'une pièce change de couleur sur une case (elle retire une couleur et ajoute l'autre).
+CLES_RETOURNEMENT = tuple(cle_noir ^ cle_blanc for cle_noir, cle_blanc in zip(CLES_ZOBRIST[NOIR], CLES_ZOBRIST[BLANC]))
+
+# Clé combinée au hachage de la planche lorsque c'est aux blancs de jouer.
+CLE_TRAIT_BLANC = _generateur.getrandbits(64)
+
+# Clés des planches de chaque taille (voir cles_zobrist), celles de la planche 8x8 étant celles plus haut.
+_CLES_PAR_TAILLE = {8: (CLES_ZOBRIST, CLES_RETOURNEMENT)}
+
+
+def cles_zobrist(n):
+    """
+    Retourne les clés de Zobrist d'une planche n x n, générées à la première demande puis conservées.
+
+    Args:
+        n: Le nombre de lignes (et de colonnes) de la planche.
+
+    Returns:
+        Un couple (clés par code de couleur puis par case, clés de retournement par case), comme CLES_ZOBRIST et
+        CLES_RETOURNEMENT.
+    """
+    cles = _CLES_PAR_TAILLE.get(n)
+    if cles is None:
+        generateur = random.Random(GRAINE_ZOBRIST + n)
+        cles_noir = tuple(generateur.getrandbits(64) for _ in range(n * n))
+        cles_blanc = tuple(generateur.getrandbits(64) for _ in range(n * n))
+        cles_retournement = tuple(cle_noir ^ cle_blanc for cle_noir, cle_blanc in zip(cles_noir, cles_blanc))
+        cles = _CLES_PAR_TAILLE[n] = ((None, cles_noir, cles_blanc), cles_retournement)
+    return cles
+
+
+def hacher_bitboards(noir, blanc, cles=CLES_ZOBRIST):
+    """
+    Calcule le hachage de Zobrist d'une planche à partir de ses bitboards, en combinant les clés de chaque pièce.
+    Les planches, elles, tiennent ce hachage à jour coup par coup.
+
+    Args:
+        noir: Le bitboard des pièces noires.
+        blanc: Le bitboard des pièces blanches.
+        cles: Les clés de la taille de la planche (voir cles_zobrist), celles de la planche 8x8 par défaut.
+
+    Returns:
+        Le hachage de 64 bits.
+    """
+    hachage = 0
+    cles_noir = cles[NOIR]
+    cles_blanc = cles[BLANC]
+    while noir:
+        bit = noir & -noir
+        hachage ^= cles_noir[bit.bit_length() - 1]
+        noir ^= bit
+    while blanc:
+        bit = blanc & -blanc
+        hachage ^= cles_blanc[bit.bit_length() - 1]
+        blanc ^= bit
+    return hachage